@@ -0,0 +1,183 @@
+"""
+Content-addressed storage for uploaded files in the ``documents_fs`` bucket.
+
+The same contract uploaded by several users – or re-uploaded, or staged
+again for a background job – used to be stored once per upload.  Now each
+distinct content is stored once:
+
+    document_blobs   {_id: sha256, file_id, refcount, length, created_at}
+
+• `ingest_upload` pipes an UploadFile chunk by chunk into a GridFS upload
+  stream, hashing and size-checking on the way, so a 100 MB scan is never
+  held in memory.  The hash is only known at the end: if the content is
+  already stored, the new copy is deleted and the existing one gains a
+  reference.  The UploadFile is rewound for the extractors.
+• `store_blob` does the same for bytes built in memory (reports,
+  translations); a known hash skips the upload.  Every call of either is
+  one reference.
+• `release_blob` drops one reference.  The GridFS file – and the text
+  extracted from it (core/text_cache.py) – is deleted when the last
+  reference goes.  Files stored before de-duplication have no
+  ``document_blobs`` row and are deleted directly, as before.
+• Records (``documents.file_id``, report/translation ids, staged job
+  inputs) keep pointing at a GridFS id, so readers are unchanged.
+
+Races: two first uploads of the same bytes both upload; the upsert
+decides which file_id is kept and the loser deletes its copy.  Removing a
+row is conditional on ``refcount <= 0``, so a concurrent upload that
+revives the blob wins over the delete.
+
+Environment variables
+---------------------
+UPLOAD_MAX_MB   default: 150   (larger uploads are rejected with 413)
+"""
+
+from __future__ import annotations
+
+import datetime as _dt
+import hashlib
+import logging
+import os
+from typing import Dict, NamedTuple
+
+from bson import ObjectId
+from fastapi import HTTPException, UploadFile
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
+from pymongo import ReturnDocument
+
+from backend.app.core.text_cache import text_cache
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────── configuration ─────────────────────────
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_MB", 150)) * 1024 * 1024
+CHUNK_BYTES      = 1024 * 1024
+BUCKET           = "documents_fs"
+COLL             = "document_blobs"
+
+counters: Dict[str, int] = {"stored": 0, "deduplicated": 0, "released": 0, "deleted": 0}
+
+
+class IngestedUpload(NamedTuple):
+    file_id: ObjectId
+    sha256: str
+    length: int
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    try:
+        await db[COLL].create_index("file_id")
+    except Exception as e:
+        logger.warning("Could not create indexes on %s: %s", COLL, e)
+
+
+def _bucket(db: AsyncIOMotorDatabase) -> AsyncIOMotorGridFSBucket:
+    return AsyncIOMotorGridFSBucket(db, bucket_name=BUCKET)
+
+
+async def _take_reference(db: AsyncIOMotorDatabase, sha256: str):
+    row = await db[COLL].find_one_and_update(
+        {"_id": sha256}, {"$inc": {"refcount": 1}}, return_document=ReturnDocument.AFTER
+    )
+    return row["file_id"] if row else None
+
+
+async def store_blob(db: AsyncIOMotorDatabase, data: bytes, filename: str) -> ObjectId:
+    """GridFS id of a file with content *data*, uploading it only if new."""
+    sha256 = hashlib.sha256(data).hexdigest()
+    file_id = await _take_reference(db, sha256)
+    if file_id is not None:
+        counters["deduplicated"] += 1
+        return file_id
+
+    # the hash also keys the extracted-text cache (controllers/documents.py)
+    uploaded = await _bucket(db).upload_from_stream(filename, data, metadata={"sha256": sha256})
+    return await _register(db, sha256, uploaded, len(data))
+
+
+async def ingest_upload(db: AsyncIOMotorDatabase, upload: UploadFile) -> IngestedUpload:
+    """Stream *upload* into GridFS (see module docstring); one reference."""
+    grid_in = _bucket(db).open_upload_stream(upload.filename)
+    digest = hashlib.sha256()
+    length = 0
+    try:
+        while chunk := await upload.read(CHUNK_BYTES):
+            length += len(chunk)
+            if length > UPLOAD_MAX_BYTES:
+                raise HTTPException(
+                    413, f"File too large – the limit is {UPLOAD_MAX_BYTES // (1024 * 1024)} MB."
+                )
+            digest.update(chunk)
+            await grid_in.write(chunk)
+    except BaseException:
+        await grid_in.abort()
+        raise
+    await grid_in.close()
+    await upload.seek(0)
+
+    sha256 = digest.hexdigest()
+    await db[f"{BUCKET}.files"].update_one(
+        {"_id": grid_in._id}, {"$set": {"metadata.sha256": sha256}}
+    )
+    file_id = await _register(db, sha256, grid_in._id, length)
+    return IngestedUpload(file_id, sha256, length)
+
+
+async def _register(db: AsyncIOMotorDatabase, sha256: str, uploaded: ObjectId, length: int) -> ObjectId:
+    """Reference the blob for *sha256*, keeping *uploaded* only if it is the first."""
+    row = await db[COLL].find_one_and_update(
+        {"_id": sha256},
+        {
+            "$setOnInsert": {
+                "file_id": uploaded,
+                "length": length,
+                "created_at": _dt.datetime.utcnow(),
+            },
+            "$inc": {"refcount": 1},
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    if row["file_id"] != uploaded:          # already stored (or a concurrent upload won)
+        await _bucket(db).delete(uploaded)
+        counters["deduplicated"] += 1
+        return row["file_id"]
+    counters["stored"] += 1
+    return uploaded
+
+
+async def release_blob(db: AsyncIOMotorDatabase, file_id) -> None:
+    """Drop one reference to *file_id*; delete the file with the last one."""
+    oid = ObjectId(file_id)
+    row = await db[COLL].find_one_and_update(
+        {"file_id": oid}, {"$inc": {"refcount": -1}}, return_document=ReturnDocument.AFTER
+    )
+    counters["released"] += 1
+    if row is None:                         # stored before de-duplication
+        await _bucket(db).delete(oid)
+        counters["deleted"] += 1
+        return
+    if row["refcount"] > 0:
+        return
+    gone = await db[COLL].delete_one({"_id": row["_id"], "refcount": {"$lte": 0}})
+    if gone.deleted_count:
+        await _bucket(db).delete(oid)
+        await text_cache.discard(row["_id"])
+        counters["deleted"] += 1
+        logger.info("Deleted blob %s (%s) – no references left", oid, row["_id"])
+
+
+async def blob_stats(db: AsyncIOMotorDatabase) -> Dict[str, int]:
+    """Process counters plus the stored vs referenced totals."""
+    totals = {"blobs": 0, "references": 0, "stored_bytes": 0, "referenced_bytes": 0}
+    async for doc in db[COLL].aggregate([
+        {"$group": {
+            "_id": None,
+            "blobs": {"$sum": 1},
+            "references": {"$sum": "$refcount"},
+            "stored_bytes": {"$sum": "$length"},
+            "referenced_bytes": {"$sum": {"$multiply": ["$length", "$refcount"]}},
+        }},
+    ]):
+        totals.update({k: v for k, v in doc.items() if k != "_id"})
+    return {**counters, **totals}
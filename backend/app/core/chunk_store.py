@@ -0,0 +1,206 @@
+"""
+Per-chunk result store for incremental re-analysis.
+
+Contracts go through many near-identical revisions.  The findings for a
+chunk depend only on the chunk's text, the prompt version and the model,
+so they are stored under
+
+    sha256(namespace | prompt_version | model | chunk text)
+
+and a re-upload only sends the chunks whose hash changed to GPT.  Unlike
+the response cache (core/llm_cache.py) the key does not include the rest
+of the prompt ("chunk 3 of 17" …), so inserting a page does not
+invalidate the untouched chunks, and what is stored is the *parsed*
+findings list rather than raw model output.
+
+Two tiers, like the response cache: an in-process LRU and – once
+`bind_database()` has run – the ``chunk_results`` collection, TTL-expired
+by Mongo.
+
+`iter_chunks_incremental` yields outcomes as chunks finish (for progress
+streaming); `map_chunks_incremental` collects them in chunk order.
+
+Environment variables
+---------------------
+CHUNK_STORE_ENABLED     default: 1        (0 = always re-analyse every chunk)
+CHUNK_STORE_MAX_ENTRIES default: 2048     (LRU size per process)
+CHUNK_STORE_TTL         default: 2592000  (seconds a Mongo entry lives – 30 days)
+"""
+
+from __future__ import annotations
+
+import datetime as _dt
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from backend.app.core.fanout import ChunkOutcome, iter_chunks
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────── configuration ─────────────────────────
+STORE_ENABLED     = os.getenv("CHUNK_STORE_ENABLED", "1") not in {"0", "false", "False"}
+STORE_MAX_ENTRIES = int(os.getenv("CHUNK_STORE_MAX_ENTRIES", 2048))
+STORE_TTL         = int(os.getenv("CHUNK_STORE_TTL", 30 * 24 * 3600))
+COLL              = "chunk_results"
+
+
+def chunk_key(namespace: str, chunk: str, *, prompt_version: str, model: str) -> str:
+    """Content hash of one chunk plus everything that shapes its findings."""
+    h = hashlib.sha256()
+    for part in (namespace, prompt_version, model, chunk):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class ChunkResultStore:
+    """LRU in front of an optional Mongo collection of per-chunk findings."""
+
+    def __init__(self, max_entries: int = STORE_MAX_ENTRIES, ttl: int = STORE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lru: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self.counters: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+    async def bind_database(self, db: AsyncIOMotorDatabase) -> None:
+        self._db = db
+        try:
+            await db[COLL].create_index("expires_at", expireAfterSeconds=0)
+        except Exception as e:
+            logger.warning("Could not create TTL index on %s: %s", COLL, e)
+
+    def _remember(self, key: str, findings: List[Any]) -> None:
+        self._lru[key] = findings
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    async def get_many(self, keys: Sequence[str]) -> Dict[str, List[Any]]:
+        """Stored findings for whichever *keys* are known."""
+        found: Dict[str, List[Any]] = {}
+        missing: List[str] = []
+        for key in keys:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                found[key] = self._lru[key]
+            else:
+                missing.append(key)
+
+        if missing and self._db is not None:
+            try:
+                cursor = self._db[COLL].find(
+                    {"_id": {"$in": missing}, "expires_at": {"$gt": _dt.datetime.utcnow()}},
+                    {"findings": 1},
+                )
+                async for doc in cursor:
+                    found[doc["_id"]] = doc["findings"]
+                    self._remember(doc["_id"], doc["findings"])
+            except Exception as e:
+                self.counters["errors"] += 1
+                logger.warning("Chunk store lookup failed: %s", e)
+
+        self.counters["hits"] += len(found)
+        self.counters["misses"] += len(keys) - len(found)
+        return found
+
+    async def put(self, key: str, findings: List[Any], *, namespace: str) -> None:
+        self._remember(key, findings)
+        self.counters["stores"] += 1
+        if self._db is None:
+            return
+        now = _dt.datetime.utcnow()
+        try:
+            await self._db[COLL].replace_one(
+                {"_id": key},
+                {
+                    "_id": key,
+                    "namespace": namespace,
+                    "findings": findings,
+                    "created_at": now,
+                    "expires_at": now + _dt.timedelta(seconds=self.ttl),
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning("Chunk store write failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "enabled": STORE_ENABLED,
+            "shared_tier": self._db is not None,
+            "memory_entries": len(self._lru),
+            "hit_ratio": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+chunk_store = ChunkResultStore()
+
+
+async def iter_chunks_incremental(
+    namespace: str,
+    chunks: Sequence[str],
+    worker: Callable[[int, str], Awaitable[List[Any]]],
+    *,
+    prompt_version: str,
+    model: str,
+) -> AsyncIterator[ChunkOutcome[List[Any]]]:
+    """
+    `iter_chunks` that reuses stored findings for unchanged chunks.
+
+    Stored chunks are yielded first (``reused=True``), then the remaining
+    chunks as *worker* finishes them, in completion order.  Successful
+    fresh results are stored before they are yielded.
+    """
+    if not STORE_ENABLED:
+        async for outcome in iter_chunks(chunks, worker):
+            yield outcome
+        return
+
+    keys = [chunk_key(namespace, c, prompt_version=prompt_version, model=model) for c in chunks]
+    known = await chunk_store.get_many(keys)
+    todo = [i for i, k in enumerate(keys) if k not in known]
+    logger.info("%s: %d/%d chunk(s) unchanged, %d to analyse",
+                namespace, len(chunks) - len(todo), len(chunks), len(todo))
+
+    for i, k in enumerate(keys):
+        if k in known:
+            yield ChunkOutcome(i, result=known[k], reused=True)
+
+    async for outcome in iter_chunks(
+        [chunks[i] for i in todo], lambda j, chunk: worker(todo[j], chunk)
+    ):
+        outcome.index = todo[outcome.index]
+        if outcome.ok:
+            await chunk_store.put(keys[outcome.index], outcome.result or [], namespace=namespace)
+        yield outcome
+
+
+async def map_chunks_incremental(
+    namespace: str,
+    chunks: Sequence[str],
+    worker: Callable[[int, str], Awaitable[List[Any]]],
+    *,
+    prompt_version: str,
+    model: str,
+) -> List[ChunkOutcome[List[Any]]]:
+    """
+    Like `iter_chunks_incremental` but waits for all chunks and returns
+    one outcome per chunk, in chunk order.
+    """
+    outcomes = [
+        outcome
+        async for outcome in iter_chunks_incremental(
+            namespace, chunks, worker, prompt_version=prompt_version, model=model
+        )
+    ]
+    outcomes.sort(key=lambda o: o.index)
+    return outcomes
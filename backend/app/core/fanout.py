@@ -0,0 +1,176 @@
+"""
+Bounded-concurrency fan-out over document chunks.
+
+Risk analysis and the compliance check both send every chunk of a
+document to GPT.  Doing that strictly one after another makes a 20-chunk
+document take 20× the latency of a single call; firing all of them at
+once lets one large upload monopolise the per-model slots of the LLM
+scheduler.  `map_chunks` runs at most CHUNK_CONCURRENCY chunks of one
+request at a time and returns one `ChunkOutcome` per chunk, in chunk
+order:
+
+• a chunk that raises is reported as a failed outcome – the others keep
+  going (partial failure is tolerated);
+• exception types listed in *fail_fast* (by default `LLMUnavailableError`)
+  cancel the remaining chunks and propagate – an outage must not look
+  like "nothing found";
+• every outcome carries its queue wait and run time.
+
+`iter_chunks` is the streaming variant, yielding outcomes as they finish;
+`with_progress` interleaves events the workers report while still running
+(e.g. findings parsed from a streamed response) with those outcomes.
+
+Environment variables
+---------------------
+CHUNK_CONCURRENCY      default: 4       (chunks of one request in flight)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Dict, Generic, List, Optional,
+    Sequence, Tuple, Type, TypeVar,
+)
+
+from backend.app.core.llm_resilience import LLMUnavailableError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# ───────────────────────── configuration ─────────────────────────
+CHUNK_CONCURRENCY = max(1, int(os.getenv("CHUNK_CONCURRENCY", 4)))
+
+
+@dataclass
+class ChunkOutcome(Generic[T]):
+    index: int                          # 0-based position of the chunk
+    result: Optional[T] = None
+    error: Optional[BaseException] = None
+    queued_ms: float = 0.0
+    elapsed_ms: float = 0.0
+    reused: bool = False                # served from the chunk result store
+    skipped: bool = False               # never sent – ruled out by a pre-filter
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def timing(self) -> Dict[str, Any]:
+        """Compact per-chunk record for persisting alongside a report."""
+        return {
+            "chunk": self.index + 1,
+            "ok": self.ok,
+            "reused": self.reused,
+            "skipped": self.skipped,
+            "queued_ms": round(self.queued_ms, 1),
+            "elapsed_ms": round(self.elapsed_ms, 1),
+            "error": type(self.error).__name__ if self.error else None,
+        }
+
+
+async def iter_chunks(
+    chunks: Sequence[str],
+    worker: Callable[[int, str], Awaitable[T]],
+    *,
+    concurrency: int = CHUNK_CONCURRENCY,
+    fail_fast: Tuple[Type[BaseException], ...] = (LLMUnavailableError,),
+) -> AsyncIterator[ChunkOutcome[T]]:
+    """
+    Run ``worker(index, chunk)`` for every chunk, at most *concurrency* at
+    a time, yielding outcomes in completion order.
+    """
+    sem = asyncio.Semaphore(max(1, concurrency))
+    submitted = time.monotonic()
+
+    async def _run(index: int, chunk: str) -> ChunkOutcome[T]:
+        async with sem:
+            started = time.monotonic()
+            outcome: ChunkOutcome[T] = ChunkOutcome(
+                index, queued_ms=(started - submitted) * 1000
+            )
+            try:
+                outcome.result = await worker(index, chunk)
+            except fail_fast:
+                raise
+            except Exception as e:
+                logger.error("Chunk %d/%d failed: %s", index + 1, len(chunks), e)
+                outcome.error = e
+            outcome.elapsed_ms = (time.monotonic() - started) * 1000
+            return outcome
+
+    tasks = [asyncio.ensure_future(_run(i, c)) for i, c in enumerate(chunks)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def map_chunks(
+    chunks: Sequence[str],
+    worker: Callable[[int, str], Awaitable[T]],
+    *,
+    concurrency: int = CHUNK_CONCURRENCY,
+    fail_fast: Tuple[Type[BaseException], ...] = (LLMUnavailableError,),
+) -> List[ChunkOutcome[T]]:
+    """Like `iter_chunks` but waits for all chunks and returns them in order."""
+    outcomes: List[ChunkOutcome[T]] = []
+    async for outcome in iter_chunks(
+        chunks, worker, concurrency=concurrency, fail_fast=fail_fast
+    ):
+        outcomes.append(outcome)
+    outcomes.sort(key=lambda o: o.index)
+    return outcomes
+
+
+class _FromSource(Generic[T]):
+    __slots__ = ("item",)
+
+    def __init__(self, item: T):
+        self.item = item
+
+
+_SOURCE_DONE = object()
+
+
+async def with_progress(
+    source: AsyncIterator[T],
+    progress: "asyncio.Queue[Any]",
+) -> AsyncIterator[Tuple[bool, Any]]:
+    """
+    Drive *source* while relaying whatever is put on *progress*.
+
+    Yields ``(True, item)`` for every item of *source* and ``(False, x)``
+    for every *x* queued on *progress* meanwhile, in arrival order, until
+    *source* is exhausted.  Errors from *source* propagate; closing this
+    generator early cancels *source*.
+    """
+    async def _pump() -> None:
+        try:
+            async for item in source:
+                progress.put_nowait(_FromSource(item))
+        finally:
+            progress.put_nowait(_SOURCE_DONE)
+
+    pump = asyncio.ensure_future(_pump())
+    try:
+        while True:
+            got = await progress.get()
+            if got is _SOURCE_DONE:
+                break
+            if isinstance(got, _FromSource):
+                yield True, got.item
+            else:
+                yield False, got
+        await pump                      # re-raise whatever stopped the source
+    finally:
+        pump.cancel()
+        await asyncio.gather(pump, return_exceptions=True)
@@ -0,0 +1,348 @@
+"""
+Durable background jobs on a MongoDB collection.
+
+Long GPT runs (risk analysis, compliance check, file translation) used to
+hold the HTTP request open for minutes – long enough for Render's proxy
+or the browser to give up, while a uvicorn worker stayed tied up.  Now
+the submit endpoint stores a job and returns its id; a worker executes it
+and the client polls ``/jobs/{id}``.
+
+Lifecycle
+---------
+    queued ──claim──► running ──► succeeded
+      ▲                  │
+      └── retry (backoff)┴──(permanent error / attempts used up)──► failed
+
+• Claiming is one atomic ``find_one_and_update``, so several workers (in
+  several processes) never run the same job twice at the same time.
+• A claimed job carries a lease (``lease_owner``, ``lease_expires_at``)
+  that the worker renews while the handler runs.  If the worker dies the
+  lease lapses and, after that visibility timeout, the job is claimed
+  again – up to JOB_MAX_ATTEMPTS runs in total.
+• complete / fail only apply while the caller still holds the lease, so
+  a worker that lost its lease cannot overwrite a newer attempt.
+• Handlers are registered per job kind with ``@job_handler("kind")`` and
+  return a JSON-able dict, stored as the job result.  An HTTPException
+  with a 4xx status fails the job permanently; anything else is retried.
+• A payload ``input_file_id`` names a staged upload in the documents_fs
+  GridFS bucket; it is released (core/blob_store.py) once the job has
+  finished for good.
+
+Workers run either inside the API process (JOB_INPROCESS_WORKERS loops,
+started from main.py) or standalone: ``python -m backend.worker``.
+
+Environment variables
+---------------------
+JOB_LEASE_SECS          default: 120     (visibility timeout of a claimed job)
+JOB_MAX_ATTEMPTS        default: 3
+JOB_RETRY_BASE          default: 10      (seconds; doubled per failed attempt)
+JOB_POLL_SECS           default: 2       (idle wait between claim attempts)
+JOB_RESULT_TTL          default: 604800  (finished jobs expire after 7 days)
+JOB_INPROCESS_WORKERS   default: 1       (worker loops inside the API, 0 = none)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as _dt
+import logging
+import os
+import socket
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from backend.app.core.blob_store import release_blob
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────── configuration ─────────────────────────
+LEASE_SECS         = float(os.getenv("JOB_LEASE_SECS", 120))
+MAX_ATTEMPTS       = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+RETRY_BASE         = float(os.getenv("JOB_RETRY_BASE", 10))
+POLL_SECS          = float(os.getenv("JOB_POLL_SECS", 2))
+RESULT_TTL         = int(os.getenv("JOB_RESULT_TTL", 7 * 24 * 3600))
+INPROCESS_WORKERS  = int(os.getenv("JOB_INPROCESS_WORKERS", 1))
+COLL               = "jobs"
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+Handler = Callable[[AsyncIOMotorDatabase, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+_handlers: Dict[str, Handler] = {}
+
+
+def job_handler(kind: str) -> Callable[[Handler], Handler]:
+    """Register the coroutine that executes jobs of *kind*."""
+    def register(fn: Handler) -> Handler:
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def _now() -> _dt.datetime:
+    return _dt.datetime.utcnow()
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    try:
+        await db[COLL].create_index([("status", 1), ("run_after", 1), ("created_at", 1)])
+        await db[COLL].create_index([("status", 1), ("lease_expires_at", 1)])
+        await db[COLL].create_index([("user_id", 1), ("created_at", -1)])
+        await db[COLL].create_index("expires_at", expireAfterSeconds=0)
+    except Exception as e:
+        logger.warning("Could not create indexes on %s: %s", COLL, e)
+
+
+# ═════════════════════════ queue operations ═════════════════════════
+async def enqueue_job(
+    db: AsyncIOMotorDatabase,
+    kind: str,
+    user_id: str,
+    payload: Dict[str, Any],
+    *,
+    max_attempts: int = MAX_ATTEMPTS,
+) -> str:
+    now = _now()
+    res = await db[COLL].insert_one({
+        "kind": kind,
+        "user_id": user_id,
+        "payload": payload,
+        "status": QUEUED,
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_after": now,
+        "created_at": now,
+        "updated_at": now,
+    })
+    logger.info("Queued %s job %s for %s", kind, res.inserted_id, user_id)
+    return str(res.inserted_id)
+
+
+async def claim_job(
+    db: AsyncIOMotorDatabase, worker_id: str, kinds: List[str]
+) -> Optional[Dict[str, Any]]:
+    """Atomically take the oldest runnable job (or one whose lease lapsed)."""
+    while True:
+        now = _now()
+        job = await db[COLL].find_one_and_update(
+            {
+                "kind": {"$in": kinds},
+                "$or": [
+                    {"status": QUEUED, "run_after": {"$lte": now}},
+                    {"status": RUNNING, "lease_expires_at": {"$lte": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "lease_owner": worker_id,
+                    "lease_expires_at": now + _dt.timedelta(seconds=LEASE_SECS),
+                    "started_at": now,
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if job is None:
+            return None
+        if job["attempts"] <= job["max_attempts"]:
+            return job
+        # a worker kept dying on this one – stop re-delivering it
+        await _finish(db, job, worker_id, {
+            "status": FAILED,
+            "error": {"status_code": 500, "detail": "Job abandoned – worker lease expired too often."},
+        })
+
+
+async def renew_lease(db: AsyncIOMotorDatabase, job: Dict[str, Any], worker_id: str) -> bool:
+    res = await db[COLL].update_one(
+        {"_id": job["_id"], "lease_owner": worker_id, "status": RUNNING},
+        {"$set": {"lease_expires_at": _now() + _dt.timedelta(seconds=LEASE_SECS)}},
+    )
+    return res.matched_count == 1
+
+
+async def _finish(
+    db: AsyncIOMotorDatabase, job: Dict[str, Any], worker_id: str, fields: Dict[str, Any]
+) -> bool:
+    now = _now()
+    fields = {**fields, "updated_at": now}
+    if fields["status"] in (SUCCEEDED, FAILED):
+        fields["finished_at"] = now
+        fields["expires_at"] = now + _dt.timedelta(seconds=RESULT_TTL)
+    res = await db[COLL].update_one(
+        {"_id": job["_id"], "lease_owner": worker_id, "status": RUNNING},
+        {"$set": fields, "$unset": {"lease_owner": "", "lease_expires_at": ""}},
+    )
+    if res.modified_count == 0:
+        logger.warning("Job %s: lease lost before it could be marked %s",
+                       job["_id"], fields["status"])
+        return False
+    if fields["status"] in (SUCCEEDED, FAILED):
+        await _drop_staged_input(db, job)
+    return True
+
+
+async def complete_job(
+    db: AsyncIOMotorDatabase, job: Dict[str, Any], worker_id: str, result: Dict[str, Any]
+) -> bool:
+    return await _finish(db, job, worker_id, {"status": SUCCEEDED, "result": result, "error": None})
+
+
+async def fail_job(
+    db: AsyncIOMotorDatabase,
+    job: Dict[str, Any],
+    worker_id: str,
+    *,
+    status_code: int,
+    detail: str,
+    retryable: bool,
+) -> bool:
+    error = {"status_code": status_code, "detail": detail}
+    if retryable and job["attempts"] < job["max_attempts"]:
+        delay = RETRY_BASE * 2 ** (job["attempts"] - 1)
+        logger.warning("Job %s attempt %d failed (%s) – retry in %.0fs",
+                       job["_id"], job["attempts"], detail, delay)
+        return await _finish(db, job, worker_id, {
+            "status": QUEUED,
+            "error": error,
+            "run_after": _now() + _dt.timedelta(seconds=delay),
+        })
+    logger.error("Job %s failed permanently: %s", job["_id"], detail)
+    return await _finish(db, job, worker_id, {"status": FAILED, "error": error})
+
+
+async def _drop_staged_input(db: AsyncIOMotorDatabase, job: Dict[str, Any]) -> None:
+    file_id = (job.get("payload") or {}).get("input_file_id")
+    if not file_id:
+        return
+    try:
+        await release_blob(db, file_id)
+    except Exception as e:
+        logger.warning("Job %s: could not delete staged input %s: %s", job["_id"], file_id, e)
+
+
+# ═════════════════════════ read side (API) ═════════════════════════
+async def get_job(db: AsyncIOMotorDatabase, job_id: str, user_id: str) -> Dict[str, Any]:
+    """Fetch a job owned by *user_id* or raise 404."""
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(400, "Invalid job ID.")
+    job = await db[COLL].find_one({"_id": ObjectId(job_id), "user_id": user_id})
+    if not job:
+        raise HTTPException(404, "Job not found.")
+    return job
+
+
+def job_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Public view of a job (without payload / result body)."""
+    return {
+        "job_id": str(job["_id"]),
+        "kind": job["kind"],
+        "status": job["status"],
+        "attempts": job.get("attempts", 0),
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+        "error": job.get("error"),
+    }
+
+
+# ═════════════════════════ worker ═════════════════════════
+class JobWorker:
+    """Claims and executes jobs, one at a time per worker loop."""
+
+    def __init__(self, db: AsyncIOMotorDatabase, *, kinds: Optional[List[str]] = None):
+        self.db = db
+        self.kinds = kinds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._stop = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    async def run(self) -> None:
+        kinds = self.kinds or sorted(_handlers)
+        logger.info("Job worker %s started for %s", self.worker_id, kinds)
+        while not self._stop.is_set():
+            try:
+                job = await claim_job(self.db, self.worker_id, kinds)
+            except Exception as e:
+                logger.error("Job worker %s: claim failed: %s", self.worker_id, e)
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stop.wait(), POLL_SECS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.execute(job)
+        logger.info("Job worker %s stopped", self.worker_id)
+
+    async def execute(self, job: Dict[str, Any]) -> None:
+        handler = _handlers.get(job["kind"])
+        if handler is None:
+            await fail_job(self.db, job, self.worker_id, status_code=500,
+                           detail=f"No handler for job kind {job['kind']!r}", retryable=False)
+            return
+
+        task = asyncio.ensure_future(handler(self.db, job))
+        heartbeat = asyncio.ensure_future(self._heartbeat(job, task))
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if not task.done():
+                # the worker itself is shutting down – the lease lapses and
+                # another worker picks the job up again
+                task.cancel()
+                raise
+            logger.warning("Job %s cancelled after losing its lease", job["_id"])
+            return
+        except HTTPException as e:
+            await fail_job(self.db, job, self.worker_id, status_code=e.status_code,
+                           detail=str(e.detail), retryable=e.status_code >= 500)
+            return
+        except Exception as e:
+            logger.exception("Job %s crashed", job["_id"])
+            await fail_job(self.db, job, self.worker_id, status_code=500,
+                           detail=str(e) or type(e).__name__, retryable=True)
+            return
+        finally:
+            heartbeat.cancel()
+        await complete_job(self.db, job, self.worker_id, result or {})
+
+    async def _heartbeat(self, job: Dict[str, Any], task: asyncio.Future) -> None:
+        while not task.done():
+            await asyncio.sleep(LEASE_SECS / 3)
+            try:
+                if not await renew_lease(self.db, job, self.worker_id):
+                    task.cancel()
+                    return
+            except Exception as e:
+                logger.warning("Job %s: lease renewal failed: %s", job["_id"], e)
+
+
+_inprocess: List[tuple[JobWorker, asyncio.Task]] = []
+
+
+async def start_workers(db: AsyncIOMotorDatabase, count: int = INPROCESS_WORKERS) -> None:
+    """Start *count* worker loops in the current event loop."""
+    await ensure_indexes(db)
+    for _ in range(count):
+        worker = JobWorker(db)
+        _inprocess.append((worker, asyncio.create_task(worker.run())))
+
+
+async def stop_workers() -> None:
+    """Stop claiming new jobs; running ones fall back to the queue via their lease."""
+    for worker, _task in _inprocess:
+        worker.stop()
+    for _worker, task in _inprocess:
+        task.cancel()
+    await asyncio.gather(*(t for _w, t in _inprocess), return_exceptions=True)
+    _inprocess.clear()
@@ -0,0 +1,144 @@
+"""
+Deferred loading of heavy dependencies.
+
+Importing the API used to pull in the OpenAI SDK, PyMuPDF, pdfminer,
+pdf2image, pytesseract, python-docx, reportlab … and load the tiktoken
+encoding (a download on a fresh instance) before the first request
+could be served.  Modules now hold `Lazy` placeholders instead:
+
+    fitz      = lazy_import("fitz")                    # module on first use
+    Document  = lazy_attr("docx", "Document")          # one attribute
+    ENCODING  = Lazy(lambda: tiktoken.get_encoding(…), "tiktoken encoding")
+
+A placeholder forwards attribute access and calls to the real object,
+loading it once (thread-safe) the first time it is touched, so call
+sites stay unchanged.  Placeholders created with ``warm=True`` are also
+loaded by `start_warmup()` in a background thread right after startup,
+so the first request usually finds them ready without the process
+having waited for them.
+
+`module_available()` answers "is this optional dependency installed?"
+without importing it.
+
+See utils/bench_startup.py for the import-time budget check.
+
+Environment variables
+---------------------
+WARMUP_ON_STARTUP      default: 1       (0 = load only on first use)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import importlib.util
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# ───────────────────────── configuration ─────────────────────────
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") not in {"0", "false", "False"}
+
+_warm: List["Lazy[Any]"] = []
+
+
+class Lazy(Generic[T]):
+    """Placeholder that builds its value on first use."""
+
+    __slots__ = ("_factory", "_name", "_value", "_loaded", "_lock")
+
+    def __init__(self, factory: Callable[[], T], name: str, *, warm: bool = False):
+        self._factory = factory
+        self._name = name
+        self._value: Optional[T] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        if warm:
+            _warm.append(self)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> T:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    started = time.perf_counter()
+                    self._value = self._factory()
+                    self._loaded = True
+                    logger.debug("Loaded %s in %.0f ms", self._name,
+                                 (time.perf_counter() - started) * 1000)
+        return self._value  # type: ignore[return-value]
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.get(), attr)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self.get()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"<Lazy {self._name} ({'loaded' if self._loaded else 'pending'})>"
+
+
+def lazy_import(name: str, *, warm: bool = True) -> Lazy[Any]:
+    """Module *name*, imported on first attribute access."""
+    return Lazy(lambda: importlib.import_module(name), name, warm=warm)
+
+
+def lazy_attr(module: str, attr: str, *, warm: bool = True) -> Lazy[Any]:
+    """``module.attr``, imported on first use (call or attribute access)."""
+    return Lazy(lambda: getattr(importlib.import_module(module), attr),
+                f"{module}.{attr}", warm=warm)
+
+
+def module_available(name: str) -> bool:
+    """True if *name* can be imported – checked without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+# ═════════════════════════ warm-up ═════════════════════════
+def warm_up() -> Dict[str, float]:
+    """Load every ``warm=True`` placeholder now; returns ms per item."""
+    timings: Dict[str, float] = {}
+    for item in list(_warm):
+        if item.loaded:
+            continue
+        started = time.perf_counter()
+        try:
+            item.get()
+        except Exception as e:
+            # not fatal – whoever uses it first will see the error
+            logger.warning("Warm-up of %s failed: %s", item._name, e)
+            continue
+        timings[item._name] = round((time.perf_counter() - started) * 1000, 1)
+    return timings
+
+
+_warmup_task: Optional["asyncio.Task[Dict[str, float]]"] = None
+
+
+def start_warmup() -> Optional["asyncio.Task[Dict[str, float]]"]:
+    """Run `warm_up` in a worker thread without delaying startup."""
+    global _warmup_task
+    if not WARMUP_ON_STARTUP or _warmup_task is not None:
+        return _warmup_task
+
+    async def _run() -> Dict[str, float]:
+        started = time.perf_counter()
+        timings = await asyncio.to_thread(warm_up)
+        logger.info("Warm-up finished in %.0f ms: %s",
+                    (time.perf_counter() - started) * 1000, timings)
+        return timings
+
+    _warmup_task = asyncio.get_running_loop().create_task(_run())
+    return _warmup_task
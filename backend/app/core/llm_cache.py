@@ -0,0 +1,170 @@
+"""
+Content-addressed response cache for `call_gpt`.
+
+Two tiers, both keyed by a SHA-256 over the request payload
+(model, system_message, prompt, temperature, response_format, prompt
+version):
+
+1. in-process LRU        – bounded, per worker, microsecond hits
+2. MongoDB collection    – shared by all workers, TTL-expired by Mongo
+
+Caching is *opt-in* per call (`call_gpt(..., cache=True)`); only
+deterministic analysis prompts should use it.  The Mongo tier becomes
+active once `bind_database()` has been called during app startup – until
+then (CLI scripts, workers without a DB) only the LRU tier is used.
+
+Environment variables
+---------------------
+LLM_CACHE_ENABLED      default: 1       (0 disables both tiers globally)
+LLM_CACHE_MAX_ENTRIES  default: 512     (LRU size per process)
+LLM_CACHE_TTL          default: 604800  (seconds a Mongo entry lives – 7 days)
+"""
+
+from __future__ import annotations
+
+import datetime as _dt
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────── configuration ─────────────────────────
+CACHE_ENABLED     = os.getenv("LLM_CACHE_ENABLED", "1") not in {"0", "false", "False"}
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 512))
+CACHE_TTL         = int(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600))
+COLL              = "llm_cache"
+
+
+def cache_key(
+    *,
+    model: str,
+    system_message: Optional[str],
+    prompt: str,
+    temperature: Optional[float],
+    response_format: Any,
+    prompt_version: Optional[str],
+) -> str:
+    """Stable hash of everything that influences the model's answer."""
+    payload = json.dumps(
+        {
+            "model": model,
+            "system": system_message or "",
+            "prompt": prompt,
+            "temperature": temperature,
+            "response_format": response_format,
+            "version": prompt_version or "",
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """LRU in front of an optional Mongo collection."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: int = CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lru: "OrderedDict[str, str]" = OrderedDict()
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self.counters: Dict[str, int] = {
+            "memory_hits": 0,
+            "mongo_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "errors": 0,
+        }
+
+    # ----- setup -------------------------------------------------------
+    async def bind_database(self, db: AsyncIOMotorDatabase) -> None:
+        """Enable the shared tier and make sure the TTL index exists."""
+        self._db = db
+        try:
+            await db[COLL].create_index("expires_at", expireAfterSeconds=0)
+        except Exception as e:
+            logger.warning("Could not create TTL index on %s: %s", COLL, e)
+
+    # ----- LRU helpers -------------------------------------------------
+    def _remember(self, key: str, value: str) -> None:
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    # ----- public API --------------------------------------------------
+    async def get(self, key: str) -> Optional[str]:
+        value, _tier = await self.lookup(key)
+        return value
+
+    async def lookup(self, key: str) -> Tuple[Optional[str], Optional[str]]:
+        """Like `get` but also reports the tier that answered ("memory"/"mongo")."""
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            self.counters["memory_hits"] += 1
+            return self._lru[key], "memory"
+
+        if self._db is not None:
+            try:
+                doc = await self._db[COLL].find_one(
+                    {"_id": key, "expires_at": {"$gt": _dt.datetime.utcnow()}},
+                    {"response": 1},
+                )
+            except Exception as e:
+                self.counters["errors"] += 1
+                logger.warning("LLM cache lookup failed: %s", e)
+                doc = None
+            if doc:
+                self.counters["mongo_hits"] += 1
+                self._remember(key, doc["response"])
+                return doc["response"], "mongo"
+
+        self.counters["misses"] += 1
+        return None, None
+
+    async def set(self, key: str, value: str, *, model: str) -> None:
+        if not value:          # never cache failures / empty answers
+            return
+        self._remember(key, value)
+        self.counters["stores"] += 1
+        if self._db is None:
+            return
+        now = _dt.datetime.utcnow()
+        try:
+            await self._db[COLL].replace_one(
+                {"_id": key},
+                {
+                    "_id": key,
+                    "model": model,
+                    "response": value,
+                    "created_at": now,
+                    "expires_at": now + _dt.timedelta(seconds=self.ttl),
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning("LLM cache store failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.counters["memory_hits"] + self.counters["mongo_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            **self.counters,
+            "enabled": CACHE_ENABLED,
+            "shared_tier": self._db is not None,
+            "memory_entries": len(self._lru),
+            "memory_capacity": self.max_entries,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+llm_cache = LLMCache()
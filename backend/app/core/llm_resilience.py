@@ -0,0 +1,295 @@
+"""
+Retry / fallback / circuit-breaker policy for outbound LLM requests.
+
+• Errors are classified: transient ones (429, 5xx, timeouts, connection
+  resets) are retried with jittered exponential backoff, honouring the
+  provider's Retry-After header; "model unavailable" errors (404/403,
+  exhausted quota) skip straight to the next model; everything else
+  (400 bad request, auth) fails immediately.
+• Every model has a circuit breaker: after N consecutive transient
+  failures it opens for a cool-down period, during which requests go to
+  the fallback models instead of queuing behind a dead endpoint.
+• When every model in the chain is exhausted an `LLMUnavailableError`
+  is raised – callers must never mistake an outage for an empty answer.
+
+Environment variables
+---------------------
+LLM_MAX_RETRIES          default: 3     (retries per model, after the first try)
+LLM_BACKOFF_BASE         default: 1.0   (seconds)
+LLM_BACKOFF_MAX          default: 30    (seconds, cap for one sleep)
+LLM_BREAKER_THRESHOLD    default: 5     (consecutive failures that open it)
+LLM_BREAKER_COOLDOWN     default: 30    (seconds before a half-open probe)
+LLM_FALLBACK_CHAIN       default: {"o4-mini": ["gpt-4o-mini"]}
+                         JSON map model-prefix → ordered fallback models
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from backend.app.core.lazy import lazy_import
+
+openai = lazy_import("openai", warm=False)   # only needed to classify errors
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# ───────────────────────── configuration ─────────────────────────
+MAX_RETRIES        = int(os.getenv("LLM_MAX_RETRIES", 3))
+BACKOFF_BASE       = float(os.getenv("LLM_BACKOFF_BASE", 1.0))
+BACKOFF_MAX        = float(os.getenv("LLM_BACKOFF_MAX", 30))
+BREAKER_THRESHOLD  = int(os.getenv("LLM_BREAKER_THRESHOLD", 5))
+BREAKER_COOLDOWN   = float(os.getenv("LLM_BREAKER_COOLDOWN", 30))
+_DEFAULT_CHAIN     = '{"o4-mini": ["gpt-4o-mini"]}'
+
+RETRY = "retry"
+NEXT_MODEL = "next_model"
+FATAL = "fatal"
+
+
+class LLMUnavailableError(RuntimeError):
+    """Raised when no model in the fallback chain produced an answer."""
+
+
+def _load_chain() -> Dict[str, List[str]]:
+    try:
+        return {k: list(v) for k, v in json.loads(
+            os.getenv("LLM_FALLBACK_CHAIN", _DEFAULT_CHAIN) or "{}"
+        ).items()}
+    except Exception as e:
+        logger.error("Invalid LLM_FALLBACK_CHAIN (%s) – fallbacks disabled", e)
+        return {}
+
+
+FALLBACK_CHAIN = _load_chain()
+
+
+def model_chain(model: str) -> List[str]:
+    """*model* followed by its configured fallbacks (longest prefix match)."""
+    best = ""
+    for prefix in FALLBACK_CHAIN:
+        if model.startswith(prefix) and len(prefix) > len(best):
+            best = prefix
+    chain = [model]
+    for m in FALLBACK_CHAIN.get(best, []):
+        if m not in chain:
+            chain.append(m)
+    return chain
+
+
+# ═════════════════════════ error classification ═════════════════════════
+def classify(exc: BaseException) -> str:
+    """Map an exception onto RETRY, NEXT_MODEL or FATAL."""
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError,
+                        asyncio.TimeoutError)):
+        return RETRY
+    if isinstance(exc, openai.RateLimitError):
+        code = getattr(exc, "code", None)
+        return NEXT_MODEL if code == "insufficient_quota" else RETRY
+    if isinstance(exc, (openai.NotFoundError, openai.PermissionDeniedError)):
+        return NEXT_MODEL
+    if isinstance(exc, openai.APIStatusError):
+        status = exc.status_code
+        if status in (408, 409, 429) or status >= 500:
+            return RETRY
+    return FATAL
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds requested by the provider via Retry-After(-ms), if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def backoff_delay(attempt: int, hint: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's hint."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    if hint is not None:
+        delay = max(delay, min(hint, BACKOFF_MAX))
+    return delay
+
+
+# ═════════════════════════ circuit breaker ═════════════════════════
+class CircuitBreaker:
+    """closed → (N failures) → open → (cool-down) → half-open → closed/open."""
+
+    def __init__(self, model: str, threshold: int = BREAKER_THRESHOLD,
+                 cooldown: float = BREAKER_COOLDOWN):
+        self.model = model
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True        # exactly one probe request
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("Circuit for %s closed again", self.model)
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def release_probe(self) -> None:
+        """The probe ended without a verdict (cancelled) – allow another."""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.threshold:
+            if self.opened_at is None or self._probing:
+                logger.warning("Circuit for %s opened after %d failure(s)",
+                               self.model, self.failures)
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def breaker_for(model: str) -> CircuitBreaker:
+    if model not in _breakers:
+        _breakers[model] = CircuitBreaker(model)
+    return _breakers[model]
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    return {m: b.stats() for m, b in _breakers.items()}
+
+
+# ═════════════════════════ policy drivers ═════════════════════════
+async def _after_failure(model: str, attempt: int, exc: Exception) -> bool:
+    """
+    Book-keep one failed attempt.  Returns True to retry *model*, False to
+    move on to the next fallback; raises for non-recoverable errors.
+    """
+    kind = classify(exc)
+    breaker = breaker_for(model)
+    if kind == FATAL:
+        # the provider answered – the request was bad, not the endpoint
+        breaker.record_success()
+        raise LLMUnavailableError(f"{model} rejected the request: {exc}") from exc
+
+    breaker.record_failure()
+    if kind == NEXT_MODEL or attempt >= MAX_RETRIES or breaker.state != "closed":
+        logger.warning("%s failed (%s) – giving up on this model", model, exc)
+        return False
+
+    delay = backoff_delay(attempt, retry_after(exc))
+    logger.warning("%s failed (%s) – retry %d/%d in %.1fs",
+                   model, exc, attempt + 1, MAX_RETRIES, delay)
+    await asyncio.sleep(delay)
+    return True
+
+
+async def call_with_resilience(model: str, run: Callable[[str], Awaitable[T]]) -> T:
+    """
+    Execute ``run(candidate_model)`` under the retry / breaker / fallback
+    policy and return the first successful result.
+    """
+    last_exc: Optional[Exception] = None
+    for candidate in model_chain(model):
+        breaker = breaker_for(candidate)
+        for attempt in range(MAX_RETRIES + 1):
+            probe = breaker.state == "half_open"
+            if not breaker.allow():
+                logger.info("Circuit for %s is open – skipping", candidate)
+                break
+            try:
+                result = await run(candidate)
+            except Exception as e:
+                last_exc = e
+                if not await _after_failure(candidate, attempt, e):
+                    break
+                continue
+            finally:
+                if probe:               # cancelled probes must not wedge the breaker
+                    breaker.release_probe()
+            breaker.record_success()
+            if candidate != model:
+                logger.info("Served by fallback model %s (requested %s)", candidate, model)
+            return result
+
+    raise LLMUnavailableError(
+        f"No model in {model_chain(model)} could serve the request: {last_exc}"
+    ) from last_exc
+
+
+async def stream_with_resilience(
+    model: str, open_stream: Callable[[str], AsyncIterator[T]]
+) -> AsyncIterator[T]:
+    """
+    Streaming counterpart of `call_with_resilience`.
+
+    Attempts are retried / re-routed only until the first item has been
+    yielded; a failure after that point cannot be replayed and surfaces as
+    `LLMUnavailableError`.
+    """
+    last_exc: Optional[Exception] = None
+    for candidate in model_chain(model):
+        breaker = breaker_for(candidate)
+        for attempt in range(MAX_RETRIES + 1):
+            probe = breaker.state == "half_open"
+            if not breaker.allow():
+                logger.info("Circuit for %s is open – skipping", candidate)
+                break
+            delivered = False
+            try:
+                async for item in open_stream(candidate):
+                    delivered = True
+                    yield item
+            except Exception as e:
+                last_exc = e
+                if delivered:
+                    breaker.record_failure()
+                    raise LLMUnavailableError(
+                        f"{candidate} stream broke off: {e}"
+                    ) from e
+                if not await _after_failure(candidate, attempt, e):
+                    break
+                continue
+            finally:
+                if probe:
+                    breaker.release_probe()
+            breaker.record_success()
+            return
+
+    raise LLMUnavailableError(
+        f"No model in {model_chain(model)} could serve the request: {last_exc}"
+    ) from last_exc
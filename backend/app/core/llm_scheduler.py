@@ -0,0 +1,232 @@
+"""
+Global admission control for outbound LLM requests.
+
+Every `call_gpt` passes through `scheduler.slot()` before it reaches the
+provider.  Requests for the same model share one budget made of three
+limits:
+
+• concurrency          – requests in flight at the same time
+• requests per minute  – sliding 60 s window
+• tokens per minute    – sliding 60 s window, estimated from the prompt
+                         size plus the completion cap (the same figure the
+                         provider's own rate limiter charges up-front)
+
+Callers that do not fit into the budget queue up (FIFO per model) instead
+of failing with a 429.  Once the response arrives the estimate is replaced
+by the real usage so the window reflects what was actually spent.
+
+Environment variables
+---------------------
+LLM_MAX_CONCURRENCY    default: 8       (per model)
+LLM_RPM                default: 500     (per model, 0 = unlimited)
+LLM_TPM                default: 200000  (per model, 0 = unlimited)
+LLM_MODEL_LIMITS       default: ""      JSON overrides per model prefix, e.g.
+                       {"o4-mini": {"concurrency": 4, "rpm": 300, "tpm": 150000}}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────── configuration ─────────────────────────
+DEFAULT_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+DEFAULT_RPM         = int(os.getenv("LLM_RPM", 500))
+DEFAULT_TPM         = int(os.getenv("LLM_TPM", 200_000))
+WINDOW_SECONDS      = 60.0
+CHARS_PER_TOKEN     = 4          # cheap estimate – no tokenizer on the hot path
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    concurrency: int = DEFAULT_CONCURRENCY
+    rpm: int = DEFAULT_RPM
+    tpm: int = DEFAULT_TPM
+
+
+def _load_overrides() -> Dict[str, ModelLimits]:
+    """Parse LLM_MODEL_LIMITS; a broken value is logged and ignored."""
+    raw = os.getenv("LLM_MODEL_LIMITS", "").strip()
+    if not raw:
+        return {}
+    try:
+        return {
+            model: ModelLimits(
+                concurrency=int(cfg.get("concurrency", DEFAULT_CONCURRENCY)),
+                rpm=int(cfg.get("rpm", DEFAULT_RPM)),
+                tpm=int(cfg.get("tpm", DEFAULT_TPM)),
+            )
+            for model, cfg in json.loads(raw).items()
+        }
+    except Exception as e:
+        logger.error("Invalid LLM_MODEL_LIMITS (%s) – using defaults", e)
+        return {}
+
+
+def estimate_tokens(*texts: Optional[str], completion_tokens: int = 0) -> int:
+    """Rough token cost of a request: prompt characters / 4 + completion cap."""
+    chars = sum(len(t) for t in texts if t)
+    return chars // CHARS_PER_TOKEN + 1 + max(completion_tokens, 0)
+
+
+# ═════════════════════════ per-model budget ═════════════════════════
+class _Lease:
+    """Handle for one admitted request; lets the caller report real usage."""
+
+    def __init__(self, budget: "_ModelBudget", entry: List[float]):
+        self._budget = budget
+        self._entry = entry
+
+    @property
+    def estimated_tokens(self) -> int:
+        return int(self._entry[1])
+
+    def settle(self, actual_tokens: Optional[int]) -> None:
+        """Replace the up-front estimate with the provider-reported usage."""
+        if actual_tokens is None:
+            return
+        # a call longer than the window was already pruned with its estimate
+        if not self._entry[2]:
+            self._budget.window_tokens += actual_tokens - self._entry[1]
+        self._entry[1] = actual_tokens
+
+
+class _ModelBudget:
+    def __init__(self, model: str, limits: ModelLimits):
+        self.model = model
+        self.limits = limits
+        self.in_flight = 0
+        self.window: Deque[List[float]] = deque()   # [admitted_at, tokens, expired]
+        self.window_tokens = 0
+        self._queue: Deque[object] = deque()
+        self._wakeup = asyncio.Event()
+
+    # ----- bookkeeping -----------------------------------------------
+    def _prune(self, now: float) -> None:
+        while self.window and now - self.window[0][0] >= WINDOW_SECONDS:
+            entry = self.window.popleft()
+            entry[2] = 1
+            self.window_tokens -= entry[1]
+
+    def _notify(self) -> None:
+        """Wake every waiter; each one re-evaluates its own position."""
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    def _delay(self, tokens: int, now: float) -> Optional[float]:
+        """
+        0     → admit now
+        > 0   → budget frees up in that many seconds
+        None  → blocked on concurrency, wait for a release
+        """
+        lim = self.limits
+        if lim.concurrency and self.in_flight >= lim.concurrency:
+            return None
+        self._prune(now)
+        if lim.rpm and len(self.window) >= lim.rpm:
+            return self.window[0][0] + WINDOW_SECONDS - now
+        # an oversized request is admitted once the window is empty,
+        # otherwise it would never fit
+        if lim.tpm and self.window and self.window_tokens + tokens > lim.tpm:
+            freed = 0.0
+            for admitted_at, t, _ in self.window:
+                freed += t
+                if self.window_tokens - freed + tokens <= lim.tpm:
+                    return admitted_at + WINDOW_SECONDS - now
+            return self.window[-1][0] + WINDOW_SECONDS - now
+        return 0
+
+    # ----- admission --------------------------------------------------
+    async def acquire(self, tokens: int) -> _Lease:
+        ticket = object()
+        self._queue.append(ticket)
+        waited_from = time.monotonic()
+        try:
+            while True:
+                now = time.monotonic()
+                delay = self._delay(tokens, now) if self._queue[0] is ticket else None
+                if delay is not None and delay <= 0:
+                    entry: List[float] = [now, tokens, 0]
+                    self.window.append(entry)
+                    self.window_tokens += tokens
+                    self.in_flight += 1
+                    break
+                wakeup = self._wakeup
+                try:
+                    await asyncio.wait_for(wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._queue.remove(ticket)
+            self._notify()
+
+        waited = time.monotonic() - waited_from
+        if waited > 1:
+            logger.info("LLM scheduler: %s request queued %.1fs", self.model, waited)
+        return _Lease(self, entry)
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._notify()
+
+    def stats(self) -> Dict[str, int]:
+        self._prune(time.monotonic())
+        return {
+            "in_flight": self.in_flight,
+            "queued": len(self._queue),
+            "requests_last_minute": len(self.window),
+            "tokens_last_minute": int(self.window_tokens),
+            "concurrency_limit": self.limits.concurrency,
+            "rpm_limit": self.limits.rpm,
+            "tpm_limit": self.limits.tpm,
+        }
+
+
+# ═════════════════════════ public scheduler ═════════════════════════
+class LLMScheduler:
+    """Process-wide registry of per-model budgets."""
+
+    def __init__(self, overrides: Optional[Dict[str, ModelLimits]] = None):
+        self._overrides = overrides if overrides is not None else _load_overrides()
+        self._budgets: Dict[str, _ModelBudget] = {}
+
+    def limits_for(self, model: str) -> ModelLimits:
+        """Longest matching override prefix wins, else the global defaults."""
+        best = ""
+        for prefix in self._overrides:
+            if model.startswith(prefix) and len(prefix) > len(best):
+                best = prefix
+        return self._overrides.get(best, ModelLimits())
+
+    def _budget(self, model: str) -> _ModelBudget:
+        if model not in self._budgets:
+            self._budgets[model] = _ModelBudget(model, self.limits_for(model))
+        return self._budgets[model]
+
+    @asynccontextmanager
+    async def slot(self, model: str, tokens: int) -> AsyncIterator[_Lease]:
+        """
+        Wait until *model* has room for a request costing *tokens*, then hold
+        a concurrency slot for the duration of the ``async with`` block.
+        """
+        budget = self._budget(model)
+        lease = await budget.acquire(tokens)
+        try:
+            yield lease
+        finally:
+            budget.release()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {model: b.stats() for model, b in self._budgets.items()}
+
+
+scheduler = LLMScheduler()
@@ -0,0 +1,224 @@
+"""
+Token / cost accounting for every LLM call.
+
+Each upstream attempt, cache hit and coalesced call produces one usage
+record:
+
+    model, requested_model, feature, user_id, prompt_tokens,
+    completion_tokens, cost_usd, latency_ms, ttft_ms, cache, ok, error,
+    created_at
+
+Who triggered a call is carried in a context variable: controllers call
+``tag_llm_caller("risk", user_id)`` once at their entry point and every
+`call_gpt` / `stream_gpt` below inherits the tag (asyncio copies context
+into child tasks, so fan-outs keep it too).
+
+Records are buffered in memory and written to the ``llm_usage`` collection
+in batches by a background flusher started from `bind_database()`.
+
+Environment variables
+---------------------
+LLM_USAGE_BATCH        default: 50      (records per insert_many)
+LLM_USAGE_FLUSH_SECS   default: 5       (max seconds a record waits)
+LLM_USAGE_BUFFER_MAX   default: 10000   (oldest records dropped beyond this)
+LLM_PRICES             default: ""      JSON overrides, USD per 1M tokens:
+                       {"o4-mini": {"input": 1.10, "output": 4.40}}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import datetime as _dt
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from backend.app.core.lazy import Lazy, lazy_import
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────── configuration ─────────────────────────
+BATCH_SIZE  = int(os.getenv("LLM_USAGE_BATCH", 50))
+FLUSH_SECS  = float(os.getenv("LLM_USAGE_FLUSH_SECS", 5))
+BUFFER_MAX  = int(os.getenv("LLM_USAGE_BUFFER_MAX", 10_000))
+COLL        = "llm_usage"
+
+# USD per 1M tokens (input, output) – longest prefix wins
+_PRICES: Dict[str, Dict[str, float]] = {
+    "o4-mini": {"input": 1.10, "output": 4.40},
+    "o3": {"input": 2.00, "output": 8.00},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+    "gpt-4o": {"input": 2.50, "output": 10.00},
+    "gpt-4": {"input": 30.00, "output": 60.00},
+    "gpt-3.5-turbo": {"input": 0.50, "output": 1.50},
+}
+try:
+    _PRICES.update(json.loads(os.getenv("LLM_PRICES", "") or "{}"))
+except Exception as e:
+    logger.error("Invalid LLM_PRICES (%s) – using built-in price table", e)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    best = ""
+    for prefix in _PRICES:
+        if model.startswith(prefix) and len(prefix) > len(best):
+            best = prefix
+    price = _PRICES.get(best)
+    if not price:
+        return 0.0
+    return round(
+        (prompt_tokens * price["input"] + completion_tokens * price["output"]) / 1_000_000,
+        6,
+    )
+
+
+# ───────────────────────── caller tagging ─────────────────────────
+_caller: contextvars.ContextVar[Tuple[str, Optional[str]]] = contextvars.ContextVar(
+    "llm_caller", default=("untagged", None)
+)
+
+
+def tag_llm_caller(feature: str, user_id: Optional[str] = None) -> None:
+    """Attribute every LLM call in the current request/task to *feature*/*user_id*."""
+    _caller.set((feature, user_id))
+
+
+def current_caller() -> Tuple[str, Optional[str]]:
+    return _caller.get()
+
+
+# ───────────────────────── token counting ─────────────────────────
+tiktoken = lazy_import("tiktoken", warm=False)
+# loaded by the startup warm-up (core/lazy.py), never on a metered call
+ENCODING = Lazy(lambda: tiktoken.get_encoding("o200k_base"),
+                "tiktoken usage encoding", warm=True)
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """tiktoken count once the encoding is loaded, chars/4 until then."""
+    if not text:
+        return 0
+    if ENCODING.loaded:
+        return len(ENCODING.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+# ═════════════════════════ recorder ═════════════════════════
+class UsageRecorder:
+    def __init__(self) -> None:
+        self._buffer: List[Dict[str, Any]] = []
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self.dropped = 0
+
+    async def bind_database(self, db: AsyncIOMotorDatabase) -> None:
+        """Start batch-writing to Mongo; safe to call once per process."""
+        self._db = db
+        try:
+            await db[COLL].create_index([("created_at", -1)])
+            await db[COLL].create_index([("user_id", 1), ("created_at", -1)])
+            await db[COLL].create_index([("feature", 1), ("created_at", -1)])
+        except Exception as e:
+            logger.warning("Could not create indexes on %s: %s", COLL, e)
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    def record(
+        self,
+        *,
+        model: str,
+        requested_model: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        latency_ms: Optional[float] = None,
+        ttft_ms: Optional[float] = None,
+        cache: str = "miss",
+        ok: bool = True,
+        error: Optional[str] = None,
+    ) -> None:
+        feature, user_id = current_caller()
+        self._buffer.append({
+            "model": model,
+            "requested_model": requested_model,
+            "feature": feature,
+            "user_id": user_id,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "cost_usd": estimate_cost(model, prompt_tokens, completion_tokens),
+            "latency_ms": round(latency_ms, 1) if latency_ms is not None else None,
+            "ttft_ms": round(ttft_ms, 1) if ttft_ms is not None else None,
+            "cache": cache,
+            "ok": ok,
+            "error": error,
+            "created_at": _dt.datetime.utcnow(),
+        })
+        if len(self._buffer) > BUFFER_MAX:
+            overflow = len(self._buffer) - BUFFER_MAX
+            del self._buffer[:overflow]
+            self.dropped += overflow
+        if len(self._buffer) >= BATCH_SIZE:
+            self._wake.set()
+
+    async def flush(self) -> None:
+        if self._db is None or not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        try:
+            await self._db[COLL].insert_many(batch, ordered=False)
+        except Exception as e:
+            logger.warning("Dropping %d usage record(s): %s", len(batch), e)
+            self.dropped += len(batch)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), FLUSH_SECS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+
+
+usage_recorder = UsageRecorder()
+
+
+# ═════════════════════════ rollups (admin) ═════════════════════════
+async def usage_rollup(
+    db: AsyncIOMotorDatabase, group_by: str, *, days: int = 30, limit: int = 50
+) -> List[Dict[str, Any]]:
+    """Aggregate tokens / cost / latency per *group_by* field, costliest first."""
+    since = _dt.datetime.utcnow() - _dt.timedelta(days=days)
+    pipeline = [
+        {"$match": {"created_at": {"$gte": since}}},
+        {"$group": {
+            "_id": f"${group_by}",
+            "calls": {"$sum": 1},
+            "upstream_calls": {"$sum": {"$cond": [{"$eq": ["$cache", "miss"]}, 1, 0]}},
+            "failed_calls": {"$sum": {"$cond": ["$ok", 0, 1]}},
+            "prompt_tokens": {"$sum": "$prompt_tokens"},
+            "completion_tokens": {"$sum": "$completion_tokens"},
+            "cost_usd": {"$sum": "$cost_usd"},
+            "avg_latency_ms": {"$avg": "$latency_ms"},
+            "avg_ttft_ms": {"$avg": "$ttft_ms"},
+        }},
+        {"$sort": {"cost_usd": -1}},
+        {"$limit": limit},
+    ]
+    out: List[Dict[str, Any]] = []
+    async for row in db[COLL].aggregate(pipeline):
+        row[group_by] = row.pop("_id")
+        row["cost_usd"] = round(row["cost_usd"], 4)
+        out.append(row)
+    return out
@@ -8,24 +8,67 @@ Changes in this version
   **max_completion_tokens** and the helper renames the parameter
   automatically.
 • Works for both async (call_gpt) and sync (call_gpt_sync) variants.
+• Async calls are admitted by a global per-model scheduler
+  (see core/llm_scheduler.py) – concurrency, RPM and TPM budgets.
+• Opt-in response cache (``cache=True``) – in-process LRU backed by a
+  Mongo TTL collection (see core/llm_cache.py).
+• Classified retries with jittered backoff, per-model circuit breakers
+  and a model fallback chain (see core/llm_resilience.py); exhausted
+  calls raise LLMUnavailableError instead of returning "".
+• Singleflight: concurrent calls with an identical payload share one
+  upstream request and its result.
+• stream_gpt – async generator yielding deltas as they arrive, for
+  Server-Sent-Events endpoints.
+• Every attempt, cache hit and coalesced call is metered (tokens, cost,
+  latency, time-to-first-token, caller tag – see core/llm_usage.py).
+• The OpenAI SDK is imported and the clients built on first use or by
+  the startup warm-up (see core/lazy.py), not at import time.
 """
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import logging
 import os
-from typing import Any, Dict, Optional, Iterator, AsyncIterator
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Iterator, AsyncIterator
 
 from dotenv import load_dotenv
-from openai import OpenAI, AsyncOpenAI
+
+from backend.app.core.lazy import Lazy, lazy_import
+from backend.app.core.llm_cache import CACHE_ENABLED, cache_key, llm_cache
+from backend.app.core.llm_resilience import (
+    LLMUnavailableError,
+    call_with_resilience,
+    stream_with_resilience,
+)
+from backend.app.core.llm_scheduler import estimate_tokens, scheduler
+from backend.app.core.llm_usage import count_tokens, usage_recorder
 
 # ─────────────────────────── env / logging ────────────────────────────
 load_dotenv()
 logger = logging.getLogger(__name__)
 
 # ────────────────────────── OpenAI clients ────────────────────────────
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# OPENAI_BASE_URL points both clients at an OpenAI-compatible server, e.g.
+# the local simulator (python -m backend.app.utils.openai_simulator).
+# SDK-level retries are disabled on the async client – retry / fallback
+# policy lives in core/llm_resilience.py and must not be applied twice.
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+_API_KEY = os.getenv("OPENAI_API_KEY") or ("simulator" if OPENAI_BASE_URL else None)
+
+openai = lazy_import("openai")
+client = Lazy(
+    lambda: openai.OpenAI(api_key=_API_KEY, base_url=OPENAI_BASE_URL),
+    "OpenAI client",
+)
+async_client = Lazy(
+    lambda: openai.AsyncOpenAI(api_key=_API_KEY, base_url=OPENAI_BASE_URL, max_retries=0),
+    "AsyncOpenAI client",
+    warm=True,
+)
 
 # ────────────────────────── helper utilities ──────────────────────────
 _CHAT_PREFIXES = (
@@ -43,23 +86,30 @@ def _is_chat_model(name: str) -> bool:
     return any(name.startswith(p) for p in _CHAT_PREFIXES)
 
 
+def _delta_text(ev: Any, is_chat: bool) -> str:
+    """Text carried by one streamed chunk ('' for role / usage-only chunks)."""
+    if not ev.choices:
+        return ""
+    if is_chat:
+        return ev.choices[0].delta.content or ""
+    return ev.choices[0].text or ""
+
+
 def _consume_stream(stream: Iterator[Any], is_chat: bool) -> str:
     """Concatenate blocking stream chunks into a single string."""
-    parts: list[str] = []
-    for ev in stream:
-        parts.append(
-            ev.choices[0].delta.content if is_chat else ev.choices[0].text or ""
-        )
-    return "".join(parts).strip()
+    return "".join(_delta_text(ev, is_chat) for ev in stream).strip()
 
 
-async def _consume_async_stream(stream: AsyncIterator[Any], is_chat: bool) -> str:
+async def _consume_async_stream(
+    stream: AsyncIterator[Any], is_chat: bool, meter: Optional["_Meter"] = None
+) -> str:
     """Concatenate async streaming chunks into a single string."""
     parts: list[str] = []
     async for ev in stream:
-        parts.append(
-            ev.choices[0].delta.content if is_chat else ev.choices[0].text or ""
-        )
+        delta = _delta_text(ev, is_chat)
+        if meter is not None:
+            meter.observe(ev, delta)
+        parts.append(delta)
     return "".join(parts).strip()
 
 
@@ -99,6 +149,175 @@ def _token_param(model: str) -> str:
     return "max_completion_tokens" if model.startswith("o4-") else "max_tokens"
 
 
+def _build_request(
+    prompt: str,
+    system_message: Optional[str],
+    model: str,
+    temperature: Optional[float],
+    max_completion_tokens: Optional[int],
+    openai_extra: Dict[str, Any],
+) -> tuple[Dict[str, Any], bool]:
+    """
+    Translate the helper's arguments into OpenAI request kwargs.
+
+    Returns ``(kwargs, is_chat)``; shared by the async and sync variants.
+    """
+    is_chat = _is_chat_model(model)
+    kwargs: Dict[str, Any] = {"model": model}
+
+    # ----- token-limit handling -----------------------------------------
+    param_name = _token_param(model)
+
+    # precedence:
+    #   1) explicit kwarg (max_completion_tokens)
+    #   2) extras dict (max_completion_tokens or max_tokens)
+    #   3) model default
+    limit = (
+        max_completion_tokens
+        if max_completion_tokens is not None
+        else openai_extra.pop("max_completion_tokens", None)
+        or openai_extra.pop("max_tokens", None)
+        or _default_cap(model)
+    )
+    kwargs[param_name] = limit
+
+    # ----- temperature (o4-mini ignores custom temps) -------------------
+    if temperature is not None and not model.startswith("o4-mini"):
+        kwargs["temperature"] = temperature
+
+    # pass-through any other recognised extras (stream, response_format…)
+    kwargs.update(openai_extra)
+
+    # ----- chat models -------------------------------------------------
+    if is_chat:
+        messages: list[dict[str, str]] = []
+        if system_message:
+            messages.append({"role": "system", "content": system_message})
+        messages.append({"role": "user", "content": prompt})
+        kwargs["messages"] = messages
+    # ----- legacy completion models -------------------------------------
+    else:
+        kwargs["prompt"] = (
+            f"{system_message.strip()}\n\n{prompt}" if system_message else prompt
+        )
+    return kwargs, is_chat
+
+
+def _usage_tokens(resp: Any) -> Optional[int]:
+    """Total tokens reported by a non-streamed response, if present."""
+    usage = getattr(resp, "usage", None)
+    return getattr(usage, "total_tokens", None) if usage else None
+
+
+class _Meter:
+    """Timing + token usage of one upstream attempt, recorded on finish()."""
+
+    def __init__(self, model: str, requested_model: str, prompt_text: str):
+        self.model = model
+        self.requested_model = requested_model
+        self.prompt_text = prompt_text
+        self.started = time.monotonic()
+        self.first_token_at: Optional[float] = None
+        self.usage: Any = None
+
+    def observe(self, ev: Any, delta: str) -> None:
+        """Feed one streamed chunk."""
+        if getattr(ev, "usage", None):
+            self.usage = ev.usage
+        if delta and self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+
+    def finish(self, text: str, error: Optional[BaseException] = None) -> None:
+        usage = self.usage
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        if error is not None:
+            # a failed / rate-limited attempt is only billed for what the
+            # provider says it used – estimating would inflate the spend
+            prompt_tokens, completion_tokens = prompt_tokens or 0, completion_tokens or 0
+        if prompt_tokens is None:
+            prompt_tokens = count_tokens(self.prompt_text)
+        if completion_tokens is None:
+            completion_tokens = count_tokens(text)
+        now = time.monotonic()
+        usage_recorder.record(
+            model=self.model,
+            requested_model=self.requested_model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency_ms=(now - self.started) * 1000,
+            ttft_ms=(
+                (self.first_token_at - self.started) * 1000
+                if self.first_token_at is not None else None
+            ),
+            ok=error is None,
+            error=type(error).__name__ if error is not None else None,
+        )
+
+
+# ─────────────────────── singleflight (coalescing) ────────────────────
+_inflight: Dict[str, "asyncio.Task[str]"] = {}
+_flight_counters: Dict[str, int] = {"upstream": 0, "coalesced": 0}
+
+
+def _flight_key(
+    prompt: str,
+    system_message: Optional[str],
+    model: str,
+    temperature: Optional[float],
+    max_completion_tokens: Optional[int],
+    openai_extra: Dict[str, Any],
+    cache: bool,
+    prompt_version: Optional[str],
+) -> str:
+    """
+    Hash of the normalised payload – identical requests share one flight.
+    Whether the result is cached, and under which prompt version, is part
+    of the key: a follower must not get an answer that its own call would
+    have cached differently (or not at all).
+    """
+    payload = json.dumps(
+        {
+            "model": model,
+            "system": (system_message or "").strip(),
+            "prompt": prompt.strip(),
+            "temperature": temperature,
+            "max_completion_tokens": max_completion_tokens,
+            "extra": openai_extra,
+            "cache": cache,
+            "prompt_version": prompt_version,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def _singleflight(key: str, run: Callable[[], Awaitable[str]]) -> tuple[str, bool]:
+    """
+    Join the in-flight request for *key* or start it.
+
+    Returns ``(result, coalesced)``.  The upstream call runs in its own
+    task, so a caller that disconnects (cancellation) does not abort the
+    request for everybody else.
+    """
+    task = _inflight.get(key)
+    coalesced = task is not None
+    if task is None:
+        _flight_counters["upstream"] += 1
+        task = asyncio.ensure_future(run())
+        _inflight[key] = task
+        task.add_done_callback(lambda _t: _inflight.pop(key, None))
+    else:
+        _flight_counters["coalesced"] += 1
+    return await asyncio.shield(task), coalesced
+
+
+def singleflight_stats() -> Dict[str, int]:
+    return {**_flight_counters, "in_flight": len(_inflight)}
+
+
 # ═════════════════════════════ ASYNC ══════════════════════════════════
 async def call_gpt(
     prompt: str,
@@ -107,6 +326,8 @@ async def call_gpt(
     model: str = "o4-mini",
     temperature: Optional[float] = None,
     max_completion_tokens: Optional[int] = None,
+    cache: bool = False,
+    prompt_version: Optional[str] = None,
     **openai_extra: Any,
 ) -> str:
     """
@@ -115,65 +336,161 @@ async def call_gpt(
     The function is backwards-compatible: callers may supply either
     max_tokens=… or max_completion_tokens=….  The correct parameter name
     is forwarded to OpenAI automatically.
+
+    Every request is admitted by the global scheduler first, so callers
+    queue for a per-model concurrency / RPM / TPM slot instead of
+    tripping the provider's rate limits.
+
+    With ``cache=True`` identical payloads are answered from the response
+    cache; bump *prompt_version* whenever the prompt template changes.
+    Identical calls that are in flight at the same time are coalesced into
+    one upstream request regardless of caching.
+
+    Transient failures are retried with backoff and, if the model stays
+    down, re-routed along the fallback chain (core/llm_resilience.py).
+    When nothing can answer, `LLMUnavailableError` is raised – an outage
+    is never reported as an empty string.
     """
+    key = None
+    if cache and CACHE_ENABLED:
+        key = cache_key(
+            model=model,
+            system_message=system_message,
+            prompt=prompt,
+            temperature=temperature,
+            response_format=openai_extra.get("response_format"),
+            prompt_version=prompt_version,
+        )
+        started = time.monotonic()
+        cached, tier = await llm_cache.lookup(key)
+        if cached is not None:
+            usage_recorder.record(
+                model=model,
+                requested_model=model,
+                latency_ms=(time.monotonic() - started) * 1000,
+                cache=f"{tier}_hit",
+            )
+            return cached
+
+    async def _attempt(candidate: str) -> str:
+        kwargs, is_chat = _build_request(
+            prompt, system_message, candidate, temperature,
+            max_completion_tokens, dict(openai_extra),
+        )
+        est = estimate_tokens(
+            prompt, system_message, completion_tokens=kwargs[_token_param(candidate)]
+        )
+        async with scheduler.slot(candidate, est) as lease:
+            meter = _Meter(candidate, model, f"{system_message or ''}\n{prompt}")
+            try:
+                text = await _dispatch(kwargs, is_chat, lease, meter)
+            except Exception as e:
+                meter.finish("", error=e)
+                raise
+            meter.finish(text)
+            return text
+
+    async def _upstream() -> str:
+        text = await call_with_resilience(model, _attempt)
+        if key:
+            await llm_cache.set(key, text, model=model)
+        return text
+
+    flight = _flight_key(
+        prompt, system_message, model, temperature,
+        max_completion_tokens, openai_extra,
+        cache=key is not None, prompt_version=prompt_version,
+    )
+    started = time.monotonic()
     try:
-        is_chat = _is_chat_model(model)
-        kwargs: Dict[str, Any] = {"model": model}
-
-        # ----- token-limit handling -------------------------------------
-        param_name = _token_param(model)
-
-        # precedence:
-        #   1) explicit kwarg (max_completion_tokens)
-        #   2) extras dict (max_completion_tokens or max_tokens)
-        #   3) model default
-        limit = (
-            max_completion_tokens
-            if max_completion_tokens is not None
-            else openai_extra.pop("max_completion_tokens", None)
-            or openai_extra.pop("max_tokens", None)
-            or _default_cap(model)
+        text, coalesced = await _singleflight(flight, _upstream)
+    except LLMUnavailableError as e:
+        logger.error("Async OpenAI call failed: %s", e)
+        raise
+    if coalesced:
+        usage_recorder.record(
+            model=model,
+            requested_model=model,
+            latency_ms=(time.monotonic() - started) * 1000,
+            cache="coalesced",
         )
-        kwargs[param_name] = limit
+    return text
 
-        # ----- temperature (o4-mini ignores custom temps) ---------------
-        if temperature is not None and not model.startswith("o4-mini"):
-            kwargs["temperature"] = temperature
 
-        # pass-through any other recognised extras (stream, response_format…)
-        kwargs.update(openai_extra)
-
-        # ----- chat models ---------------------------------------------
-        if is_chat:
-            messages: list[dict[str, str]] = []
-            if system_message:
-                messages.append({"role": "system", "content": system_message})
-            messages.append({"role": "user", "content": prompt})
-            kwargs["messages"] = messages
+async def _dispatch(
+    kwargs: Dict[str, Any], is_chat: bool, lease: Any, meter: _Meter
+) -> str:
+    """Send one prepared request and return the stripped text."""
+    api = async_client.chat.completions if is_chat else async_client.completions
 
-            if kwargs.get("stream"):
-                stream = await async_client.chat.completions.create(**kwargs)
-                return await _consume_async_stream(stream, is_chat=True)
+    if kwargs.get("stream"):
+        stream = await api.create(**kwargs)
+        text = await _consume_async_stream(stream, is_chat=is_chat, meter=meter)
+        if meter.usage is not None:
+            lease.settle(meter.usage.total_tokens)
+        return text
 
-            resp = await async_client.chat.completions.create(**kwargs)
-            return (resp.choices[0].message.content or "").strip()
+    resp = await api.create(**kwargs)
+    meter.usage = getattr(resp, "usage", None)
+    lease.settle(_usage_tokens(resp))
+    if is_chat:
+        return (resp.choices[0].message.content or "").strip()
+    return (resp.choices[0].text or "").strip()
 
-        # ----- legacy completion models ---------------------------------
-        full_prompt = (
-            f"{system_message.strip()}\n\n{prompt}" if system_message else prompt
-        )
-        kwargs["prompt"] = full_prompt
 
-        if kwargs.get("stream"):
-            stream = await async_client.completions.create(**kwargs)
-            return await _consume_async_stream(stream, is_chat=False)
+async def stream_gpt(
+    prompt: str,
+    system_message: Optional[str] = None,
+    *,
+    model: str = "o4-mini",
+    temperature: Optional[float] = None,
+    max_completion_tokens: Optional[int] = None,
+    **openai_extra: Any,
+) -> AsyncIterator[str]:
+    """
+    Streaming counterpart of `call_gpt` – yields text deltas as they arrive.
 
-        resp = await async_client.completions.create(**kwargs)
-        return (resp.choices[0].text or "").strip()
+    Same argument handling, scheduler admission and retry / fallback
+    policy as `call_gpt`; the scheduler slot is held until the stream is
+    exhausted or closed.  Retries stop once the first delta has been
+    yielded – a stream that breaks off later raises `LLMUnavailableError`.
+    """
+    openai_extra.pop("stream", None)
 
-    except Exception as e:
-        logger.error("Async OpenAI call failed: %s", e, exc_info=True)
-        return ""
+    async def _open(candidate: str) -> AsyncIterator[str]:
+        kwargs, is_chat = _build_request(
+            prompt, system_message, candidate, temperature,
+            max_completion_tokens, dict(openai_extra),
+        )
+        kwargs["stream"] = True
+        if is_chat:
+            kwargs["stream_options"] = {"include_usage": True}
+        est = estimate_tokens(
+            prompt, system_message, completion_tokens=kwargs[_token_param(candidate)]
+        )
+        api = async_client.chat.completions if is_chat else async_client.completions
+
+        async with scheduler.slot(candidate, est) as lease:
+            meter = _Meter(candidate, model, f"{system_message or ''}\n{prompt}")
+            parts: list[str] = []
+            try:
+                stream = await api.create(**kwargs)
+                async for ev in stream:
+                    if getattr(ev, "usage", None):
+                        lease.settle(ev.usage.total_tokens)
+                    delta = _delta_text(ev, is_chat)
+                    meter.observe(ev, delta)
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+            except BaseException as e:
+                # includes GeneratorExit when the client disconnects
+                meter.finish("".join(parts), error=e)
+                raise
+            meter.finish("".join(parts))
+
+    async for delta in stream_with_resilience(model, _open):
+        yield delta
 
 
 # ═══════════════════════════ SYNC (legacy) ════════════════════════════
@@ -189,57 +506,25 @@ def call_gpt_sync(
     """
     Blocking helper retained for CLI scripts or places without async/await.
 
-    Same token-parameter normalisation logic as the async variant.
+    Same token-parameter normalisation logic as the async variant.  It is
+    not routed through the async scheduler.
     """
     try:
-        is_chat = _is_chat_model(model)
-        kwargs: Dict[str, Any] = {"model": model}
-
-        # ----- token-limit handling -------------------------------------
-        param_name = _token_param(model)
-        limit = (
-            max_completion_tokens
-            if max_completion_tokens is not None
-            else openai_extra.pop("max_completion_tokens", None)
-            or openai_extra.pop("max_tokens", None)
-            or _default_cap(model)
+        kwargs, is_chat = _build_request(
+            prompt, system_message, model, temperature,
+            max_completion_tokens, openai_extra,
         )
-        kwargs[param_name] = limit
+        api = client.chat.completions if is_chat else client.completions
 
-        # ----- temperature ---------------------------------------------
-        if temperature is not None and not model.startswith("o4-mini"):
-            kwargs["temperature"] = temperature
-
-        kwargs.update(openai_extra)
+        if kwargs.get("stream"):
+            stream = api.create(**kwargs)
+            return _consume_stream(stream, is_chat=is_chat)
 
-        # ----- chat models ---------------------------------------------
+        resp = api.create(**kwargs)
         if is_chat:
-            messages: list[dict[str, str]] = []
-            if system_message:
-                messages.append({"role": "system", "content": system_message})
-            messages.append({"role": "user", "content": prompt})
-            kwargs["messages"] = messages
-
-            if kwargs.get("stream"):
-                stream = client.chat.completions.create(**kwargs)
-                return _consume_stream(stream, is_chat=True)
-
-            resp = client.chat.completions.create(**kwargs)
             return (resp.choices[0].message.content or "").strip()
-
-        # ----- legacy completion models ---------------------------------
-        full_prompt = (
-            f"{system_message.strip()}\n\n{prompt}" if system_message else prompt
-        )
-        kwargs["prompt"] = full_prompt
-
-        if kwargs.get("stream"):
-            stream = client.completions.create(**kwargs)
-            return _consume_stream(stream, is_chat=False)
-
-        resp = client.completions.create(**kwargs)
         return (resp.choices[0].text or "").strip()
 
     except Exception as e:
         logger.error("Sync OpenAI call failed: %s", e, exc_info=True)
-        return ""
\ No newline at end of file
+        return ""
@@ -0,0 +1,299 @@
+"""
+Process pools for CPU-bound work that must not run on the event loop.
+
+Rendering a ReportLab PDF or a python-docx file takes from tens of ms to
+seconds and holds the GIL the whole time, so calling it from a request
+handler stalls every other request.  `WorkerPool.run` ships the call to a
+separate process instead:
+
+    data = await render_pool.run(render_compliance_pdf, report)
+
+The function and its arguments must be picklable – a module-level
+function taking plain dicts / bytes.  The pool is created on first use
+with the ``spawn`` start method (forking a process that already runs
+Motor / thread-pool threads is unsafe).  If a worker process dies, the
+pool is rebuilt and the error is raised to the caller.
+
+A pool of size 0 runs the function in a thread instead – still off the
+event loop, and handy where extra processes are not wanted (tests,
+tiny instances).
+
+Limits (used by the text-extraction pool):
+• ``timeout`` – a job is interrupted inside the worker (SIGALRM) and the
+  caller gets `JobTimeout`.  Code stuck in C that ignores the signal is
+  stopped harder: after a grace period – counted from when the job
+  reached a worker, so time spent queued never counts – the pool's
+  processes are killed and the pool is rebuilt.  A ProcessPoolExecutor cannot lose one worker
+  without failing every job it holds, so the other jobs caught in that
+  restart are resubmitted to the new pool rather than failed.  Thread
+  mode can only stop waiting.
+• ``memory_mb`` – address-space limit (RLIMIT_AS) set in every worker
+  process, so one huge scan fails with MemoryError instead of getting
+  the instance OOM-killed.  Unix only.
+
+`stats()` reports jobs in flight and how many of them are queued behind
+busy workers – the figure to watch for capacity planning.
+
+Environment variables
+---------------------
+RENDER_WORKERS      default: 2     (processes rendering report downloads, 0 = thread)
+EXTRACT_WORKERS     default: 2     (processes extracting document text, 0 = thread)
+EXTRACT_TIMEOUT     default: 300   (seconds per extraction job)
+EXTRACT_MEMORY_MB   default: 2048  (address-space limit per extraction process)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+try:
+    import resource
+except ImportError:                    # Windows: no memory limit
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# ───────────────────────── configuration ─────────────────────────
+RENDER_WORKERS    = int(os.getenv("RENDER_WORKERS", 2))
+EXTRACT_WORKERS   = int(os.getenv("EXTRACT_WORKERS", 2))
+EXTRACT_TIMEOUT   = float(os.getenv("EXTRACT_TIMEOUT", 300))
+EXTRACT_MEMORY_MB = int(os.getenv("EXTRACT_MEMORY_MB", 2048))
+KILL_GRACE        = 30.0       # seconds past the timeout before workers are killed
+START_POLL        = 1.0        # seconds between checks whether a queued job has started
+
+_pools: List["WorkerPool"] = []
+
+
+class JobTimeout(Exception):
+    """A pool job ran past its pool's timeout."""
+
+
+class _Deadline(BaseException):
+    # BaseException so the job's own ``except Exception`` cannot swallow it
+    pass
+
+
+def _on_deadline(signum, frame):
+    raise _Deadline()
+
+
+def _limit_memory(memory_mb: int) -> None:
+    """Cap the process's address space."""
+    if resource is not None and memory_mb > 0:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+_started_queue: Any = None             # worker side: where job starts are reported
+
+
+def _init_worker(memory_mb: Optional[int], started: Any) -> None:
+    """Worker initializer: memory limit plus the job-start queue."""
+    global _started_queue
+    _started_queue = started
+    if memory_mb:
+        _limit_memory(memory_mb)
+
+
+def _run_with_deadline(job_id: int, timeout: float, fn: Callable[..., T], *args: Any) -> T:
+    """Runs in the worker process: *fn* interrupted after *timeout* seconds."""
+    if _started_queue is not None:
+        _started_queue.put(job_id)     # the parent's grace period starts now
+    previous = signal.signal(signal.SIGALRM, _on_deadline)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(*args)
+    except _Deadline:
+        raise JobTimeout(f"{getattr(fn, '__name__', 'job')} exceeded {timeout:g}s") from None
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class WorkerPool:
+    """A lazily started `ProcessPoolExecutor` with an asyncio front end."""
+
+    def __init__(
+        self,
+        name: str,
+        size: int,
+        *,
+        timeout: Optional[float] = None,
+        memory_mb: Optional[int] = None,
+    ):
+        self.name = name
+        self.size = size
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._started_queue: Any = None
+        self._started_at: Dict[int, float] = {}
+        self._job_ids = itertools.count()
+        # executors killed over a timeout: their other jobs are resubmitted
+        self._killed: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.counters: Dict[str, int] = {
+            "completed": 0, "failed": 0, "timeouts": 0, "restarts": 0, "resubmitted": 0,
+        }
+        _pools.append(self)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                ctx = multiprocessing.get_context("spawn")
+                # a fresh queue per executor: killing a worker may corrupt it
+                self._started_queue = ctx.Queue() if self.timeout is not None else None
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.size,
+                    mp_context=ctx,
+                    initializer=_init_worker,
+                    initargs=(self.memory_mb, self._started_queue),
+                )
+                logger.info("Started %s pool with %d process(es)", self.name, self.size)
+            return self._executor
+
+    def _reset(self, broken: ProcessPoolExecutor, *, kill: bool = False) -> None:
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+                self.counters["restarts"] += 1
+        if kill:
+            self._killed.add(broken)
+            # ProcessPoolExecutor has no public way to stop a running job
+            for proc in list((getattr(broken, "_processes", None) or {}).values()):
+                proc.kill()
+        # after a kill, queued jobs must fail with BrokenProcessPool (and be
+        # resubmitted), not be cancelled
+        broken.shutdown(wait=False, cancel_futures=not kill)
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        self.in_flight += 1
+        try:
+            result = await self._run(fn, *args)
+        except JobTimeout:
+            self.counters["timeouts"] += 1
+            raise
+        except BaseException:
+            self.counters["failed"] += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        self.counters["completed"] += 1
+        return result
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.size <= 0:
+            job = asyncio.to_thread(fn, *args)
+            if self.timeout is None:
+                return await job
+            try:
+                return await asyncio.wait_for(job, self.timeout)
+            except asyncio.TimeoutError:
+                raise JobTimeout(f"{fn.__name__} exceeded {self.timeout:g}s") from None
+
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        job_id = next(self._job_ids)
+        if self.timeout is None:
+            job = loop.run_in_executor(executor, fn, *args)
+        else:
+            job = loop.run_in_executor(
+                executor, _run_with_deadline, job_id, self.timeout, fn, *args
+            )
+        try:
+            if self.timeout is None:
+                return await job
+            return await self._wait_running(job, job_id)
+        except asyncio.TimeoutError:
+            logger.error("%s pool: %s ignored its %gs timeout – killing the workers",
+                         self.name, fn.__name__, self.timeout)
+            self._reset(executor, kill=True)
+            raise JobTimeout(f"{fn.__name__} exceeded {self.timeout:g}s") from None
+        except BrokenProcessPool:
+            if executor in self._killed:
+                # not this job's fault – another one timed out on the same pool
+                logger.warning("%s pool: resubmitting %s after the pool was restarted",
+                               self.name, fn.__name__)
+                self.counters["resubmitted"] += 1
+                return await self._run(fn, *args)
+            logger.error("%s pool: a worker process died – restarting the pool", self.name)
+            self._reset(executor)
+            raise
+        finally:
+            self._started_at.pop(job_id, None)
+
+    async def _wait_running(self, job: "asyncio.Future[T]", job_id: int) -> T:
+        """
+        Result of *job*; `asyncio.TimeoutError` once it has run for
+        timeout + KILL_GRACE in its worker.  Time spent queued behind busy
+        workers does not count.
+        """
+        limit = self.timeout + KILL_GRACE  # type: ignore[operator]
+        try:
+            while True:
+                started = self._started_at.get(job_id)
+                wait = START_POLL if started is None else started + limit - time.monotonic()
+                done, _ = await asyncio.wait({job}, timeout=max(0.0, wait))
+                if done:
+                    return job.result()
+                if started is not None:
+                    job.cancel()
+                    raise asyncio.TimeoutError
+                self._collect_starts()
+        except asyncio.CancelledError:
+            job.cancel()
+            raise
+
+    def _collect_starts(self) -> None:
+        """Note the start time of every job the workers have picked up."""
+        started_queue = self._started_queue
+        while started_queue is not None:
+            try:
+                job_id = started_queue.get_nowait()
+            except (queue.Empty, OSError, EOFError):
+                return
+            self._started_at.setdefault(job_id, time.monotonic())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "workers": self.size,
+            "in_flight": self.in_flight,
+            # jobs waiting for a free process (threads never queue here)
+            "queued": max(0, self.in_flight - self.size) if self.size > 0 else 0,
+            "timeout": self.timeout,
+            "memory_mb": self.memory_mb,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pools() -> None:
+    """Stop every pool's worker processes (app shutdown)."""
+    for pool in _pools:
+        pool.shutdown()
+
+
+render_pool = WorkerPool("render", RENDER_WORKERS)
+extract_pool = WorkerPool(
+    "extract", EXTRACT_WORKERS, timeout=EXTRACT_TIMEOUT, memory_mb=EXTRACT_MEMORY_MB
+)
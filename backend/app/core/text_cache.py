@@ -0,0 +1,149 @@
+"""
+Extracted-text cache, keyed by the content hash of the source file.
+
+Every use of an uploaded document – compliance check, rephrase,
+``/documents/content``, a file job – used to download the GridFS blob and
+run PyMuPDF / pdfminer / OCR again.  Extraction depends only on the
+file's bytes and on the extractor, so the result is stored once under
+
+    sha256(file bytes)
+
+together with the layer that produced it (``method``: docx, pymupdf,
+pdfminer, ocr, plain) and that layer's version.  The caller decides
+whether an entry is still valid (controllers/documents.py compares the
+version with its EXTRACTOR_VERSIONS), so bumping one layer only
+re-extracts files that layer produced – a scanned PDF that needed OCR is
+never OCR'd again because the DOCX reader changed.
+
+Text is stored zlib-compressed in the ``extracted_texts`` collection
+(legal text compresses 4–6×) with a small in-process LRU in front.
+Entries do not expire – the same bytes always give the same text; the
+blob store (core/blob_store.py) discards one when the last reference to
+its file goes.
+
+Environment variables
+---------------------
+TEXT_CACHE_ENABLED      default: 1     (0 = extract on every use)
+TEXT_CACHE_MAX_ENTRIES  default: 32    (LRU size per process)
+"""
+
+from __future__ import annotations
+
+import datetime as _dt
+import logging
+import os
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+from bson import Binary
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────── configuration ─────────────────────────
+CACHE_ENABLED     = os.getenv("TEXT_CACHE_ENABLED", "1") not in {"0", "false", "False"}
+CACHE_MAX_ENTRIES = int(os.getenv("TEXT_CACHE_MAX_ENTRIES", 32))
+COLL              = "extracted_texts"
+MAX_STORED_BYTES  = 15 * 1024 * 1024      # stay below Mongo's 16 MB document limit
+
+
+class ExtractedText(NamedTuple):
+    text: str
+    method: str             # extraction layer that produced the text
+    version: int            # that layer's version at the time
+
+
+class TextCache:
+    """LRU in front of an optional Mongo collection of extracted texts."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[str, ExtractedText]" = OrderedDict()
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self.counters: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+    async def bind_database(self, db: AsyncIOMotorDatabase) -> None:
+        self._db = db
+
+    def _remember(self, sha256: str, entry: ExtractedText) -> None:
+        self._lru[sha256] = entry
+        self._lru.move_to_end(sha256)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    async def get(self, sha256: str) -> Optional[ExtractedText]:
+        if not CACHE_ENABLED:
+            return None
+        entry = self._lru.get(sha256)
+        if entry is None and self._db is not None:
+            try:
+                doc = await self._db[COLL].find_one({"_id": sha256})
+            except Exception as e:
+                self.counters["errors"] += 1
+                logger.warning("Text cache lookup failed: %s", e)
+                doc = None
+            if doc:
+                entry = ExtractedText(
+                    zlib.decompress(doc["text_z"]).decode("utf-8"),
+                    doc["method"],
+                    int(doc["version"]),
+                )
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        self._remember(sha256, entry)
+        self.counters["hits"] += 1
+        return entry
+
+    async def put(self, sha256: str, entry: ExtractedText, *, filename: Optional[str] = None) -> None:
+        if not CACHE_ENABLED:
+            return
+        self._remember(sha256, entry)
+        self.counters["stores"] += 1
+        if self._db is None:
+            return
+        packed = zlib.compress(entry.text.encode("utf-8"), 6)
+        if len(packed) > MAX_STORED_BYTES:
+            logger.info("Extracted text of %s too large to store (%d bytes)", filename, len(packed))
+            return
+        try:
+            await self._db[COLL].replace_one(
+                {"_id": sha256},
+                {
+                    "_id": sha256,
+                    "text_z": Binary(packed),
+                    "method": entry.method,
+                    "version": entry.version,
+                    "chars": len(entry.text),
+                    "filename": filename,
+                    "created_at": _dt.datetime.utcnow(),
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning("Text cache write failed: %s", e)
+
+    async def discard(self, sha256: str) -> None:
+        self._lru.pop(sha256, None)
+        if self._db is None:
+            return
+        try:
+            await self._db[COLL].delete_one({"_id": sha256})
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning("Text cache delete failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "enabled": CACHE_ENABLED,
+            "shared_tier": self._db is not None,
+            "memory_entries": len(self._lru),
+            "hit_ratio": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+text_cache = TextCache()
@@ -4,9 +4,19 @@ Risk-analysis engine (OpenAI GPT).
 
 Highlights
 ----------
-• Automatic chunking – no more “only first 3 pages”.
-• Forced-JSON mode with graceful salvage if the model still goes rogue.
-• Duplicate-risk de-duplication across overlapping chunks.
+• Automatic clause-aligned chunking – no more “only first 3 pages”.
+• Chunks are analysed concurrently (CHUNK_CONCURRENCY, see core/fanout.py),
+  results are merged in document order and per-chunk timings stored.
+• Incremental re-analysis – findings are stored per chunk hash, so a
+  revised contract only sends its changed chunks to GPT.
+• Progress streaming – `stream_risk_analysis` reports every chunk (and
+  its risks) as soon as it finishes, for the SSE endpoints.
+• Forced-JSON mode; malformed or truncated output keeps every risk
+  object that did close (utils/json_stream.py) instead of being lost.
+• Near-duplicate risk merging across chunks (MinHash/LSH), keeping the
+  most severe version and the chunks that reported it.
+• Each risk's quoted clause is located in the document (char offsets +
+  page, utils/text_index.py) so the UI can jump straight to it.
 • All main parameters (model, chunk size, temperature …) can be changed
   without code edits – just set environment variables.
 
@@ -14,35 +24,51 @@ Environment variables
 ---------------------
 GPT_MODEL              default: gpt-4o-mini
 RISK_CHUNK_TOKENS      default: 2600   (# tokens per slice)
-RISK_OVERLAP_TOKENS    default: 200    (overlap between slices)
+RISK_OVERLAP_TOKENS    default: 200    (overlap when a single clause must be cut)
 RISK_GPT_TEMP          default: 0.3
 RISK_PREVIEW_LEN       default: 8000   (chars persisted for “preview”)
+RISK_PROMPT_VERSION    default: risk-v1 (bump to invalidate cached answers)
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 
-import tiktoken                              # pip install tiktoken
 from bson.objectid import ObjectId
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from backend.app.core.openai_client import call_gpt
+from backend.app.core.blob_store import release_blob
+from backend.app.core.chunk_store import iter_chunks_incremental
+from backend.app.core.fanout import with_progress
+from backend.app.core.lazy import Lazy, lazy_import
+from backend.app.core.llm_usage import tag_llm_caller
+from backend.app.core.openai_client import LLMUnavailableError, call_gpt, stream_gpt
+from backend.app.utils.json_stream import JsonItemStream
+from backend.app.utils.near_dup import merge_near_duplicates, normalise_key, severity_rank
+from backend.app.utils.segmentation import clause_chunks
+from backend.app.utils.text_index import TextIndex, attach_location
 
 logger = logging.getLogger(__name__)
 
 # ───────────────────────── configuration ─────────────────────────
 GPT_MODEL          = os.getenv("GPT_MODEL", "gpt-4o-mini")
-ENCODING           = tiktoken.encoding_for_model(GPT_MODEL)
+RISK_MODEL         = "o4-mini"
+tiktoken           = lazy_import("tiktoken", warm=False)   # pip install tiktoken
+# loaded on first use / by the startup warm-up – may need a download
+ENCODING           = Lazy(lambda: tiktoken.encoding_for_model(GPT_MODEL),
+                          "tiktoken encoding", warm=True)
 CHUNK_TOKENS       = int(os.getenv("RISK_CHUNK_TOKENS", 2600))
 OVERLAP_TOKENS     = int(os.getenv("RISK_OVERLAP_TOKENS", 200))
 GPT_TEMP           = float(os.getenv("RISK_GPT_TEMP", 0.3))
 PREVIEW_LEN        = int(os.getenv("RISK_PREVIEW_LEN", 8000))
+PROMPT_VERSION     = os.getenv("RISK_PROMPT_VERSION", "risk-v1")
 
 SYSTEM_MESSAGE = (
     "You are an expert legal AI specialising in the laws and regulations of the "
@@ -55,60 +81,126 @@ SYSTEM_MESSAGE = (
 
 
 # ═════════════════════════ helper functions ═════════════════════════
-def _token_len(text: str) -> int:
-    """Return number of tokens according to the model’s encoding."""
-    return len(ENCODING.encode(text))
+def _char_boundary(data: bytes, i: int) -> int:
+    """Move byte index *i* back onto the start of a UTF-8 character."""
+    while 0 < i < len(data) and 0x80 <= data[i] < 0xC0:
+        i -= 1
+    return i
+
+
+def _token_count(text: str) -> int:
+    return len(ENCODING.encode(text, disallowed_special=()))
 
 
 def _split_into_chunks(text: str) -> List[str]:
     """
-    Greedy word splitter that keeps ≤ CHUNK_TOKENS tokens per chunk and
-    overlaps with the previous slice to avoid cutting clauses in half.
+    Clause-aligned chunks of ≤ CHUNK_TOKENS tokens (utils/segmentation.py).
+    A single clause that is longer than that falls back to `_token_spans`.
+    """
+    return [
+        c.text
+        for c in clause_chunks(text, CHUNK_TOKENS, _token_count, split_long=_token_spans)
+    ]
+
+
+def _token_windows(text: str) -> List[str]:
+    """The text of every `_token_spans` window."""
+    return [text[s:e] for s, e in _token_spans(text)]
+
+
+def _token_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    Sliding token window: ≤ CHUNK_TOKENS tokens per chunk, each chunk
+    overlapping the previous one by OVERLAP_TOKENS so text cut mid-clause
+    keeps some context.  Returns ``(start, end)`` character offsets into
+    *text*, trimmed of surrounding whitespace.
+
+    The document is encoded once; window boundaries are mapped back to
+    offsets by decoding only the token runs between them, so the cost is
+    linear in the document length (see utils/bench_chunker.py).
     """
-    if _token_len(text) <= CHUNK_TOKENS:
-        return [text]
-
-    words: List[str] = text.split()
-    chunks: List[str] = []
-    cur: List[str] = []
-    cur_tokens = 0
-
-    for w in words:
-        t = _token_len(" " + w)
-        if cur_tokens + t > CHUNK_TOKENS:
-            chunks.append(" ".join(cur))
-            # slide window with overlap
-            overlap = cur[-OVERLAP_TOKENS:] if OVERLAP_TOKENS else []
-            cur = overlap + [w]
-            cur_tokens = sum(_token_len(" " + s) for s in cur)
-        else:
-            cur.append(w)
-            cur_tokens += t
-
-    if cur:
-        chunks.append(" ".join(cur))
-    return chunks
-
-
-async def _analyse_chunk(chunk: str, idx: int, total: int) -> List[dict]:
+    tokens = ENCODING.encode(text, disallowed_special=())
+    n = len(tokens)
+    if n <= CHUNK_TOKENS:
+        return [(0, len(text))]
+
+    stride = max(1, CHUNK_TOKENS - OVERLAP_TOKENS)
+    windows: List[Tuple[int, int]] = []
+    for start in range(0, n, stride):
+        windows.append((start, min(start + CHUNK_TOKENS, n)))
+        if start + CHUNK_TOKENS >= n:
+            break
+
+    # token index → byte offset, for window edges only
+    byte_at = {0: 0}
+    prev = pos = 0
+    for idx in sorted({i for w in windows for i in w} - {0}):
+        pos += len(ENCODING.decode_bytes(tokens[prev:idx]))
+        byte_at[idx] = pos
+        prev = idx
+
+    # byte offset → character offset, again for window edges only
+    data = ENCODING.decode_bytes(tokens)
+    char_at = {}
+    prev = chars = 0
+    for b in sorted({_char_boundary(data, p) for p in byte_at.values()}):
+        chars += len(data[prev:b].decode("utf-8", errors="replace"))
+        char_at[b] = min(chars, len(text))
+        prev = b
+
+    spans: List[Tuple[int, int]] = []
+    for start, end in windows:
+        lo = char_at[_char_boundary(data, byte_at[start])]
+        hi = char_at[_char_boundary(data, byte_at[end])]
+        while lo < hi and text[lo].isspace():
+            lo += 1
+        while hi > lo and text[hi - 1].isspace():
+            hi -= 1
+        if lo < hi:
+            spans.append((lo, hi))
+    return spans
+
+
+async def _analyse_chunk(
+    chunk: str,
+    idx: int,
+    total: int,
+    on_risk: Optional[Callable[[dict], None]] = None,
+) -> List[dict]:
     """
-    Single GPT call executed in a separate thread.
-    Always tries to return a *list of risk objects* (may be empty).
+    Single GPT call for one chunk (run concurrently via `map_chunks`).
+    Returns a *list of risk objects* (may be empty); raises if the
+    model output cannot be parsed at all.
+
+    With *on_risk* the response is streamed and every risk is handed to
+    it as soon as its JSON object closes (utils/json_stream.py); without
+    it the call goes through the response cache.
     """
     prompt = (
         f"Document chunk {idx} of {total}:\n{chunk}\n\n"
         "Return ONLY the JSON specified by the system message."
     )
-
-    raw = await call_gpt(
+    request = dict(
         prompt=prompt,
         system_message=SYSTEM_MESSAGE,
-        model="o4-mini",
+        model=RISK_MODEL,
         temperature=GPT_TEMP,
         response_format={"type": "json_object"},
         max_tokens=16384,
     )
 
+    parser = JsonItemStream(("risks",))
+    if on_risk is None:
+        raw = await call_gpt(**request, cache=True, prompt_version=PROMPT_VERSION)
+        parser.feed(raw or "")
+    else:
+        parts: List[str] = []
+        async for delta in stream_gpt(**request):
+            parts.append(delta)
+            for risk in parser.feed(delta):
+                on_risk(risk)
+        raw = "".join(parts)
+
     # best-case: valid JSON
     try:
         data = json.loads(raw or "")
@@ -117,75 +209,118 @@ async def _analyse_chunk(chunk: str, idx: int, total: int) -> List[dict]:
     except Exception:
         pass
 
-    # salvage: try to extract *some* JSON object from the output
-    logger.warning("Chunk %s/%s – invalid JSON, attempting salvage", idx, total)
-    return _salvage_risks(raw)
+    # recover every risk object that did close (malformed / truncated output)
+    logger.warning("Chunk %s/%s – invalid JSON, recovered %d risk(s)", idx, total, len(parser.items))
+    if not parser.items:
+        # fail the chunk rather than store "no risks" for unparseable output
+        raise ValueError(f"chunk {idx}/{total}: unparseable model output")
+    return parser.items
 
 
-def _salvage_risks(bad_json: str) -> List[dict]:
+def _dedup_risks(risks: List[dict]) -> List[dict]:
     """
-    Extract the first {...} object found in the text and parse it leniently.
+    Merge risks that overlapping chunks (or re-phrasings) reported more
+    than once: same clause (after normalisation) and a near-duplicate
+    description, see utils/near_dup.py.  Different risks on one clause
+    stay apart.  The most severe version is kept and its ``source_chunks``
+    lists every chunk that reported it.
     """
-    import re
+    return merge_near_duplicates(
+        risks,
+        text_of=lambda r: r.get("risk_description") or "",
+        group_of=lambda r: normalise_key(r.get("clause")),
+        rank_of=severity_rank,
+    )
 
-    m = re.search(r"\{(?:[^{}]|(?R))*\}", bad_json, re.S)
-    if not m:
-        return []
 
-    try:
-        data = json.loads(m.group(0))
-        return data.get("risks", []) if isinstance(data.get("risks"), list) else []
-    except Exception:
-        return []
-
-
-def _dedup_risks(risks: List[dict]) -> List[dict]:
-    """
-    De-duplicate identical risks that may have been reported in overlapping
-    chunks.  Two risks are considered the same if (clause, description) match
-    case-insensitively after stripping whitespace.
-    """
-    seen: set[Tuple[str, str]] = set()
-    out: List[dict] = []
-    for r in risks:
-        key = (
-            (r.get("clause") or "").strip().lower(),
-            r.get("risk_description") or "",
-        )
-        if key in seen:
-            continue
-        seen.add(key)
-        out.append(r)
-    return out
+def _locate_risks(text: str, risks: List[dict]) -> None:
+    """``char_start`` / ``char_end`` / ``page`` of each risk's quoted clause."""
+    index = TextIndex(text)
+    for risk in risks:
+        attach_location(risk, index, "clause")
 
 
 # ═════════════════════════ public interface ═════════════════════════
-async def analyze_risk(
+async def stream_risk_analysis(
     document_text: str,
     user_id: str,
     db: AsyncIOMotorDatabase,
     *,
     filename: Optional[str] = None,
-) -> dict:
+    stream: bool = True,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
     """
-    Main entry – called by REST endpoints.
-    Splits the document, calls GPT on each slice and stores a merged report.
+    Streaming variant of `analyze_risk` for SSE.
+
+    Yields ``("start", {"chunks": n})``, then one ``("chunk", …)`` per
+    chunk as it finishes (completion order, with that chunk's risks – not
+    yet merged across chunks) and finally ``("done", …)`` with the stored
+    report, exactly what `analyze_risk` returns.
+
+    With *stream* the GPT responses are streamed too, and each risk is
+    announced as ``("finding", {"chunk": n, "risk": …})`` the moment the
+    model has written it – ahead of its chunk event, which repeats it.
     """
+    tag_llm_caller("risk", user_id)
     if not document_text:
         raise HTTPException(status_code=400, detail="Document text is required.")
 
     chunks = _split_into_chunks(document_text)
     logger.info("Risk-analysis: processing %s chunk(s)", len(chunks))
+    yield "start", {"chunks": len(chunks)}
 
-    all_risks: List[dict] = []
-    for idx, chunk in enumerate(chunks, 1):
-        try:
-            all_risks.extend(await _analyse_chunk(chunk, idx, len(chunks)))
-        except Exception as e:
-            logger.error("Chunk %s/%s failed: %s", idx, len(chunks), e)
+    progress: asyncio.Queue = asyncio.Queue()
+
+    def _worker(i: int, chunk: str):
+        if not stream:
+            return _analyse_chunk(chunk, i + 1, len(chunks))
+        return _analyse_chunk(
+            chunk, i + 1, len(chunks),
+            lambda r: progress.put_nowait({"chunk": i + 1, "risk": r}),
+        )
 
+    outcomes = []
+    all_risks: List[dict] = []
+    try:
+        async for is_outcome, outcome in with_progress(
+            iter_chunks_incremental(
+                "risk", chunks, _worker, prompt_version=PROMPT_VERSION, model=RISK_MODEL
+            ),
+            progress,
+        ):
+            if not is_outcome:
+                yield "finding", outcome
+                continue
+            outcomes.append(outcome)
+            found = [
+                {**r, "source_chunks": [outcome.index + 1]}
+                for r in (outcome.result or []) if isinstance(r, dict)
+            ] if outcome.ok else []
+            all_risks.extend(found)
+            yield "chunk", {
+                **outcome.timing(),
+                "completed": len(outcomes),
+                "total": len(chunks),
+                "risks": found,
+            }
+    except LLMUnavailableError as e:
+        # an outage must not look like "no risks in this chunk"
+        logger.error("Risk-analysis – AI unavailable: %s", e)
+        raise HTTPException(status_code=503, detail="AI service is temporarily unavailable – please try again shortly.")
+
+    failed = sum(1 for o in outcomes if not o.ok)
+    if failed == len(outcomes):
+        raise HTTPException(status_code=502, detail="Risk analysis failed for every part of the document.")
+
+    # merge in document order, whatever order the chunks finished in
+    all_risks.sort(key=lambda r: r["source_chunks"][0])
+    outcomes.sort(key=lambda o: o.index)
     risks = _dedup_risks(all_risks)
-    logger.info("Risk-analysis finished – %s unique risks", len(risks))
+    await run_in_threadpool(_locate_risks, document_text, risks)
+    logger.info(
+        "Risk-analysis finished – %s unique risks, %s/%s chunk(s) failed",
+        len(risks), failed, len(outcomes),
+    )
 
     # store to MongoDB
     report = {
@@ -193,13 +328,34 @@ async def analyze_risk(
         "filename": filename,
         "document_text_preview": document_text[:PREVIEW_LEN],
         "risks": risks,
+        "chunk_stats": [o.timing() for o in outcomes],
         "report_doc_id": None,
         "report_filename": None,
         "created_at": datetime.utcnow(),
     }
     inserted = await db.risk_assessments.insert_one(report)
 
-    return {"id": str(inserted.inserted_id), "risks": risks}
+    yield "done", {"id": str(inserted.inserted_id), "risks": risks}
+
+
+async def analyze_risk(
+    document_text: str,
+    user_id: str,
+    db: AsyncIOMotorDatabase,
+    *,
+    filename: Optional[str] = None,
+) -> dict:
+    """
+    Main entry – called by REST endpoints.
+    Splits the document, calls GPT on each slice and stores a merged report.
+    """
+    result: dict = {}
+    async for event, payload in stream_risk_analysis(
+        document_text, user_id, db, filename=filename, stream=False
+    ):
+        if event == "done":
+            result = payload
+    return result
 
 
 # ═════════════════════════ CRUD HELPERS ═════════════════════════
@@ -218,9 +374,11 @@ async def delete_risk_report(report_id: str, user_id: str, db: AsyncIOMotorDatab
     """Delete a report only if it belongs to the user."""
     if not ObjectId.is_valid(report_id):
         raise HTTPException(status_code=400, detail="Invalid report ID")
-    res = await db.risk_assessments.delete_one(
+    row = await db.risk_assessments.find_one_and_delete(
         {"_id": ObjectId(report_id), "user_id": user_id}
     )
-    if res.deleted_count == 0:
+    if row is None:
         raise HTTPException(status_code=404, detail="Not found or not authorised")
+    if row.get("report_doc_id"):
+        await release_blob(db, row["report_doc_id"])
     return {"detail": "Deleted"}
\ No newline at end of file
@@ -3,12 +3,13 @@ from __future__ import annotations
 import re
 import logging
 from datetime import datetime
-from typing import Optional, Any
+from typing import AsyncIterator, Optional, Any
 
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from backend.app.core.openai_client import call_gpt
+from backend.app.core.llm_usage import tag_llm_caller
+from backend.app.core.openai_client import LLMUnavailableError, call_gpt, stream_gpt
 
 logger = logging.getLogger(__name__)
 COLL = "chat_sessions"
@@ -40,6 +41,8 @@ async def _is_legal_query(user_id: str, question: str) -> bool:
         ) or ""
         logger.debug("Classifier response for %s → %s", user_id, raw)
         return raw.strip().upper() == "LEGAL"
+    except LLMUnavailableError:
+        raise
     except Exception:
         logger.exception("Classifier failed; defaulting to NONLEGAL")
         return False
@@ -69,46 +72,27 @@ async def _ensure_session(
     return res.inserted_id
 
 
-# ───────────────────────────────── public API
-async def chat(
-    db: AsyncIOMotorDatabase,
-    *,
-    user_id: str,
-    query: str,
-    session_id: Optional[str] = None,
-) -> dict[str, str]:
-    """Persist query, classify, maybe answer, persist reply, and return result."""
-    # 1. fetch or create session
-    new_session = False
+async def _resolve_session(
+    db: AsyncIOMotorDatabase, user_id: str, query: str, session_id: Optional[str]
+) -> tuple[ObjectId, bool]:
+    """Return (session_oid, is_new); a new session already holds *query*."""
     if session_id and ObjectId.is_valid(session_id):
         sid = ObjectId(session_id)
         session = await db[COLL].find_one({"_id": sid, "user_id": user_id}, {"_id": 1})
         if not session:
             raise ValueError("Session not found")
-    else:
-        sid = await _ensure_session(db, user_id, query)
-        new_session = True
+        return sid, False
+    return await _ensure_session(db, user_id, query), True
 
-    # 2. classify via GPT-only
-    legal = await _is_legal_query(user_id, query)
 
-    if legal:
-        assistant_reply = (
-            await call_gpt(prompt=query) or
-            "Sorry, I'm unable to respond right now – please try again later."
-        )
-    else:
-        assistant_reply = (
-            "Sorry, I can only assist with legal questions. "
-            "Please rephrase your request to focus on legal or compliance matters."
-        )
-
-    # 3. persist messages
+async def _persist_turn(
+    db: AsyncIOMotorDatabase, sid: ObjectId, new_session: bool, query: str, reply: str
+) -> None:
     now = _ts()
     msgs: list[dict[str, Any]] = []
     if not new_session:
         msgs.append({"sender": "user", "text": query, "timestamp": now})
-    msgs.append({"sender": "bot", "text": assistant_reply, "timestamp": now})
+    msgs.append({"sender": "bot", "text": reply, "timestamp": now})
 
     await db[COLL].update_one(
         {"_id": sid},
@@ -118,9 +102,89 @@ async def chat(
         },
     )
 
+
+_NONLEGAL_REPLY = (
+    "Sorry, I can only assist with legal questions. "
+    "Please rephrase your request to focus on legal or compliance matters."
+)
+_UNAVAILABLE_REPLY = "Sorry, I'm unable to respond right now – please try again later."
+
+
+# ───────────────────────────────── public API
+async def chat(
+    db: AsyncIOMotorDatabase,
+    *,
+    user_id: str,
+    user_email: str,
+    query: str,
+    session_id: Optional[str] = None,
+) -> dict[str, str]:
+    """Persist query, classify, maybe answer, persist reply, and return result."""
+    tag_llm_caller("chatbot", user_email)
+    # 1. fetch or create session
+    sid, new_session = await _resolve_session(db, user_id, query, session_id)
+
+    # 2. classify via GPT-only
+    try:
+        if await _is_legal_query(user_id, query):
+            assistant_reply = await call_gpt(prompt=query) or _UNAVAILABLE_REPLY
+        else:
+            assistant_reply = _NONLEGAL_REPLY
+    except LLMUnavailableError:
+        assistant_reply = _UNAVAILABLE_REPLY
+
+    # 3. persist messages
+    await _persist_turn(db, sid, new_session, query, assistant_reply)
+
     return {"session_id": str(sid), "bot_response": assistant_reply}
 
 
+async def chat_stream(
+    db: AsyncIOMotorDatabase,
+    *,
+    user_id: str,
+    user_email: str,
+    query: str,
+    session_id: Optional[str] = None,
+) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """
+    Streaming variant of `chat` for SSE.
+
+    Emits ``("session", {"session_id": …})`` first, then ``("delta", …)``
+    chunks of the answer, and ``("done", …)`` after the turn is persisted.
+    """
+    tag_llm_caller("chatbot", user_email)
+    sid, new_session = await _resolve_session(db, user_id, query, session_id)
+    yield "session", {"session_id": str(sid)}
+
+    try:
+        legal = await _is_legal_query(user_id, query)
+    except LLMUnavailableError:
+        legal = None
+
+    if legal:
+        parts: list[str] = []
+        try:
+            async for delta in stream_gpt(prompt=query):
+                parts.append(delta)
+                yield "delta", {"text": delta}
+        except Exception:
+            logger.exception("Streaming chat answer failed")
+        assistant_reply = "".join(parts).strip()
+        if not assistant_reply:
+            assistant_reply = _UNAVAILABLE_REPLY
+            yield "delta", {"text": assistant_reply}
+    elif legal is None:
+        assistant_reply = _UNAVAILABLE_REPLY
+        yield "delta", {"text": assistant_reply}
+    else:
+        assistant_reply = _NONLEGAL_REPLY
+        yield "delta", {"text": assistant_reply}
+
+    await _persist_turn(db, sid, new_session, query, assistant_reply)
+    yield "done", {"session_id": str(sid), "bot_response": assistant_reply}
+
+
 async def list_sessions(db: AsyncIOMotorDatabase, user_id: str) -> list[dict]:
     cursor = (
         db[COLL]
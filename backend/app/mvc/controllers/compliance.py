@@ -1,95 +1,104 @@
 # backend/app/mvc/controllers/compliance.py
 from __future__ import annotations
 
+import asyncio
 import datetime as _dt
+import hashlib
 import json
 import logging
-import re
+import os
 from io import BytesIO
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from bson import ObjectId
 from fastapi import HTTPException
 from fastapi.concurrency import run_in_threadpool
-from motor.motor_asyncio import AsyncIOMotorDatabase
-
-from docx import Document
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import (
-    SimpleDocTemplate,
-    Paragraph,
-    Table,
-    TableStyle,
-    Spacer,
-)
-from reportlab.lib.styles import getSampleStyleSheet
-
-from backend.app.core.openai_client import call_gpt
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
+
+from backend.app.core.chunk_store import iter_chunks_incremental
+from backend.app.core.fanout import ChunkOutcome, with_progress
+from backend.app.core.lazy import lazy_attr
+from backend.app.core.llm_usage import ENCODING, tag_llm_caller
+from backend.app.core.openai_client import LLMUnavailableError, call_gpt, stream_gpt
+from backend.app.core.process_pool import render_pool
 from backend.app.mvc.controllers.documents import (
     get_document_record,
-    open_gridfs_file,
-    extract_full_text_from_stream,
-    upload_file_to_gridfs,
-    store_document_record,
+    extract_document_text,
 )
+from backend.app.mvc.controllers.compliance_rules import RULES_VERSION, run_rules
 from backend.app.mvc.models.compliance import ComplianceIssue
+from backend.app.utils.compliance_prefilter import is_relevant
+from backend.app.utils.json_stream import JsonItemStream
+from backend.app.utils.near_dup import merge_near_duplicates
+from backend.app.utils.segmentation import clause_chunks
+from backend.app.utils.text_index import TextIndex, attach_location
 
 logger = logging.getLogger(__name__)
 
-# size guard: 12 000 characters ≈ 3 k tokens → stays well below GPT-3.5’s 4 k ctx
-CHUNK_CHAR_LIMIT = 12_000
+Document = lazy_attr("docx", "Document")          # python-docx, on first use
+
+# size guard: ≈ 12 000 characters per GPT call (COMPLIANCE_CHUNK_TOKENS)
+CHUNK_TOKENS = int(os.getenv("COMPLIANCE_CHUNK_TOKENS", 3000))
+
+# PDF report after a check: "background" = render right after the response,
+# "on_demand" = only when first downloaded (COMPLIANCE_PDF_MODE)
+PDF_MODE = os.getenv("COMPLIANCE_PDF_MODE", "background")
+
+# compliance_reports.pdf_state
+PDF_PENDING, PDF_RENDERING, PDF_READY, PDF_FAILED = "pending", "rendering", "ready", "failed"
+
+# bump whenever the system prompt below changes → invalidates cached answers
+PROMPT_VERSION = "compliance-v1"
+COMPLIANCE_MODEL = "o4-mini"
 
 
 # ═════════════════════ helper utilities ══════════════════════
-def _split_into_chunks(text: str, size: int = CHUNK_CHAR_LIMIT) -> List[str]:
-    """
-    Greedy splitter that *tries* not to break sentences.
+def _token_count(text: str) -> int:
+    # exact even before the warm-up is done: chunk boundaries key the cache
+    return len(ENCODING.encode(text, disallowed_special=()))
+
 
-    We split on line boundaries; this keeps clause structure intact and
-    avoids chopping right in the middle of a sentence or word.
+def _split_into_chunks(text: str, budget: int = CHUNK_TOKENS) -> List[str]:
     """
-    out: list[str] = []
-    buf: list[str] = []
-    cur_len = 0
-    for line in text.splitlines(keepends=True):
-        buf.append(line)
-        cur_len += len(line)
-        if cur_len >= size:
-            out.append("".join(buf))
-            buf, cur_len = [], 0
-    if buf:
-        out.append("".join(buf))
-    return out
+    Clause-aligned chunks of ≤ *budget* tokens (utils/segmentation.py), so
+    an article is never split across two GPT calls unless it is longer
+    than the budget on its own.
+    """
+    return [c.text for c in clause_chunks(text, budget, _token_count)]
 
 
 def _deduplicate_issues(raw: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
-    Remove duplicates that may appear when several chunks flag the same clause.
-
-    Key: (rule_id + first 50 chars of snippet) – good enough for our purpose.
+    Merge issues that several chunks flagged more than once: same
+    rule_id and a near-duplicate description, see utils/near_dup.py.
+    Issues with different rule ids never merge, even when they quote the
+    same snippet.  The merged issue's ``source_chunks`` lists every
+    contributing chunk.
     """
-    unique: list[Dict[str, Any]] = []
-    seen: set[str] = set()
-    for item in raw:
-        key = f"{item.get('rule_id')}|{(item.get('extracted_text_snippet') or '')[:50]}"
-        if key not in seen:
-            unique.append(item)
-            seen.add(key)
-    return unique
+    return merge_near_duplicates(
+        [item for item in raw if isinstance(item, dict)],
+        text_of=lambda i: str(i.get("description") or ""),
+        group_of=lambda i: str(i.get("rule_id") or "").strip().upper(),
+    )
 
 
-def _extract_snippet(text: str, pattern: str, win: int = 100) -> str:
+def _locate_issues(text: str, issues: List[Dict[str, Any]]) -> None:
     """
-    Return an excerpt around the first occurrence of *pattern*.
-
-    If the pattern is not found → empty string.
+    Attach ``char_start`` / ``char_end`` / ``page`` to every issue, so the
+    UI can jump to it without searching again.  The document is indexed
+    once (utils/text_index.py) and each quoted snippet located in it –
+    fuzzily, since GPT rarely quotes byte-for-byte.  An issue without a
+    snippet falls back to its rule id's words and gets an excerpt.
     """
-    m = re.search(pattern, text, re.IGNORECASE)
-    if not m:
-        return ""
-    s, e = max(0, m.start() - win), min(len(text), m.end() + win)
-    return ("…" if s else "") + text[s:e] + ("…" if e < len(text) else "")
+    index = TextIndex(text)
+    for issue in issues:
+        loc = attach_location(issue, index, "extracted_text_snippet")
+        if loc is None and not issue.get("extracted_text_snippet"):
+            loc = index.locate(str(issue.get("rule_id") or "").replace("_", " "))
+            if loc is not None:
+                issue["extracted_text_snippet"] = index.excerpt(loc)
+                issue["char_start"], issue["char_end"], issue["page"] = loc.start, loc.end, loc.page
 
 
 def _heuristic_score(issues: List[Dict[str, Any]]) -> int:
@@ -103,31 +112,47 @@ def _heuristic_score(issues: List[Dict[str, Any]]) -> int:
     return max(0, 100 - bad * 20)
 
 
-async def _store_pdf(
+# ═════════════════════ main entry point ══════════════════════
+async def run_compliance_check(
     db: AsyncIOMotorDatabase,
     user_id: str,
-    buf: BytesIO,
-    filename: str,
-) -> str:
+    *,
+    document_text: Optional[str] = None,
+    doc_id: Optional[str] = None,
+) -> Dict[str, Any]:
     """
-    Upload the in-memory PDF buffer to GridFS, create a document record,
-    return the newly created doc-id (string).
+    Analyse the given document for Saudi PDPL / contract-law compliance
+    and return the consolidated result – see `stream_compliance_check`.
     """
-    buf.seek(0)
-    grid_id = await upload_file_to_gridfs(db, buf.read(), filename)
-    return await store_document_record(db, user_id, filename, grid_id)
+    result: Dict[str, Any] = {}
+    async for event, payload in stream_compliance_check(
+        db, user_id, document_text=document_text, doc_id=doc_id, stream=False
+    ):
+        if event == "done":
+            result = payload
+    return result
 
 
-# ═════════════════════ main entry point ══════════════════════
-async def run_compliance_check(
+async def stream_compliance_check(
     db: AsyncIOMotorDatabase,
     user_id: str,
     *,
     document_text: Optional[str] = None,
     doc_id: Optional[str] = None,
-) -> Dict[str, Any]:
+    stream: bool = True,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
     """
-    Analyse the given document for Saudi PDPL / contract-law compliance.
+    Analyse the given document for Saudi PDPL / contract-law compliance,
+    reporting progress as ``(event, payload)`` tuples for SSE:
+
+        ("start", {"chunks": n, "skipped": k})
+        ("rules", {"version", "issues"})          local rule-pack findings,
+                                                  before any GPT call
+        ("finding", {"chunk", "issue"})           as GPT writes each issue
+                                                  (only with *stream*)
+        ("chunk", {...timing, "completed", "total", "issues"})   per chunk,
+                                                  in completion order
+        ("done",  {...})                          the consolidated result
 
     You can either pass:
         • raw text   – via `document_text`
@@ -136,13 +161,22 @@ async def run_compliance_check(
 
     The routine:
         1. Ensures we have the plain text (extracts from GridFS if needed)
-        2. Splits it into chunks so each GPT call stays within context limits
-        3. Calls GPT for each chunk (in a background thread)
-        4. Deduplicates / normalises the issues
-        5. Stores the report in MongoDB
-        6. Generates & uploads a PDF report
-        7. Returns the consolidated result payload
+        2. Runs the local PDPL rule pack (compliance_rules.py) – instant
+        3. Splits it into chunks so each GPT call stays within context limits
+        4. Skips chunks without any PDPL / contract-law vocabulary and calls
+           GPT for the rest concurrently (bounded, see core/fanout.py)
+        5. Merges rule and GPT issues, deduplicates / normalises them
+        6. Stores the report in MongoDB (``pdf_state: "pending"``)
+        7. Yields the consolidated result payload as the "done" event
+
+    The PDF report is not part of the check: it is rendered afterwards in
+    the background, or on first download (COMPLIANCE_PDF_MODE), see
+    `render_report_pdf`.
+
+    A chunk event's issues are that chunk's raw findings; de-duplication
+    and normalisation only happen once every chunk is in.
     """
+    tag_llm_caller("compliance", user_id)
     # ────────────────── sanity checks ──────────────────
     if not (document_text or doc_id):
         raise HTTPException(400, "Either document_text or doc_id must be provided.")
@@ -152,8 +186,7 @@ async def run_compliance_check(
     # ────────────────── load text if only doc-id was provided ──────────────────
     if doc_id:
         rec = await get_document_record(db, doc_id)
-        stream, fname = await open_gridfs_file(db, rec["file_id"])
-        document_text = await extract_full_text_from_stream(stream, fname)
+        document_text = await extract_document_text(db, rec["file_id"])
         if document_text.startswith("Error"):
             raise HTTPException(422, document_text)
 
@@ -179,40 +212,117 @@ If the contract contains zero violations, return ONLY this exact JSON:
 Respond with VALID JSON only—no markdown and no additional commentary.
 """.strip()
 
-    # ────────────────── call GPT chunk-by-chunk ──────────────────
-    raw_issues: list[Dict[str, Any]] = []
+    # ────────────────── call GPT per chunk (bounded fan-out) ──────────────────
+    progress: asyncio.Queue = asyncio.Queue()
 
-    for idx, chunk in enumerate(_split_into_chunks(document_text)):
+    async def _check_chunk(idx: int, chunk: str) -> List[Dict[str, Any]]:
+        request = dict(
+            system_message=system_message,
+            model=COMPLIANCE_MODEL,
+            temperature=0.0,
+            max_tokens=16384,
+        )
+        # items close one by one in the streamed output → announce them early
+        parser = JsonItemStream(("issues",))
+        if stream:
+            parts: List[str] = []
+            async for delta in stream_gpt(chunk, **request):
+                parts.append(delta)
+                for issue in parser.feed(delta):
+                    progress.put_nowait({"chunk": idx + 1, "issue": issue})
+            resp = "".join(parts)
+        else:
+            resp = await call_gpt(chunk, **request, cache=True, prompt_version=PROMPT_VERSION)
+            parser.feed(resp or "")
         try:
-            resp = await call_gpt(
-                chunk,
-                system_message=system_message,
-                model="o4-mini",
-                temperature=0.0,
-                max_tokens=16384,
-            )
             parsed: Any = json.loads(resp) if resp else {}
-            if isinstance(parsed, dict):
-                raw_issues.extend(parsed.get("issues", []))
-            elif isinstance(parsed, list):
-                raw_issues.extend(parsed)
         except json.JSONDecodeError:
-            logger.warning("Chunk %d → GPT returned invalid JSON: %r", idx + 1, resp)
-        except Exception:
-            logger.exception("Chunk %d → GPT call failed", idx + 1)
+            logger.warning(
+                "Chunk %d → GPT returned invalid JSON, recovered %d issue(s): %.300r",
+                idx + 1, len(parser.items), resp,
+            )
+            if not parser.items:
+                raise
+            return parser.items
+        if isinstance(parsed, dict):
+            return parsed.get("issues", [])
+        if isinstance(parsed, list):
+            return parsed
+        return []
+
+    chunks = _split_into_chunks(document_text)
+    # signature blocks, annexes … without PDPL / contract vocabulary never
+    # reach GPT (utils/compliance_prefilter.py)
+    relevant = [i for i, chunk in enumerate(chunks) if is_relevant(chunk)]
+    yield "start", {"chunks": len(chunks), "skipped": len(chunks) - len(relevant)}
+
+    # deterministic findings first – the user sees them before any GPT round trip
+    rule_issues = [i.model_dump() for i in await run_in_threadpool(run_rules, document_text)]
+    yield "rules", {"version": RULES_VERSION, "issues": rule_issues}
+
+    outcomes: List[ChunkOutcome] = []
+    raw_issues: list[Dict[str, Any]] = []
+
+    def _chunk_event(outcome: ChunkOutcome, found: List[Dict[str, Any]]) -> Dict[str, Any]:
+        outcomes.append(outcome)
+        raw_issues.extend(found)
+        return {
+            **outcome.timing(),
+            "completed": len(outcomes),
+            "total": len(chunks),
+            "issues": found,
+        }
+
+    for i in sorted(set(range(len(chunks))) - set(relevant)):
+        yield "chunk", _chunk_event(ChunkOutcome(i, result=[], skipped=True), [])
+
+    try:
+        async for is_outcome, outcome in with_progress(
+            iter_chunks_incremental(
+                "compliance",
+                [chunks[i] for i in relevant],
+                lambda j, chunk: _check_chunk(relevant[j], chunk),
+                prompt_version=PROMPT_VERSION,
+                model=COMPLIANCE_MODEL,
+            ),
+            progress,
+        ):
+            if not is_outcome:
+                yield "finding", outcome
+                continue
+            outcome.index = relevant[outcome.index]
+            found = [
+                {**i, "source_chunks": [outcome.index + 1]}
+                for i in (outcome.result or []) if isinstance(i, dict)
+            ] if outcome.ok else []
+            yield "chunk", _chunk_event(outcome, found)
+    except LLMUnavailableError:
+        # an outage must not look like "no issues in this chunk"
+        logger.exception("Compliance check → AI unavailable")
+        raise HTTPException(503, "AI service is temporarily unavailable – please try again shortly.")
+
+    if not any(o.ok for o in outcomes):
+        raise HTTPException(502, "Compliance check failed for every part of the document.")
+
+    # back to document order, whatever order the chunks finished in
+    raw_issues.sort(key=lambda i: i["source_chunks"][0])
+    outcomes.sort(key=lambda o: o.index)
 
     # ────────────────── deduplicate & normalise ──────────────────
-    raw_issues = _deduplicate_issues(raw_issues)
+    # rule findings go first: a GPT issue merges into one only when it
+    # reuses the rule's id (case-insensitive) and near-duplicates its
+    # description – the rule finding is kept; other ids stay separate
+    raw_issues = _deduplicate_issues(rule_issues + raw_issues)
+    await run_in_threadpool(_locate_issues, document_text, raw_issues)
 
     issues: List[Dict[str, Any]] = []
     for raw in raw_issues:
         if not isinstance(raw, dict):
             continue
-        # ensure minimal required keys
-        raw["status"] = "Issue Found"
-        if not raw.get("extracted_text_snippet"):
-            pat = raw.get("rule_id", "")
-            raw["extracted_text_snippet"] = _extract_snippet(document_text, pat) or None
+        # ensure minimal required keys (rule findings set their own status)
+        if raw.get("source") != "rules":
+            raw["status"] = "Issue Found"
+            raw["source"] = "gpt"
         try:
             issues.append(ComplianceIssue(**raw).model_dump())
         except Exception:
@@ -235,38 +345,38 @@ Respond with VALID JSON only—no markdown and no additional commentary.
 
     # ────────────────── persist metadata ──────────────────
     preview = document_text[:500] + ("…" if len(document_text) > 500 else "")
+    report_oid = ObjectId()
+    report_id = str(report_oid)
+    pdf_name = f"compliance_report_{report_id}.pdf"
     row = {
+        "_id": report_oid,
         "user_id": user_id,
         "document_text_preview": preview,
         "original_doc_id": doc_id,
         "issues": issues,
         "compliance_score": compliance_score,
+        "chunk_stats": [o.timing() for o in outcomes],
+        "rules_version": RULES_VERSION,
+        "report_filename": pdf_name,
+        "pdf_state": PDF_PENDING,
         "timestamp": _dt.datetime.utcnow(),
     }
-    ins = await db.compliance_reports.insert_one(row)
-    report_id = str(ins.inserted_id)
+    await db.compliance_reports.insert_one(row)
 
-    # ────────────────── generate PDF report ──────────────────
-    pdf_buf: BytesIO = await run_in_threadpool(
-        generate_compliance_report_pdf,
-        {**row, "_id": report_id},
-    )
-    pdf_name = f"compliance_report_{report_id}.pdf"
-    report_doc_id = await _store_pdf(db, user_id, pdf_buf, pdf_name)
-
-    # add PDF metadata to DB record
-    await db.compliance_reports.update_one(
-        {"_id": ins.inserted_id},
-        {"$set": {"report_doc_id": report_doc_id, "report_filename": pdf_name}},
-    )
+    # ────────────────── PDF report: deferred ──────────────────
+    # rendered after the response (background mode) or on first download –
+    # either way not on the check's critical path
+    if PDF_MODE == "background":
+        _spawn_background(render_report_pdf(db, report_id))
 
     # ────────────────── response payload ──────────────────
-    return {
+    yield "done", {
         "report_id": report_id,
         "issues": issues,
         "compliance_score": compliance_score,
-        "report_doc_id": report_doc_id,
+        "report_doc_id": None,
         "report_filename": pdf_name,
+        "pdf_state": PDF_PENDING,
     }
 
 
@@ -358,6 +468,18 @@ def generate_compliance_report_pdf(report_data: Dict[str, Any]) -> BytesIO:
     """
     Build a PDF report using ReportLab.
     """
+    # imported here so ReportLab is not loaded until a PDF is requested
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import (
+        SimpleDocTemplate,
+        Paragraph,
+        Table,
+        TableStyle,
+        Spacer,
+    )
+
     buf = BytesIO()
     doc = SimpleDocTemplate(buf, pagesize=letter)
     styles = getSampleStyleSheet()
@@ -390,14 +512,15 @@ def generate_compliance_report_pdf(report_data: Dict[str, Any]) -> BytesIO:
 
     # Summary
     elems.append(Paragraph("1. Summary of Findings", styles["Heading2"]))
-    counts = {"OK": 0, "Issue Found": 0}
+    counts = {"OK": 0, "Issue Found": 0, "Warning": 0}
     for issue in report_data["issues"]:
-        counts[issue["status"]] += 1
+        counts[issue["status"]] = counts.get(issue["status"], 0) + 1
 
     sum_tbl = Table(
         [
             ["Status", "Count"],
             ["Issue Found", str(counts["Issue Found"])],
+            ["Warning", str(counts["Warning"])],
             ["OK", str(counts["OK"])],
         ],
         colWidths=[120, 120],
@@ -453,4 +576,154 @@ def generate_compliance_report_pdf(report_data: Dict[str, Any]) -> BytesIO:
 
     doc.build(elems)
     buf.seek(0)
-    return buf
\ No newline at end of file
+    return buf
+
+# ═════════════════════ rendered report artifacts ══════════════════════
+# bump a version whenever its generator's output changes → re-rendered on
+# the next download; older artifacts are replaced then
+REPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    "pdf": ("compliance-pdf-1", "application/pdf"),
+    "docx": (
+        "compliance-docx-1",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ),
+}
+ARTIFACT_BUCKET = "report_artifacts_fs"
+
+
+def render_compliance_report(report_data: Dict[str, Any], fmt: str) -> bytes:
+    """Render *report_data* as *fmt* – runs in the render process pool."""
+    if fmt == "pdf":
+        return generate_compliance_report_pdf(report_data).getvalue()
+    return generate_compliance_report_docx(report_data).getvalue()
+
+
+async def get_report_artifact(
+    db: AsyncIOMotorDatabase,
+    report: Dict[str, Any],
+    fmt: str,
+) -> Dict[str, Any]:
+    """
+    The stored rendering of *report* (as returned by `get_compliance_report`)
+    in *fmt*: ``{"file_id", "version", "etag", "filename", "size"}``.
+
+    Rendered in the process pool on first request (or when REPORT_FORMATS
+    has a newer version), uploaded to GridFS with the report id, format
+    and version as metadata, and recorded under ``artifacts.<fmt>`` on the
+    report row so later downloads skip rendering altogether.
+    """
+    if fmt not in REPORT_FORMATS:
+        raise HTTPException(400, f"Unsupported report format: {fmt}")
+    version, _media_type = REPORT_FORMATS[fmt]
+    previous = (report.get("artifacts") or {}).get(fmt)
+    if previous and previous.get("version") == version:
+        return previous
+
+    data = await render_pool.run(render_compliance_report, report, fmt)
+    etag = hashlib.sha256(data).hexdigest()[:32]
+    filename = f"compliance_report_{report['_id']}.{fmt}"
+    fs = AsyncIOMotorGridFSBucket(db, bucket_name=ARTIFACT_BUCKET)
+    file_id = await fs.upload_from_stream(
+        filename,
+        data,
+        metadata={"report_id": report["_id"], "format": fmt, "version": version, "etag": etag},
+    )
+    artifact = {
+        "file_id": str(file_id),
+        "version": version,
+        "etag": etag,
+        "filename": filename,
+        "size": len(data),
+    }
+    # only the first of several concurrent renders is recorded
+    update: Dict[str, Any] = {f"artifacts.{fmt}": artifact}
+    if fmt == "pdf":
+        update["pdf_state"] = PDF_READY
+    res = await db.compliance_reports.update_one(
+        {"_id": ObjectId(report["_id"]), f"artifacts.{fmt}.version": {"$ne": version}},
+        {"$set": update},
+    )
+    if not res.modified_count:
+        await fs.delete(file_id)
+        row = await db.compliance_reports.find_one(
+            {"_id": ObjectId(report["_id"])}, {f"artifacts.{fmt}": 1}
+        )
+        return ((row or {}).get("artifacts") or {}).get(fmt) or artifact
+    if previous:
+        await _delete_artifact_file(fs, previous)
+    report.setdefault("artifacts", {})[fmt] = artifact
+    return artifact
+
+
+async def open_report_artifact(
+    db: AsyncIOMotorDatabase,
+    report: Dict[str, Any],
+    artifact: Dict[str, Any],
+    fmt: str,
+):
+    """GridFS download stream of *artifact*; re-rendered if the blob has vanished."""
+    fs = AsyncIOMotorGridFSBucket(db, bucket_name=ARTIFACT_BUCKET)
+    try:
+        return await fs.open_download_stream(ObjectId(artifact["file_id"]))
+    except NoFile:
+        logger.warning("Artifact %s of report %s is missing – re-rendering",
+                       artifact["file_id"], report["_id"])
+    await db.compliance_reports.update_one(
+        {"_id": ObjectId(report["_id"])}, {"$unset": {f"artifacts.{fmt}": ""}}
+    )
+    report.get("artifacts", {}).pop(fmt, None)
+    artifact.update(await get_report_artifact(db, report, fmt))
+    return await fs.open_download_stream(ObjectId(artifact["file_id"]))
+
+
+async def delete_report_artifacts(db: AsyncIOMotorDatabase, report: Dict[str, Any]) -> None:
+    """Remove every stored rendering of *report* (before deleting the report)."""
+    fs = AsyncIOMotorGridFSBucket(db, bucket_name=ARTIFACT_BUCKET)
+    for artifact in (report.get("artifacts") or {}).values():
+        await _delete_artifact_file(fs, artifact)
+
+
+async def _delete_artifact_file(fs: AsyncIOMotorGridFSBucket, artifact: Dict[str, Any]) -> None:
+    try:
+        await fs.delete(ObjectId(artifact["file_id"]))
+    except NoFile:
+        pass
+
+
+# ═════════════════════ deferred PDF rendering ══════════════════════
+_background_tasks: "set[asyncio.Task[None]]" = set()
+
+
+def _spawn_background(coro: Any) -> None:
+    """Fire-and-forget *coro*, keeping a reference until it is done."""
+    task = asyncio.get_running_loop().create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def render_report_pdf(db: AsyncIOMotorDatabase, report_id: str) -> None:
+    """
+    Render and store the PDF of a finished check (``pdf_state`` pending →
+    rendering → ready / failed).  Only one caller claims the work; a
+    failure is logged and recorded – the download endpoint renders on
+    demand whatever the state, so a lost or failed render only costs the
+    first download its rendering time.
+    """
+    oid = ObjectId(report_id)
+    claimed = await db.compliance_reports.update_one(
+        {"_id": oid, "pdf_state": {"$in": [PDF_PENDING, PDF_FAILED]}},
+        {"$set": {"pdf_state": PDF_RENDERING}},
+    )
+    if not claimed.modified_count:
+        return
+    try:
+        report = await db.compliance_reports.find_one({"_id": oid})
+        if not report:
+            return
+        report["_id"] = report_id
+        await get_report_artifact(db, report, "pdf")
+    except Exception:
+        logger.exception("Background PDF rendering failed for report %s", report_id)
+        await db.compliance_reports.update_one(
+            {"_id": oid, "pdf_state": PDF_RENDERING}, {"$set": {"pdf_state": PDF_FAILED}}
+        )
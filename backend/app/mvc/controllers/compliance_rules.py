@@ -0,0 +1,448 @@
+# backend/app/mvc/controllers/compliance_rules.py
+"""
+Deterministic PDPL rule pack – instant, local compliance findings.
+
+GPT findings take a round trip per chunk; these rules run over the full
+text in milliseconds, so `stream_compliance_check` can show them before
+the first chunk returns, and the model's findings are merged in as they
+arrive.  Three kinds of rule:
+
+PatternRule        a phrase / regex that is a finding on its own
+                   ("deemed to have consented")
+ProximityRule      two patterns within *window* words of each other
+                   ("retain" … "indefinitely")
+RequiredClauseRule the document triggers an obligation (it processes
+                   personal data) but no clause addresses it (retention
+                   period, breach notification, transfer safeguards …);
+                   with *near* the trigger only counts close to a second
+                   pattern (personal data … "outside the Kingdom")
+
+Patterns are written with `en()` / `ar()`: English phrases match whole
+words case-insensitively (``*`` = any word ending); Arabic phrases
+match whole words too, allowing clitic prefixes and attached pronouns,
+and tolerate diacritics, tatweel and the usual letter variants (أ/إ/آ/ا,
+ى/ي, ة/ه).  Matching runs on the original text, so snippets and offsets
+point into the document as uploaded.
+
+Bump RULES_VERSION whenever a rule is added, removed or changed – it is
+stored on every report.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from backend.app.mvc.models.compliance import ComplianceIssue
+
+RULES_VERSION = "pdpl-rules-3"
+
+ISSUE = "Issue Found"
+WARNING = "Warning"
+SOURCE = "rules"
+
+SNIPPET_WIN = 120          # chars of context either side of a match
+
+
+# ═════════════════════ pattern builders ══════════════════════
+_AR_MARKS = "[\u064B-\u0652\u0670\u0640]"
+_AR_MARKS_RE = re.compile(_AR_MARKS)
+_AR_VARIANTS = {"ا": "[اأإآ]", "أ": "[اأإآ]", "إ": "[اأإآ]", "آ": "[اأإآ]",
+                "ي": "[يى]", "ى": "[يى]", "ة": "[ةه]", "ه": "[ةه]"}
+
+# anchors are looked up in lower-cased text without marks, variants folded
+_FOLD_VARIANTS = (("أ", "ا"), ("إ", "ا"), ("آ", "ا"), ("ى", "ي"), ("ة", "ه"))
+
+
+def _fold(text: str) -> str:
+    text = _AR_MARKS_RE.sub("", text.lower())
+    for variant, base in _FOLD_VARIANTS:      # str.replace beats translate() here
+        text = text.replace(variant, base)
+    return text
+
+ANCHOR_WIN = 300           # chars searched either side of an anchor hit
+_SPACE = re.compile(r"\s")
+
+
+@dataclass(frozen=True)
+class Alt:
+    """One phrase: its regex plus a literal that every match contains."""
+    regex: str
+    anchor: str            # folded (see `_fold`); "" = no usable literal
+
+
+def en(*phrases: str) -> List[Alt]:
+    """Whole-word English alternatives; ``*`` = any word ending."""
+    out = []
+    for phrase in phrases:
+        words = phrase.split()
+        regex = r"\s+".join(
+            re.escape(w[:-1]) + r"\w*" if w.endswith("*") else re.escape(w) for w in words
+        )
+        anchor = max((w.rstrip("*").lower() for w in words), key=len)
+        out.append(Alt(r"\b" + regex + r"\b", anchor))
+    return out
+
+
+def _ar_letters(word: str) -> str:
+    return "".join((_AR_VARIANTS.get(ch) or re.escape(ch)) + _AR_MARKS + "*" for ch in word)
+
+
+# a word edge: no Arabic letter or mark on the other side
+_AR_LETTER = "[\u0621-\u0652\u0670]"
+# و/ف, then ب/ك/ل, then the article: وبال…, فل…, لل… (ل + ال)
+_AR_CLITICS = f"(?:[وف]{_AR_MARKS}*)?(?:[بكل]{_AR_MARKS}*)?"
+_AR_SUFFIXES = "(?:" + "|".join(
+    _ar_letters(s) for s in ("هما", "ها", "هم", "هن", "كم", "نا", "ه", "ك")
+) + ")?"
+
+
+def ar(*phrases: str) -> List[Alt]:
+    """
+    Arabic alternatives, tolerant of diacritics and letter variants; ``*`` = any word.
+
+    Phrases match whole words – "بيع" is not found inside "الطبيعي" – but
+    may carry a clitic prefix (و ف ب ك ل, the article) and an attached
+    pronoun.
+    """
+    out = []
+    for phrase in phrases:
+        words = phrase.split()
+        parts = [r"\S+" if word == "*" else _ar_letters(word) for word in words]
+        if words[0] != "*":
+            if words[0].startswith("ال"):
+                body = _ar_letters(words[0][2:])
+                parts[0] = (f"(?:{_AR_CLITICS}{_ar_letters('ال')}"
+                            f"|(?:[وف]{_AR_MARKS}*)?{_ar_letters('لل')}){body}")
+            else:
+                parts[0] = f"{_AR_CLITICS}(?:{_ar_letters('ال')})?{parts[0]}"
+        if words[-1] != "*":
+            parts[-1] += _AR_SUFFIXES
+        regex = f"(?<!{_AR_LETTER})" + r"\s+".join(parts) + f"(?!{_AR_LETTER})"
+        anchor = _fold(max((w for w in words if w != "*"), key=len))
+        out.append(Alt(regex, anchor))
+    return out
+
+
+class Matcher:
+    """
+    Compiled alternation that only runs where one of its anchors occurs.
+
+    Python's ``re`` tries every alternative at every position, ~10 ms per
+    pattern on a 50-page contract; locating the anchors with ``str.find``
+    first and searching windows around them makes a rule a fraction of
+    that.
+    """
+
+    def __init__(self, alts: Sequence[Alt]):
+        self.pattern = re.compile("|".join(f"(?:{a.regex})" for a in alts), re.IGNORECASE)
+        self._anchors = sorted({a.anchor for a in alts})
+
+    def _windows(self, text: "Text") -> List[Tuple[int, int]]:
+        if "" in self._anchors:
+            return [(0, len(text.raw))]
+        spans: List[Tuple[int, int]] = []
+        for anchor in self._anchors:
+            i = text.folded.find(anchor)
+            while i != -1:
+                lo, hi = text.raw_offset(i), text.raw_offset(i + len(anchor))
+                spans.append((max(0, lo - ANCHOR_WIN), hi + ANCHOR_WIN))
+                i = text.folded.find(anchor, i + 1)
+        spans.sort()
+        merged: List[Tuple[int, int]] = []
+        for lo, hi in spans:
+            if merged and lo <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+            else:
+                merged.append((lo, hi))
+        return merged
+
+    def present(self, text: "Text") -> bool:
+        """Cheap pre-check: could this pattern match at all?"""
+        return "" in self._anchors or any(a in text.folded for a in self._anchors)
+
+    def finditer(self, text: "Text") -> Iterator[Tuple[int, int]]:
+        raw = text.raw
+        last_end = -1
+        for lo, hi in self._windows(text):
+            # end the search on a whole word: an ``endpos`` inside a word
+            # would look like the end of the string to \b and lookarounds
+            gap = _SPACE.search(raw, hi)
+            for m in self.pattern.finditer(raw, lo, gap.start() if gap else len(raw)):
+                if m.start() >= hi:
+                    break
+                if m.start() >= last_end:         # windows may overlap a match
+                    last_end = m.end()
+                    yield m.span()
+
+    def search(self, text: "Text") -> Optional[Tuple[int, int]]:
+        return next(self.finditer(text), None)
+
+
+def _compile(*alternatives: List[Alt]) -> Matcher:
+    return Matcher([a for alts in alternatives for a in alts])
+
+
+class Text:
+    """The document plus its folded copy for anchor lookup, built once."""
+
+    __slots__ = ("raw", "folded", "_marks")
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        self.folded = _fold(raw)
+        # folded offset of every removed mark, to map folded → raw offsets
+        self._marks = [m.start() - k for k, m in enumerate(_AR_MARKS_RE.finditer(raw))]
+
+    def raw_offset(self, i: int) -> int:
+        return i + bisect_right(self._marks, i) if self._marks else i
+
+
+def _snippet(text: str, start: int, end: int) -> str:
+    s, e = max(0, start - SNIPPET_WIN), min(len(text), end + SNIPPET_WIN)
+    return ("…" if s else "") + text[s:e].strip() + ("…" if e < len(text) else "")
+
+
+def _pairs(text: Text, first: Matcher, second: Matcher, window: int) -> Iterator[Tuple[int, int]]:
+    """Spans where a *first* and a *second* match lie within *window* words."""
+    if not (first.present(text) and second.present(text)):
+        return
+    seconds = list(second.finditer(text))
+    starts = [b[0] for b in seconds]
+    for a in first.finditer(text):
+        # only the nearest second match on either side can be closest
+        i = bisect_right(starts, a[0])
+        for b in seconds[max(0, i - 1):i + 1]:
+            lo, hi = (a[1], b[0]) if a[0] <= b[0] else (b[1], a[0])
+            if hi <= lo or len(text.raw[lo:hi].split()) <= window:
+                yield min(a[0], b[0]), max(a[1], b[1])
+
+
+def _first_pair(text: Text, first: Matcher, second: Matcher, window: int) -> Optional[Tuple[int, int]]:
+    return next(_pairs(text, first, second, window), None)
+
+
+# ═════════════════════ rule types ══════════════════════
+@dataclass(frozen=True)
+class Rule:
+    rule_id: str
+    description: str
+    status: str = ISSUE
+
+    def check(self, text: Text) -> List[ComplianceIssue]:
+        raise NotImplementedError
+
+    def _issue(self, text: Text, span: Optional[Tuple[int, int]]) -> ComplianceIssue:
+        return ComplianceIssue(
+            rule_id=self.rule_id,
+            description=self.description,
+            status=self.status,
+            extracted_text_snippet=_snippet(text.raw, *span) if span else None,
+            source=SOURCE,
+            char_start=span[0] if span else None,
+            char_end=span[1] if span else None,
+        )
+
+
+@dataclass(frozen=True)
+class PatternRule(Rule):
+    pattern: Matcher = field(default=None, repr=False)  # type: ignore[assignment]
+
+    def check(self, text: Text) -> List[ComplianceIssue]:
+        span = self.pattern.search(text)
+        return [self._issue(text, span)] if span else []
+
+
+@dataclass(frozen=True)
+class ProximityRule(Rule):
+    first: Matcher = field(default=None, repr=False)   # type: ignore[assignment]
+    second: Matcher = field(default=None, repr=False)  # type: ignore[assignment]
+    window: int = 25                                    # words
+
+    def check(self, text: Text) -> List[ComplianceIssue]:
+        span = _first_pair(text, self.first, self.second, self.window)
+        return [self._issue(text, span)] if span else []
+
+
+@dataclass(frozen=True)
+class RequiredClauseRule(Rule):
+    trigger: Matcher = field(default=None, repr=False)   # type: ignore[assignment]
+    required: Matcher = field(default=None, repr=False)  # type: ignore[assignment]
+    status: str = WARNING
+    # optional: the trigger only counts within *window* words of *near*
+    near: Optional[Matcher] = field(default=None, repr=False)
+    window: int = 25
+
+    def check(self, text: Text) -> List[ComplianceIssue]:
+        if self.near is None:
+            span = self.trigger.search(text)
+        else:
+            span = _first_pair(text, self.trigger, self.near, self.window)
+        if not span or self.required.search(text):
+            return []
+        return [self._issue(text, span)]
+
+
+# ═════════════════════ the rule pack ══════════════════════
+_PERSONAL_DATA = _compile(
+    en("personal data", "personal information", "data subject*", "employee data",
+       "customer data", "personally identifiable"),
+    ar("البيانات الشخصية", "بيانات شخصية", "المعلومات الشخصية", "صاحب البيانات"),
+)
+_ABROAD = _compile(
+    en("outside the Kingdom", "outside Saudi Arabia", "outside KSA", "abroad",
+       "cross-border", "foreign jurisdiction*", "any country", "other countries"),
+    ar("خارج المملكة", "خارج المملكة العربية السعودية", "دولة أخرى", "دول أخرى"),
+)
+
+RULES: Tuple[Rule, ...] = (
+    PatternRule(
+        "PDPL_IMPLIED_CONSENT",
+        "Consent to processing is implied or deemed rather than given freely, "
+        "explicitly and for a specific purpose (PDPL Art. 5–6). Obtain "
+        "explicit consent and allow it to be withdrawn.",
+        pattern=_compile(
+            en("deemed to have consented", "deemed to consent", "deemed consent",
+               "implied consent", "implicitly consent*", "consent is deemed",
+               "shall be deemed to have agreed to the processing"),
+            ar("يعتبر موافقا", "يعتبر * موافقا", "يعد موافقا", "يعد * موافقا",
+               "موافقة ضمنية", "بمثابة موافقة"),
+        ),
+    ),
+    PatternRule(
+        "PDPL_CONSENT_NOT_WITHDRAWABLE",
+        "The clause makes consent irrevocable; data subjects may withdraw "
+        "consent at any time (PDPL Art. 5).",
+        pattern=_compile(
+            en("irrevocabl* consent*", "consent* irrevocabl*",
+               "may not withdraw * consent", "cannot withdraw * consent",
+               "consent shall not be withdrawn"),
+            ar("موافقة نهائية لا رجعة فيها", "لا يجوز العدول عن الموافقة",
+               "لا يحق له سحب الموافقة"),
+        ),
+    ),
+    ProximityRule(
+        "PDPL_INDEFINITE_RETENTION",
+        "Personal data is kept indefinitely. Data must be destroyed once the "
+        "purpose of collection ends (PDPL Art. 18); state a retention period.",
+        first=_compile(en("retain*", "retention", "store*", "keep*", "kept", "archiv*"),
+                       ar("الاحتفاظ", "يحتفظ", "تحتفظ", "نحتفظ", "تخزين", "حفظ")),
+        second=_compile(en("indefinitely", "permanently", "perpetual*", "in perpetuity",
+                           "unlimited period", "without time limit", "forever"),
+                        ar("لأجل غير مسمى", "بشكل دائم", "مدة غير محددة", "إلى الأبد")),
+        window=20,
+    ),
+    ProximityRule(
+        "PDPL_SALE_OF_PERSONAL_DATA",
+        "The clause allows personal data to be sold, rented or otherwise "
+        "monetised, which the PDPL does not permit without a lawful basis "
+        "and the data subject's consent.",
+        first=_compile(en("sell*", "sale", "sold", "rent*", "monetis*", "monetiz*", "trade in"),
+                       ar("بيع", "يبيع", "تأجير", "المتاجرة")),
+        second=_PERSONAL_DATA,
+        window=15,
+    ),
+    ProximityRule(
+        "PDPL_UNRESTRICTED_DISCLOSURE",
+        "Personal data may be disclosed to any third party without limiting "
+        "the purpose or the recipients (PDPL Art. 15). Restrict disclosure "
+        "to defined recipients and purposes.",
+        first=_PERSONAL_DATA,
+        second=_compile(en("any third part*", "third parties without", "any party whatsoever",
+                           "at its sole discretion disclose*", "without restriction"),
+                        ar("أي طرف ثالث", "للغير دون", "دون قيد")),
+        window=25,
+    ),
+    ProximityRule(
+        "PDPL_SENSITIVE_DATA",
+        "Sensitive data (health, genetic, biometric, religious, criminal or "
+        "credit data) is processed; the PDPL requires explicit consent and "
+        "additional safeguards for it.",
+        status=WARNING,
+        first=_compile(en("health data", "medical record*", "medical data", "genetic*",
+                          "biometric*", "religio* belief*", "criminal record*", "credit data"),
+                       ar("بيانات صحية", "السجلات الطبية", "بيانات وراثية", "بيانات حيوية",
+                          "المعتقد الديني", "السوابق الجنائية", "بيانات ائتمانية")),
+        second=_compile(en("collect*", "process*", "store*", "share*", "use", "used"),
+                        ar("جمع", "معالجة", "تخزين", "استخدام")),
+        window=20,
+    ),
+    RequiredClauseRule(
+        "PDPL_MISSING_RETENTION_CLAUSE",
+        "Personal data is processed but no retention period or destruction "
+        "procedure is stated (PDPL Art. 18).",
+        trigger=_PERSONAL_DATA,
+        required=_compile(
+            en("retention period", "retain* * for", "retain* * until", "period of retention",
+               "destroy*", "destruction", "delet*", "eras*", "anonymi*"),
+            ar("مدة الاحتفاظ", "فترة الاحتفاظ", "إتلاف", "حذف", "محو"),
+        ),
+    ),
+    RequiredClauseRule(
+        "PDPL_MISSING_BREACH_NOTIFICATION",
+        "Personal data is processed but the contract has no personal-data "
+        "breach notification obligation (PDPL Art. 20 – notify the competent "
+        "authority within 72 hours).",
+        trigger=_PERSONAL_DATA,
+        required=_compile(
+            en("data breach*", "security breach*", "security incident*", "breach notif*",
+               "personal data breach*", "72 hours", "seventy-two hours"),
+            ar("تسرب البيانات", "تسرب", "حادثة أمنية", "الإبلاغ عن", "72 ساعة"),
+        ),
+    ),
+    RequiredClauseRule(
+        "PDPL_MISSING_DATA_SUBJECT_RIGHTS",
+        "Personal data is processed but the data subject's rights (access, "
+        "correction, destruction, information) are not addressed (PDPL Art. 4).",
+        trigger=_PERSONAL_DATA,
+        required=_compile(
+            en("right* of access", "right* to access", "right* to correct*",
+               "right* to rectif*", "right* to delet*", "right* to eras*",
+               "right* to be informed", "data subject rights", "rights of the data subject"),
+            ar("حق الوصول", "حق التصحيح", "حق الإتلاف", "حق العلم", "حقوق صاحب البيانات"),
+        ),
+    ),
+    RequiredClauseRule(
+        "PDPL_MISSING_TRANSFER_SAFEGUARDS",
+        "Personal data may be transferred or stored outside the Kingdom but "
+        "no safeguards are stated (adequate protection level, standard "
+        "contractual clauses or binding common rules – PDPL Art. 29).",
+        # "travel abroad" alone is not a transfer of personal data
+        trigger=_PERSONAL_DATA,
+        near=_ABROAD,
+        window=30,
+        required=_compile(
+            en("adequate level of protection", "adequate protection", "appropriate safeguards",
+               "standard contractual clauses", "binding common rules", "binding corporate rules",
+               "transfer impact assessment"),
+            ar("مستوى مناسب من الحماية", "ضمانات مناسبة", "البنود التعاقدية القياسية",
+               "القواعد المؤسسية الملزمة"),
+        ),
+        status=ISSUE,
+    ),
+)
+
+
+# ═════════════════════ public interface ══════════════════════
+def run_rules(text: str, rules: Sequence[Rule] = RULES) -> List[ComplianceIssue]:
+    """Every rule over the full *text*; one issue per rule that fires."""
+    doc = Text(text)
+    issues: List[ComplianceIssue] = []
+    for rule in rules:
+        issues.extend(rule.check(doc))
+    return issues
+
+
+def rule_catalogue(rules: Iterable[Rule] = RULES) -> List[dict]:
+    """Rule ids, kinds and descriptions – for documentation / the UI."""
+    return [
+        {
+            "rule_id": r.rule_id,
+            "kind": type(r).__name__,
+            "status": r.status,
+            "description": r.description,
+        }
+        for r in rules
+    ]
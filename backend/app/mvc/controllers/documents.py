@@ -7,41 +7,60 @@ Key features
    • DOCX                → python-docx
    • PDF                 → PyMuPDF → pdfminer.six → optional OCR fallback
    • Plain-text decode   → UTF-8 / Latin-1 best-effort
-2. Plain helpers for CRUD in the “documents” collection
-3. All functions keep the old names/signatures so nothing breaks
+   Uploads and GridFS downloads are read from a spooled file, memory-mapped
+   once it is on disk (`extract_upload_text`, `download_to_spool`), never
+   copied whole into a bytes object.
+   The layers run in the extract process pool (core/process_pool.py:
+   EXTRACT_WORKERS, EXTRACT_TIMEOUT, EXTRACT_MEMORY_MB), never on the
+   event loop; large files reach the workers by path, not pickled.
+2. Extracted-text cache (core/text_cache.py) keyed by the file's SHA-256:
+   every doc_id consumer goes through `extract_document_text`, so a file is
+   extracted – and a scanned PDF OCR'd – once, not on every use.  The
+   winning layer and its EXTRACTOR_VERSIONS entry are stored with the text;
+   bump a layer's version to re-extract only the files that layer produced.
+3. Plain helpers for CRUD in the “documents” collection; uploads are
+   de-duplicated by content hash (core/blob_store.py)
+4. All functions keep the old names/signatures so nothing breaks
 """
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import io
 import logging
+import mmap
+import os
+import tempfile
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager, contextmanager
 from io import BytesIO
-from typing import List
+from typing import Any, AsyncIterator, BinaryIO, Iterator, List, Optional, Tuple, Union
 
 from bson import ObjectId
 from fastapi import HTTPException
 from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
 
+from backend.app.core.blob_store import release_blob, store_blob
+from backend.app.core.lazy import lazy_attr, lazy_import, module_available
+from backend.app.core.process_pool import JobTimeout, extract_pool
+from backend.app.core.text_cache import ExtractedText, text_cache
+
 # ───────────── text-extraction deps ──────────────
-import fitz  # PyMuPDF
-from pdfminer.high_level import extract_text as miner_extract
-from pdfminer.layout import LAParams
-from pdf2image import convert_from_bytes
+# loaded on first use / by the startup warm-up (core/lazy.py)
+fitz = lazy_import("fitz")  # PyMuPDF
+miner_extract = lazy_attr("pdfminer.high_level", "extract_text")
+LAParams = lazy_attr("pdfminer.layout", "LAParams")
+convert_from_bytes = lazy_attr("pdf2image", "convert_from_bytes", warm=False)
+convert_from_path = lazy_attr("pdf2image", "convert_from_path", warm=False)
 
 # OCR (optional)
-try:
-    import pytesseract
-    from PIL import Image  # noqa: F401  – used by pytesseract
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
+OCR_AVAILABLE = module_available("pytesseract") and module_available("PIL")
+pytesseract = lazy_import("pytesseract", warm=False)
 
 # DOCX (optional)
-try:
-    from docx import Document as _DocxDocument
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
+DOCX_AVAILABLE = module_available("docx")
+_DocxDocument = lazy_attr("docx", "Document", warm=DOCX_AVAILABLE)
 
 logger = logging.getLogger(__name__)
 
@@ -49,11 +68,167 @@ logger = logging.getLogger(__name__)
 MIN_PRINTABLE_RATIO = 0.05     # < 5 % printable → likely garbage
 OCR_MAX_PAGES       = 50       # OCR is expensive but we allow up to 50 pages
 
+# bump a layer's version when its output changes; cached texts produced by
+# an older version of that layer are extracted again on next use
+EXTRACTOR_VERSIONS = {"docx": 1, "pymupdf": 1, "pdfminer": 1, "ocr": 1, "plain": 2}
+
+EXTRACTION_ERROR   = "Error: Unable to extract text from document."
+EXTRACTION_TIMEOUT = "Error: Text extraction took too long – the document may be too large or damaged."
+
+SPOOL_MEMORY_BYTES = 1024 * 1024   # as Starlette's UploadFile: larger files spool to disk
+
+# what the extraction layers read: bytes, or a read-only map of a spooled file
+Buffer = Union[bytes, mmap.mmap]
+
 
 # ═════════════════ TEXT EXTRACTION ══════════════════
 async def extract_full_text_from_stream(stream, filename: str) -> str:
     """
-    Extract **plain UTF-8** text from a GridFS / UploadFile stream.
+    Extract **plain UTF-8** text from a GridFS / UploadFile stream (cached
+    by content hash, see `extract_text_cached`).
+
+    Returns a string; on fatal failure the string starts with “Error:”.
+    """
+    raw = await stream.read()
+    return await extract_text_cached(raw, filename)
+
+
+async def extract_upload_text(upload, sha256: Optional[str] = None) -> str:
+    """
+    Text of an UploadFile (anything with ``.file`` / ``.filename``), read
+    from its spooled file – memory-mapped, not copied into a bytes object.
+    """
+    with _mapped(upload.file) as raw:
+        return await extract_text_cached(raw, upload.filename, sha256, fileobj=upload.file)
+
+
+async def extract_text_cached(
+    raw: Buffer,
+    filename: str,
+    sha256: Optional[str] = None,
+    *,
+    fileobj: Optional[BinaryIO] = None,
+) -> str:
+    """Text of *raw* from the extracted-text cache, extracting on a miss."""
+    sha256 = sha256 or hashlib.sha256(raw).hexdigest()
+    cached = await _cached_text(sha256)
+    if cached is not None:
+        return cached
+    try:
+        async with _extraction_source(raw, fileobj) as source:
+            txt, method = await extract_pool.run(extract_text_from_source, source, filename)
+    except JobTimeout as e:
+        logger.error("Text extraction of %s timed out: %s", filename, e)
+        return EXTRACTION_TIMEOUT
+    except BrokenProcessPool:
+        logger.error("Text extraction of %s crashed its worker process", filename)
+        return EXTRACTION_ERROR
+    if method is not None:              # failures are retried next time
+        await text_cache.put(
+            sha256, ExtractedText(txt, method, EXTRACTOR_VERSIONS[method]), filename=filename
+        )
+    return txt
+
+
+async def extract_document_text(db: AsyncIOMotorDatabase, file_id: str) -> str:
+    """
+    Text of the ``documents_fs`` file *file_id*.  On a cache hit the blob
+    is not even downloaded; files stored before hashing was added get
+    their SHA-256 recorded on first use.
+    """
+    if not ObjectId.is_valid(file_id):
+        raise HTTPException(status_code=400, detail="Invalid GridFS file ID")
+    info = await db["documents_fs.files"].find_one(
+        {"_id": ObjectId(file_id)}, {"metadata.sha256": 1}
+    )
+    sha256 = ((info or {}).get("metadata") or {}).get("sha256")
+    if sha256:
+        cached = await _cached_text(sha256)
+        if cached is not None:
+            return cached
+
+    spool, filename = await download_to_spool(db, file_id)
+    with spool, _mapped(spool) as raw:
+        if not sha256:
+            sha256 = hashlib.sha256(raw).hexdigest()
+            await db["documents_fs.files"].update_one(
+                {"_id": ObjectId(file_id)}, {"$set": {"metadata.sha256": sha256}}
+            )
+        return await extract_text_cached(raw, filename, sha256, fileobj=spool)
+
+
+@asynccontextmanager
+async def _extraction_source(raw: Buffer, fileobj: Optional[BinaryIO]) -> AsyncIterator[Union[bytes, str]]:
+    """
+    What the extract pool receives: bytes that are already in memory as
+    they are, a spooled file by path – written to a named temp file first
+    unless it already has one – so a large file is not pickled.
+    """
+    if isinstance(raw, bytes):
+        yield raw
+        return
+    name = getattr(fileobj, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        yield name
+        return
+    with tempfile.NamedTemporaryFile(prefix="extract-") as tmp:
+        await asyncio.to_thread(tmp.write, raw)
+        tmp.flush()
+        yield tmp.name
+
+
+async def _cached_text(sha256: str) -> Optional[str]:
+    entry = await text_cache.get(sha256)
+    if entry is not None and entry.version == EXTRACTOR_VERSIONS.get(entry.method):
+        return entry.text
+    return None
+
+
+@contextmanager
+def _mapped(fileobj: BinaryIO) -> Iterator[Buffer]:
+    """
+    Contents of a spooled file without a copy: a read-only memory map
+    once it lives on disk, the (small) in-memory buffer otherwise.
+    """
+    fileobj.seek(0)
+    fileno = None
+    if getattr(fileobj, "_rolled", True):       # SpooledTemporaryFile still in RAM
+        try:
+            fileobj.flush()
+            fileno = fileobj.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            pass
+    if fileno is None or os.fstat(fileno).st_size == 0:
+        yield fileobj.read()
+        return
+    with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mm:
+        yield mm
+
+
+def _reader(raw: Buffer, fileobj: Optional[BinaryIO]) -> BinaryIO:
+    """A file object over *raw* for the layers that want one."""
+    if fileobj is not None:
+        fileobj.seek(0)
+        return fileobj
+    return BytesIO(raw)
+
+
+def extract_text_from_source(source: Union[bytes, str], filename: str) -> Tuple[str, Optional[str]]:
+    """Extract pool entry point: *source* is the file's bytes or a path to it."""
+    if isinstance(source, bytes):
+        return extract_text_from_bytes(source, filename)
+    with open(source, "rb") as f, _mapped(f) as raw:
+        return extract_text_from_bytes(raw, filename, f)
+
+
+def extract_text_from_bytes(
+    raw: Buffer, filename: str, fileobj: Optional[BinaryIO] = None
+) -> Tuple[str, Optional[str]]:
+    """
+    Run the extraction layers over *raw*; returns ``(text, method)`` where
+    *method* names the layer that succeeded (None if all failed).
+    *fileobj*, if given, is the file *raw* maps – handed to the layers
+    that read a file object so they do not copy the buffer.
 
     Order of battle
     1) DOCX                       (python-docx)
@@ -62,37 +237,37 @@ async def extract_full_text_from_stream(stream, filename: str) -> str:
     4) PDF  – OCR fallback        (scanned docs, if pytesseract present)
     5) Plain-text best effort     (utf-8 → latin-1)
 
-    Returns a string; on fatal failure the string starts with “Error:”.
+    On fatal failure the text is EXTRACTION_ERROR.
     """
-    raw = await stream.read()
     ext = filename.rsplit(".", 1)[-1].lower()
 
     # 1️⃣  DOCX ----------------------------------------------------------------
     if ext in {"docx", "docm", "dotx", "dotm"} and DOCX_AVAILABLE:
         try:
-            doc = _DocxDocument(BytesIO(raw))
+            doc = _DocxDocument(_reader(raw, fileobj))
             txt = "\n".join(p.text for p in doc.paragraphs)
             if _has_enough_text(txt, accept_short=True):
-                return txt
+                return txt, "docx"
         except Exception as e:
             logger.debug("DOCX extraction failed on %s: %s", filename, e)
 
     # 2️⃣  PDF – PyMuPDF -------------------------------------------------------
     try:
-        with fitz.open(stream=raw, filetype="pdf") as doc:
-            # blank line between pages → helps GPT understand section breaks
-            txt = "\n\n".join(p.get_text("text") for p in doc)
+        with memoryview(raw) as view, fitz.open(stream=view, filetype="pdf") as doc:
+            # blank line between pages → helps GPT understand section breaks;
+            # the form feed marks the page for utils/text_index.py
+            txt = "\f\n\n".join(p.get_text("text") for p in doc)
         if _has_enough_text(txt):
-            return txt
+            return txt, "pymupdf"
     except Exception as e:
         logger.debug("PyMuPDF failed on %s: %s", filename, e)
 
     # 3️⃣  PDF – pdfminer.six ---------------------------------------------------
     try:
         laparams = LAParams(line_margin=0.2, char_margin=2.0, word_margin=0.1)
-        txt = miner_extract(io.BytesIO(raw), laparams=laparams)
+        txt = miner_extract(_reader(raw, fileobj), laparams=laparams)
         if _has_enough_text(txt):
-            return txt
+            return txt, "pdfminer"
     except Exception as e:
         logger.debug("pdfminer failed on %s: %s", filename, e)
 
@@ -101,12 +276,14 @@ async def extract_full_text_from_stream(stream, filename: str) -> str:
         try:
             # best effort: limit to actual page-count or hard cap
             try:
-                page_cnt = fitz.open(stream=raw, filetype="pdf").page_count
+                with memoryview(raw) as view, fitz.open(stream=view, filetype="pdf") as doc:
+                    page_cnt = doc.page_count
             except Exception:
                 page_cnt = OCR_MAX_PAGES
 
-            images = convert_from_bytes(
+            images = _rasterise(
                 raw,
+                fileobj,
                 dpi=300,
                 fmt="png",
                 first_page=1,
@@ -115,24 +292,41 @@ async def extract_full_text_from_stream(stream, filename: str) -> str:
             ocr_txt: List[str] = [
                 pytesseract.image_to_string(img, lang="eng") for img in images
             ]
-            txt = "\n".join(ocr_txt)
+            txt = "\f\n".join(ocr_txt)
             if _has_enough_text(txt, accept_short=True):
-                return txt
+                return txt, "ocr"
         except Exception as e:
             logger.debug("OCR fallback failed on %s: %s", filename, e)
 
     # 5️⃣  Plain-text (txt / csv / anything readable) --------------------------
+    # never for a PDF: its raw bytes are not text, and a "plain" result
+    # would be cached – a scan whose OCR failed must be retried instead
+    if ext == "pdf" or raw[:5] == b"%PDF-":
+        logger.error("All PDF extraction layers failed for %s", filename)
+        return EXTRACTION_ERROR, None
     for enc in ("utf-8", "latin-1"):
         try:
-            txt = raw.decode(enc, errors="ignore")
+            txt = str(raw, enc, errors="ignore")
             if _has_enough_text(txt, accept_short=True):
-                return txt
+                return txt, "plain"
         except Exception:
             pass
 
     # ───── all layers failed ────────────────────────────────────────────────
     logger.error("All extraction layers failed for %s", filename)
-    return "Error: Unable to extract text from document."
+    return EXTRACTION_ERROR, None
+
+
+def _rasterise(raw: Buffer, fileobj: Optional[BinaryIO], **options: Any) -> List[Any]:
+    """
+    PDF pages as images for OCR.  pdf2image works on a file: a mapped
+    upload is read from its own path instead of being copied into bytes
+    (which pdf2image would only write back to a temp file).
+    """
+    path = getattr(fileobj, "name", None)
+    if isinstance(path, str) and os.path.isfile(path):
+        return convert_from_path(path, **options)
+    return convert_from_bytes(raw if isinstance(raw, bytes) else bytes(raw), **options)
 
 
 def _has_enough_text(text: str, *, accept_short: bool = False) -> bool:
@@ -150,8 +344,9 @@ def _has_enough_text(text: str, *, accept_short: bool = False) -> bool:
 async def upload_file_to_gridfs(
     db: AsyncIOMotorDatabase, data: bytes, filename: str
 ):  # -> ObjectId
-    fs = AsyncIOMotorGridFSBucket(db, bucket_name="documents_fs")
-    return await fs.upload_from_stream(filename, data)
+    # identical content is stored once and reference-counted (core/blob_store.py);
+    # whoever keeps the returned id must `release_blob` it when done
+    return await store_blob(db, data, filename)
 
 
 async def store_document_record(
@@ -163,6 +358,19 @@ async def store_document_record(
     return str(result.inserted_id)
 
 
+async def release_document(db: AsyncIOMotorDatabase, doc_id: Optional[str]) -> None:
+    """
+    Delete a document record that belongs to another row (a report's
+    result file) and release its blob.  A record that is already gone is
+    skipped, so deleting the report never fails on it.
+    """
+    if not doc_id or not ObjectId.is_valid(doc_id):
+        return
+    rec = await db.documents.find_one_and_delete({"_id": ObjectId(doc_id)})
+    if rec:
+        await release_blob(db, rec["file_id"])
+
+
 async def list_user_documents(db: AsyncIOMotorDatabase, owner_id: str):
     cur = db.documents.find({"owner_id": owner_id})
     out = []
@@ -193,6 +401,28 @@ async def get_document_record(db: AsyncIOMotorDatabase, doc_id: str):
     return rec
 
 
+async def download_to_spool(db: AsyncIOMotorDatabase, file_id: str):
+    """
+    Copy a GridFS file chunk by chunk into memory (up to SPOOL_MEMORY_BYTES)
+    or a named temp file – returns (spool, filename).  The caller closes
+    the spool.
+    """
+    stream, filename = await open_gridfs_file(db, file_id)
+    if stream.length > SPOOL_MEMORY_BYTES:
+        # named, so the extract pool can open it without another copy
+        spool = tempfile.NamedTemporaryFile(prefix="gridfs-")
+    else:
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    try:
+        while chunk := await stream.readchunk():
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool, filename
+
+
 async def open_gridfs_file(db: AsyncIOMotorDatabase, file_id: str):
     if not ObjectId.is_valid(file_id):
         raise HTTPException(status_code=400, detail="Invalid GridFS file ID")
@@ -208,20 +438,20 @@ async def open_gridfs_file(db: AsyncIOMotorDatabase, file_id: str):
 
 async def delete_document(db: AsyncIOMotorDatabase, doc_id: str):
     """
-    Delete metadata + GridFS binary.  Idempotent: if the GridFS file is already
-    gone the metadata is still removed.
+    Delete metadata and release the GridFS binary (deleted once no other
+    record shares it).  Idempotent: if the GridFS file is already gone the
+    metadata is still removed.
     """
     if not ObjectId.is_valid(doc_id):
         raise HTTPException(status_code=400, detail="Invalid document ID")
 
     rec = await get_document_record(db, doc_id)  # validates and fetches
 
-    fs = AsyncIOMotorGridFSBucket(db, bucket_name="documents_fs")
     try:
-        await fs.delete(ObjectId(rec["file_id"]))
-        logger.info("Deleted GridFS file %s", rec["file_id"])
+        await release_blob(db, rec["file_id"])
+        logger.info("Released GridFS file %s", rec["file_id"])
     except Exception as e:
-        logger.error("GridFS delete failed for %s: %s", rec["file_id"], e, exc_info=True)
+        logger.error("GridFS release failed for %s: %s", rec["file_id"], e, exc_info=True)
 
     await db.documents.delete_one({"_id": ObjectId(doc_id)})
     logger.info("Deleted document record %s", doc_id)
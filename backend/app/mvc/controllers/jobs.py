@@ -0,0 +1,110 @@
+# backend/app/mvc/controllers/jobs.py
+"""
+Background-job handlers and submit helpers for the long-running tools.
+
+Each job kind wraps the existing controller entry point, so a job
+produces exactly the same report rows as the synchronous endpoint; the
+controller's return value becomes the job result.  Uploaded files are
+staged in GridFS (payload ``input_file_id``) and removed by the queue
+once the job has finished – see core/jobs.py.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException, UploadFile
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from backend.app.core.blob_store import ingest_upload, release_blob
+from backend.app.core.jobs import enqueue_job, job_handler
+from backend.app.mvc.controllers.analysis import analyze_risk
+from backend.app.mvc.controllers.compliance import run_compliance_check
+from backend.app.mvc.controllers.documents import (
+    download_to_spool,
+    extract_document_text,
+)
+from backend.app.mvc.controllers.translate import run_file_translation_tool
+
+logger = logging.getLogger(__name__)
+
+RISK_ANALYSIS = "risk_analysis"
+COMPLIANCE_CHECK = "compliance_check"
+FILE_TRANSLATION = "file_translation"
+
+
+async def _load_staged(db: AsyncIOMotorDatabase, payload: Dict[str, Any]) -> UploadFile:
+    """The staged input as an UploadFile over a spooled copy; caller closes it."""
+    spool, filename = await download_to_spool(db, payload["input_file_id"])
+    return UploadFile(spool, filename=payload.get("filename") or filename)
+
+
+# ═════════════════════════ submit ═════════════════════════
+async def submit_job(
+    db: AsyncIOMotorDatabase,
+    kind: str,
+    user_id: str,
+    payload: Optional[Dict[str, Any]] = None,
+    *,
+    upload: Optional[UploadFile] = None,
+) -> Dict[str, Any]:
+    """Stage *upload* (if any), queue the job and return its id + poll URLs."""
+    payload = dict(payload or {})
+    if upload is not None:
+        staged = await ingest_upload(db, upload)
+        if not staged.length:
+            await release_blob(db, staged.file_id)
+            raise HTTPException(400, "Uploaded file is empty.")
+        payload.update(input_file_id=str(staged.file_id), filename=upload.filename)
+    job_id = await enqueue_job(db, kind, user_id, payload)
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}",
+        "result_url": f"/jobs/{job_id}/result",
+    }
+
+
+# ═════════════════════════ handlers ═════════════════════════
+@job_handler(RISK_ANALYSIS)
+async def _run_risk_analysis(db: AsyncIOMotorDatabase, job: Dict[str, Any]) -> Dict[str, Any]:
+    payload = job["payload"]
+    text = payload.get("document_text")
+    if text is None:
+        text = await extract_document_text(db, payload["input_file_id"])
+        if text.startswith("Error:"):
+            raise HTTPException(422, text)
+    return await analyze_risk(text, job["user_id"], db, filename=payload.get("filename"))
+
+
+@job_handler(COMPLIANCE_CHECK)
+async def _run_compliance_check(db: AsyncIOMotorDatabase, job: Dict[str, Any]) -> Dict[str, Any]:
+    payload = job["payload"]
+    return await run_compliance_check(
+        db,
+        job["user_id"],
+        document_text=payload.get("document_text"),
+        doc_id=payload.get("doc_id"),
+    )
+
+
+@job_handler(FILE_TRANSLATION)
+async def _run_file_translation(db: AsyncIOMotorDatabase, job: Dict[str, Any]) -> Dict[str, Any]:
+    payload = job["payload"]
+    staged = await _load_staged(db, payload)
+    try:
+        _blob, filename, report_id = await run_file_translation_tool(
+            db, staged, payload["target_lang"], job["user_id"]
+        )
+    finally:
+        await staged.close()
+    row = await db.translation_reports.find_one(
+        {"_id": ObjectId(report_id)}, {"result_doc_id": 1}
+    )
+    return {
+        "report_id": report_id,
+        "translated_filename": filename,
+        "result_doc_id": (row or {}).get("result_doc_id"),
+    }
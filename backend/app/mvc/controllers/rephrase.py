@@ -7,28 +7,22 @@ import os
 from fastapi import HTTPException
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from io import BytesIO
-from typing import Optional, Dict, Any
+from typing import AsyncIterator, Optional, Dict, Any, Tuple
 from bson import ObjectId
 from datetime import datetime
 
 from backend.app.mvc.controllers.documents import (
+    extract_document_text,
     get_document_record,
-    open_gridfs_file,
     store_document_record,
     upload_file_to_gridfs,
 )
-from backend.app.core.openai_client import call_gpt
+from backend.app.core.lazy import lazy_attr, module_available
+from backend.app.core.llm_usage import tag_llm_caller
+from backend.app.core.openai_client import LLMUnavailableError, call_gpt, stream_gpt
 
-# Try optional imports
-try:
-    from docx import Document as DocxDocument
-except ImportError:
-    DocxDocument = None
-
-try:
-    from PyPDF2 import PdfReader
-except ImportError:
-    PdfReader = None
+# Optional imports – loaded on first use (core/lazy.py)
+DocxDocument = lazy_attr("docx", "Document") if module_available("docx") else None
 
 logger = logging.getLogger(__name__)
 
@@ -48,29 +42,6 @@ def compute_changes(original: str, revised: str) -> list[Dict[str, str]]:
     return changes
 
 
-async def extract_full_text_from_stream(stream, filename: str) -> str:
-    content = await stream.read()
-    ext = filename.rsplit(".", 1)[-1].lower()
-
-    # DOCX
-    if ext == "docx" and DocxDocument:
-        doc = DocxDocument(BytesIO(content))
-        return "\n".join(p.text for p in doc.paragraphs)
-
-    # PDF
-    if ext == "pdf" and PdfReader:
-        reader = PdfReader(BytesIO(content))
-        if reader.is_encrypted:
-            raise HTTPException(status_code=422, detail="Encrypted PDF")
-        return "".join(page.extract_text() or "" for page in reader.pages)
-
-    # fallback
-    try:
-        return content.decode("utf-8")
-    except:
-        return content.decode("latin-1", errors="ignore")
-
-
 def create_simple_docx_from_text(text: str) -> bytes:
     if not DocxDocument:
         raise HTTPException(status_code=500, detail="python-docx missing")
@@ -83,6 +54,117 @@ def create_simple_docx_from_text(text: str) -> bytes:
     return bio.read()
 
 
+def _doc_system_message(style: str) -> str:
+    return (
+        f"You are a legal rewriting AI. Rephrase the following "
+        f"to a {style} style, preserving meaning. Return only plain text."
+    )
+
+
+def _text_system_message(style: str, *, plain: bool = False) -> str:
+    """Drafting prompt for raw text; *plain* drops the JSON envelope (streaming)."""
+    output = (
+        "Return only the rewritten text as plain text (no markdown, no commentary)."
+        if plain else
+        "Return **valid JSON only** (no markdown, no commentary) in exactly this structure:\n"
+        '{"rephrased_text":"..."}'
+    )
+    return (
+        f"You are an advanced Saudi legal-drafting AI. Rewrite the given text in the requested "
+        f"{style} style—whether formal Arabic legal prose, plain-language English, or any other—"
+        f"without altering the substance, legal effect, citations, or cross-references. "
+        f"Do not add new terms or remove existing obligations. "
+        f"{output}"
+    )
+
+
+async def _call_rephrase(prompt: str, system_message: str) -> str:
+    try:
+        return await call_gpt(
+            prompt=prompt,
+            system_message=system_message,
+            model="o4-mini",
+            temperature=0.4,
+            max_tokens=16384
+        )
+    except LLMUnavailableError as e:
+        logger.error("Rephrase failed: %s", e)
+        raise HTTPException(status_code=503, detail="AI service is temporarily unavailable – please try again shortly.")
+
+
+async def _load_source_document(db: AsyncIOMotorDatabase, doc_id: str) -> Tuple[str, str]:
+    """Return (extracted_text, original_filename) for an uploaded document."""
+    rec = await get_document_record(db, doc_id)
+    original = await extract_document_text(db, rec["file_id"])
+    return original, rec["filename"]
+
+
+async def _store_doc_result(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    report_record: Dict[str, Any],
+    doc_id: str,
+    orig_fn: str,
+    original: str,
+    revised: str,
+) -> Dict[str, Any]:
+    """Build the rephrased .docx, store it and the report row."""
+    # build and store new .docx
+    new_bytes = create_simple_docx_from_text(revised)
+    base, _ = os.path.splitext(orig_fn)
+    new_fn = f"{base}_rephrased.docx"
+
+    file_id    = await upload_file_to_gridfs(db, new_bytes, new_fn)
+    new_doc_id = await store_document_record(db, user_id, new_fn, file_id)
+
+    changes = compute_changes(original, revised)
+
+    report_record.update({
+        "original_content_info":        orig_fn,
+        "rephrased_output_summary":     new_fn,
+        "original_doc_id":              doc_id,
+        "rephrased_doc_id":             new_doc_id,
+        "changes":                      changes,
+    })
+
+    res = await db.rephrase_reports.insert_one(report_record)
+    rid = str(res.inserted_id)
+
+    return {
+        "report_id":           rid,
+        "rephrased_doc_id":    new_doc_id,
+        "rephrased_doc_filename": new_fn,
+        "changes":             changes,
+    }
+
+
+async def _store_text_result(
+    db: AsyncIOMotorDatabase,
+    report_record: Dict[str, Any],
+    original: str,
+    revised: str,
+) -> Dict[str, Any]:
+    """Store the report row for a raw-text rephrase."""
+    changes = compute_changes(original, revised)
+
+    report_record.update({
+        "original_content_info":    original,
+        "rephrased_output_summary": revised,
+        "original_doc_id":          None,
+        "rephrased_doc_id":         None,
+        "changes":                  changes,
+    })
+
+    res = await db.rephrase_reports.insert_one(report_record)
+    rid = str(res.inserted_id)
+
+    return {
+        "report_id":   rid,
+        "rephrased_text": revised,
+        "changes":     changes,
+    }
+
+
 async def run_rephrase_tool(
     db: AsyncIOMotorDatabase,
     user_id: str,
@@ -91,6 +173,7 @@ async def run_rephrase_tool(
     doc_id: Optional[str] = None,
 ) -> Dict[str, Any]:
 
+    tag_llm_caller("rephrase", user_id)
     if (document_text is None) == (doc_id is None):
         raise HTTPException(status_code=400, detail="Provide either text or doc_id")
 
@@ -103,68 +186,23 @@ async def run_rephrase_tool(
 
     # ── Document Mode ────────────────────────────────────────────────
     if doc_id:
-        rec = await get_document_record(db, doc_id)
-        grid_out, orig_fn = await open_gridfs_file(db, rec["file_id"])
-        original = await extract_full_text_from_stream(grid_out, orig_fn)
+        original, orig_fn = await _load_source_document(db, doc_id)
 
         # AI call
-        system_msg = (
-            f"You are a legal rewriting AI. Rephrase the following "
-            f"to a {style} style, preserving meaning. Return only plain text."
-        )
-        revised = (await call_gpt(
+        revised = (await _call_rephrase(
             prompt=original,
-            system_message=system_msg,
-            model="o4-mini",
-            temperature=0.4,
-            max_tokens=16384
+            system_message=_doc_system_message(style),
         ) or original).strip()
 
-        # build and store new .docx
-        new_bytes = create_simple_docx_from_text(revised)
-        base, _ = os.path.splitext(orig_fn)
-        new_fn = f"{base}_rephrased.docx"
-
-        file_id    = await upload_file_to_gridfs(db, new_bytes, new_fn)
-        new_doc_id = await store_document_record(db, user_id, new_fn, file_id)
-
-        changes = compute_changes(original, revised)
-
-        report_record.update({
-            "original_content_info":        orig_fn,
-            "rephrased_output_summary":     new_fn,
-            "original_doc_id":              doc_id,
-            "rephrased_doc_id":             new_doc_id,
-            "changes":                      changes,
-        })
-
-        res = await db.rephrase_reports.insert_one(report_record)
-        rid = str(res.inserted_id)
-
-        return {
-            "report_id":           rid,
-            "rephrased_doc_id":    new_doc_id,
-            "rephrased_doc_filename": new_fn,
-            "changes":             changes,
-        }
+        return await _store_doc_result(
+            db, user_id, report_record, doc_id, orig_fn, original, revised
+        )
 
     # ── Text Mode ───────────────────────────────────────────────────
     original = document_text or ""
-    system_msg = (
-    f"You are an advanced Saudi legal-drafting AI. Rewrite the given text in the requested "
-    f"{style} style—whether formal Arabic legal prose, plain-language English, or any other—"
-    f"without altering the substance, legal effect, citations, or cross-references. "
-    f"Do not add new terms or remove existing obligations. "
-    f"Return **valid JSON only** (no markdown, no commentary) in exactly this structure:\n"
-    f'{{"rephrased_text":"..."}}'
-)
-
-    ai = await call_gpt(
-    prompt=original,
-    system_message=system_msg,
-    model="o4-mini",
-    temperature=0.4,
-    max_tokens=16384
+    ai = await _call_rephrase(
+        prompt=original,
+        system_message=_text_system_message(style),
     )
     try:
         parsed = json.loads(ai)
@@ -172,21 +210,57 @@ async def run_rephrase_tool(
     except:
         revised = ai.strip() or original
 
-    changes = compute_changes(original, revised)
+    return await _store_text_result(db, report_record, original, revised)
 
-    report_record.update({
-        "original_content_info":    original,
-        "rephrased_output_summary": revised,
-        "original_doc_id":          None,
-        "rephrased_doc_id":         None,
-        "changes":                  changes,
-    })
 
-    res = await db.rephrase_reports.insert_one(report_record)
-    rid = str(res.inserted_id)
+async def stream_rephrase(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    style: str,
+    document_text: Optional[str] = None,
+    doc_id: Optional[str] = None,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Streaming variant of `run_rephrase_tool` for SSE.
+
+    Both modes ask GPT for plain text (JSON cannot be shown while it is
+    still incomplete), forward each delta as ``("delta", {"text": …})``
+    and finish with ``("done", <same payload as run_rephrase_tool>)``.
+    """
+    tag_llm_caller("rephrase", user_id)
+    if (document_text is None) == (doc_id is None):
+        raise HTTPException(status_code=400, detail="Provide either text or doc_id")
 
-    return {
-        "report_id":   rid,
-        "rephrased_text": revised,
-        "changes":     changes,
+    report_record: Dict[str, Any] = {
+        "user_id": user_id,
+        "style":   style,
+        "created_at": datetime.utcnow(),
     }
+
+    if doc_id:
+        original, orig_fn = await _load_source_document(db, doc_id)
+        system_msg = _doc_system_message(style)
+    else:
+        original, orig_fn = document_text or "", None
+        system_msg = _text_system_message(style, plain=True)
+
+    parts: list[str] = []
+    async for delta in stream_gpt(
+        prompt=original,
+        system_message=system_msg,
+        model="o4-mini",
+        temperature=0.4,
+        max_tokens=16384,
+    ):
+        parts.append(delta)
+        yield "delta", {"text": delta}
+
+    revised = "".join(parts).strip() or original
+
+    if doc_id:
+        result = await _store_doc_result(
+            db, user_id, report_record, doc_id, orig_fn, original, revised
+        )
+    else:
+        result = await _store_text_result(db, report_record, original, revised)
+    yield "done", result
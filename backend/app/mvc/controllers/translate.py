@@ -13,20 +13,19 @@ from __future__ import annotations
 
 import logging, re, datetime as _dt
 from io import BytesIO
-from typing import Dict, Any, Optional, Tuple
+from typing import AsyncIterator, Dict, Any, Optional, Tuple
 
 from bson import ObjectId
 from fastapi import HTTPException, UploadFile
 from fastapi.concurrency import run_in_threadpool
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from dotenv import load_dotenv
-from docx import Document
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-from docx.shared import Pt, Inches
 
-from backend.app.core.openai_client import call_gpt
-from backend.app.mvc.controllers.rephrase import extract_full_text_from_stream
+from backend.app.core.lazy import lazy_attr
+from backend.app.core.llm_usage import tag_llm_caller
+from backend.app.core.openai_client import LLMUnavailableError, call_gpt, stream_gpt
 from backend.app.mvc.controllers.documents import (
+    extract_upload_text,
     upload_file_to_gridfs,
     store_document_record,
 )
@@ -34,6 +33,12 @@ from backend.app.mvc.controllers.documents import (
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# python-docx, loaded on first use (core/lazy.py)
+Document = lazy_attr("docx", "Document")
+WD_PARAGRAPH_ALIGNMENT = lazy_attr("docx.enum.text", "WD_PARAGRAPH_ALIGNMENT")
+Pt = lazy_attr("docx.shared", "Pt")
+Inches = lazy_attr("docx.shared", "Inches")
+
 # ───────────────────────── INTERNAL ─────────────────────────
 async def _upload_docx(
     db: AsyncIOMotorDatabase,
@@ -54,6 +59,7 @@ async def _insert_base_row(
     target_lang: str,
     *,
     original_doc_id: Optional[str] = None,
+    **extra: Any,
 ) -> str:
     row = {
         "user_id": user_id,
@@ -64,11 +70,27 @@ async def _insert_base_row(
         else original_text,
         "original_doc_id": original_doc_id,
         "timestamp": _dt.datetime.utcnow(),
+        **extra,
     }
     res = await db.translation_reports.insert_one(row)
     return str(res.inserted_id)
 
 
+def _translation_messages(text: str, target_lang: str) -> Tuple[str, str]:
+    """Return (system_message, user_message) for a translation request."""
+    sys_msg = (
+        f"You are a certified legal translator with expertise in Saudi Arabian terminology and drafting conventions. "
+        f"Translate the provided text faithfully into {target_lang.upper()}, preserving all legal nuances, defined terms, headings, clause numbers, citations, and cross-references. "
+        f"Do not omit, add, or summarize any content. Output *only* the translated text—no commentary, no markup."
+    )
+
+    user_msg = (
+        f"Translate this legal document into {target_lang.upper()}:\n\n"
+        f"{text}"
+    )
+    return sys_msg, user_msg
+
+
 # ─────────────────────────  PUBLIC  ──────────────────────────
 async def run_translation_tool(
     db: AsyncIOMotorDatabase,
@@ -80,6 +102,7 @@ async def run_translation_tool(
     Translate raw *document_text* into *target_lang* and store the row
     (type='text').
     """
+    tag_llm_caller("translate", user_id)
     if not document_text:
         raise HTTPException(400, "Document text is required.")
     if not target_lang:
@@ -96,16 +119,7 @@ async def run_translation_tool(
         db, user_id, document_text, target_lang, original_doc_id=None
     )
 
-    sys_msg = (
-    f"You are a certified legal translator with expertise in Saudi Arabian terminology and drafting conventions. "
-    f"Translate the provided text faithfully into {target_lang.upper()}, preserving all legal nuances, defined terms, headings, clause numbers, citations, and cross-references. "
-    f"Do not omit, add, or summarize any content. Output *only* the translated text—no commentary, no markup."
-)
-
-    user_msg = (
-        f"Translate this legal document into {target_lang.upper()}:\n\n"
-        f"{document_text}"
-    )
+    sys_msg, user_msg = _translation_messages(document_text, target_lang)
 
     try:
         translated_text = await call_gpt(
@@ -122,6 +136,9 @@ async def run_translation_tool(
             {"$set": {"translated_text": translated_text}},
         )
 
+    except LLMUnavailableError as e:
+        logger.error("Translation failed: %s", e)
+        raise HTTPException(503, "AI service is temporarily unavailable – please try again shortly.")
     except Exception as e:
         logger.error("Translation failed: %s", e, exc_info=True)
         raise HTTPException(500, "Translation failed due to an internal error")
@@ -129,6 +146,49 @@ async def run_translation_tool(
     return {"report_id": report_id, "translated_text": translated_text}
 
 
+async def stream_translation(
+    db: AsyncIOMotorDatabase,
+    document_text: str,
+    target_lang: str,
+    user_id: str,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Streaming variant of `run_translation_tool` for SSE.
+
+    Yields ``("delta", {"text": …})`` while GPT is generating and a final
+    ``("done", {"report_id": …})`` once the full translation is stored.
+    The report row is only written then, so a failed or abandoned stream
+    leaves nothing in the history.
+    """
+    tag_llm_caller("translate", user_id)
+    if not document_text:
+        raise HTTPException(400, "Document text is required.")
+    if not target_lang:
+        raise HTTPException(400, "target_lang is required.")
+
+    sys_msg, user_msg = _translation_messages(document_text, target_lang)
+
+    parts: list[str] = []
+    async for delta in stream_gpt(
+        prompt=user_msg,
+        system_message=sys_msg,
+        model="o4-mini",
+        max_tokens=16384,
+    ):
+        parts.append(delta)
+        yield "delta", {"text": delta}
+
+    translated_text = "".join(parts).strip()
+    if not translated_text:
+        raise HTTPException(500, "Translation failed due to an internal error")
+
+    report_id = await _insert_base_row(
+        db, user_id, document_text, target_lang,
+        original_doc_id=None, translated_text=translated_text,
+    )
+    yield "done", {"report_id": report_id}
+
+
 async def run_file_translation_tool(
     db: AsyncIOMotorDatabase,
     file: UploadFile,
@@ -139,18 +199,8 @@ async def run_file_translation_tool(
     Translate an uploaded file; returns (blob_bytes, translated_filename,
     report_id) so the route can stream the DOCX and the front-end can display.
     """
-    raw = await file.read()
-
-    class _AsyncBuf:
-        def __init__(self, b: bytes):
-            self._b = b
-
-        async def read(self):
-            return self._b
-
-    extracted_text = await extract_full_text_from_stream(
-        _AsyncBuf(raw), file.filename
-    )
+    tag_llm_caller("translate", user_id)
+    extracted_text = await extract_upload_text(file)
     if extracted_text.startswith("Error:"):
         raise HTTPException(422, extracted_text)
 
@@ -162,16 +212,7 @@ async def run_file_translation_tool(
         original_doc_id=None,  # could also save original upload
     )
 
-    sys_msg = (
-    f"You are a certified legal translator with expertise in Saudi Arabian terminology and drafting conventions. "
-    f"Translate the provided text faithfully into {target_lang.upper()}, preserving all legal nuances, defined terms, headings, clause numbers, citations, and cross-references. "
-    f"Do not omit, add, or summarize any content. Output *only* the translated text—no commentary, no markup."
-    )
-
-    user_msg = (
-        f"Translate this legal document into {target_lang.upper()}:\n\n"
-        f"{extracted_text}"
-    )
+    sys_msg, user_msg = _translation_messages(extracted_text, target_lang)
 
     try:
         translated_text = await call_gpt(
@@ -182,6 +223,9 @@ async def run_file_translation_tool(
         ) or ""
         if not translated_text:
             raise Exception("Translation response was empty")
+    except LLMUnavailableError as e:
+        logger.error("File translation failed: %s", e)
+        raise HTTPException(503, "AI service is temporarily unavailable – please try again shortly.")
     except Exception as e:
         logger.error("File translation failed: %s", e, exc_info=True)
         raise HTTPException(500, "Internal translation error")
@@ -13,6 +13,11 @@ class ComplianceIssue(BaseModel):
     status: str = Field(..., description="Status of the issue (e.g., 'Issue Found', 'OK', 'Warning').")
     # Add the new field for the extracted text snippet
     extracted_text_snippet: Optional[str] = Field(None, description="Relevant text snippet from the document.")
+    source_chunks: List[int] = Field(default_factory=list, description="1-based chunks that reported this issue.")
+    source: Optional[str] = Field(None, description="'rules' for the local rule pack, 'gpt' for model findings.")
+    char_start: Optional[int] = Field(None, description="Offset of the snippet in the document text.")
+    char_end: Optional[int] = Field(None, description="End offset (exclusive) of the snippet.")
+    page: Optional[int] = Field(None, description="1-based page the snippet starts on.")
     # You could add 'location: Optional[str]' if your analysis provides specific locations (e.g., page number, paragraph).
 
 
@@ -29,5 +34,6 @@ class ComplianceReport(BaseModel):
     document_text_preview: Optional[str] = Field(None, description="A preview of the analyzed text.")
     original_doc_id: Optional[str] = Field(None, description="The ID of the original document if applicable.")
     issues: List[ComplianceIssue] = Field(..., description="List of compliance issues found.")
+    rules_version: Optional[str] = Field(None, description="Version of the local rule pack that ran.")
     timestamp: datetime.datetime = Field(..., description="Timestamp when the report was generated (UTC).")
     # Add any other metadata you want to store with the report
\ No newline at end of file
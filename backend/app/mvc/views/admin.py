@@ -7,6 +7,15 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from fastapi import Body 
 from pydantic import BaseModel
 from backend.app.mvc.controllers.documents import delete_document
+from backend.app.core.blob_store import blob_stats
+from backend.app.core.chunk_store import chunk_store
+from backend.app.core.llm_cache import llm_cache
+from backend.app.core.llm_resilience import breaker_stats
+from backend.app.core.llm_scheduler import scheduler
+from backend.app.core.llm_usage import usage_recorder, usage_rollup
+from backend.app.core.openai_client import singleflight_stats
+from backend.app.core.process_pool import extract_pool
+from backend.app.core.text_cache import text_cache
 import logging
 
 class RoleUpdate(BaseModel):
@@ -100,6 +109,51 @@ async def user_metrics(
     ]:
         counts[coll] = await db[coll].count_documents({})
     return counts
+
+@router.get("/metrics/llm")
+async def llm_metrics(
+    admin: UserInDB = Depends(require_admin),
+):
+    """Response-cache counters, per-model scheduler load and circuit state."""
+    return {
+        "cache": llm_cache.stats(),
+        "chunk_store": chunk_store.stats(),
+        "singleflight": singleflight_stats(),
+        "scheduler": scheduler.stats(),
+        "circuits": breaker_stats(),
+        "usage_records_dropped": usage_recorder.dropped,
+    }
+
+
+@router.get("/metrics/documents")
+async def document_metrics(
+    request: Request,
+    admin: UserInDB = Depends(require_admin),
+):
+    """Text-extraction pool load, extracted-text cache and upload de-duplication."""
+    db: AsyncIOMotorDatabase = request.app.state.db
+    return {
+        "extract_pool": extract_pool.stats(),
+        "text_cache": text_cache.stats(),
+        "blobs": await blob_stats(db),
+    }
+
+
+@router.get("/metrics/llm/usage")
+async def llm_usage_metrics(
+    request: Request,
+    days: int = 30,
+    admin: UserInDB = Depends(require_admin),
+):
+    """Token, cost and latency totals per user and per feature."""
+    db: AsyncIOMotorDatabase = request.app.state.db
+    return {
+        "days": days,
+        "by_user": await usage_rollup(db, "user_id", days=days),
+        "by_feature": await usage_rollup(db, "feature", days=days),
+        "by_model": await usage_rollup(db, "model", days=days),
+    }
+
 @router.put("/users/{email}/role")
 async def change_role(
     email: str,
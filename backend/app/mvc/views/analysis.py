@@ -9,13 +9,19 @@ from fastapi.responses import StreamingResponse
 
 from pydantic import BaseModel
 
+from backend.app.core.blob_store import ingest_upload, release_blob
 from backend.app.mvc.controllers.documents import (
-    extract_full_text_from_stream,
-    upload_file_to_gridfs,
+    extract_upload_text,
     open_gridfs_file,           # <-- add this import
 )
-from backend.app.mvc.controllers.analysis import analyze_risk, get_risk_report
+from backend.app.mvc.controllers.analysis import (
+    analyze_risk,
+    get_risk_report,
+    stream_risk_analysis,
+)
+from backend.app.mvc.controllers.jobs import RISK_ANALYSIS, submit_job
 from backend.app.utils.security import get_current_user
+from backend.app.utils.sse import sse_response
 from backend.app.mvc.models.user import UserInDB
 
 router = APIRouter(tags=["Analysis"])
@@ -45,6 +51,20 @@ async def analyze_risk_endpoint(
         logging.error(f"Internal server error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
+# ---------------------------------------------------------------------  analyze (text, SSE)
+@router.post("/stream", tags=["Analysis"])
+async def analyze_risk_stream_endpoint(
+    request_data: RiskAnalysisRequest,
+    *,
+    request: Request,
+    current_user: UserInDB = Depends(get_current_user),
+):
+    """Server-Sent Events: start → chunk … → done (see stream_risk_analysis)."""
+    db = request.app.state.db
+    return sse_response(
+        stream_risk_analysis(request_data.document_text, current_user.email, db)
+    )
+
 # ---------------------------------------------------------------------  analyze (file)
 @router.post("/analyze-file", tags=["Analysis"])
 async def analyze_document_file(
@@ -55,22 +75,40 @@ async def analyze_document_file(
     db = request.app.state.db
     user_id = current_user.email
 
-    raw = await file.read()
-
-    class AsyncBytes:
-        def __init__(self, b: bytes):
-            self._b = b
-        async def read(self) -> bytes:
-            return self._b
-
-    async_stream = AsyncBytes(raw)
-    text = await extract_full_text_from_stream(async_stream, file.filename)
+    text = await extract_upload_text(file)
     if text.startswith("Error:"):
         raise HTTPException(status_code=422, detail=text)
 
     result = await analyze_risk(text, user_id, db, filename=file.filename)
     return {"analysis_result": result}
 
+# ---------------------------------------------------------------------  analyze (file, SSE)
+@router.post("/analyze-file/stream", tags=["Analysis"])
+async def analyze_document_file_stream(
+    file: UploadFile = File(...),
+    request: Request = None,
+    current_user: UserInDB = Depends(get_current_user),
+):
+    """Like /analyze-file, reporting per-chunk progress as Server-Sent Events."""
+    db = request.app.state.db
+    text = await extract_upload_text(file)
+    if text.startswith("Error:"):
+        raise HTTPException(status_code=422, detail=text)
+    return sse_response(
+        stream_risk_analysis(text, current_user.email, db, filename=file.filename)
+    )
+
+# ---------------------------------------------------------------------  analyze (file, background job)
+@router.post("/analyze-file/jobs", status_code=202, tags=["Analysis"])
+async def submit_document_file_analysis(
+    file: UploadFile = File(...),
+    request: Request = None,
+    current_user: UserInDB = Depends(get_current_user),
+):
+    """Queue the analysis and return a job id – poll /jobs/{job_id}."""
+    db = request.app.state.db
+    return await submit_job(db, RISK_ANALYSIS, current_user.email, upload=file)
+
 # ---------------------------------------------------------------------  history
 @router.get("/history", tags=["Analysis"])
 async def list_user_risk_reports(
@@ -149,12 +187,16 @@ async def delete_risk_report(
     user_id = current_user.email
 
     try:
-        result = await db.risk_assessments.delete_one(
+        row = await db.risk_assessments.find_one_and_delete(
             {"_id": ObjectId(report_id), "user_id": user_id}
         )
-        if result.deleted_count == 0:
+        if row is None:
             raise HTTPException(status_code=404, detail="Not found or not authorized")
+        if row.get("report_doc_id"):
+            await release_blob(db, row["report_doc_id"])
         return {"message": "Deleted"}
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error deleting risk report: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -178,14 +220,15 @@ async def upload_risk_pdf(
         raise HTTPException(status_code=404, detail="Report not found or not authorized")
 
     # Save file to GridFS
-    file_bytes = await file.read()
-    gridfs_id = await upload_file_to_gridfs(db, file_bytes, file.filename)
+    gridfs_id = (await ingest_upload(db, file)).file_id
 
-    # Update risk_assessments record
+    # Update risk_assessments record; a replaced PDF gives up its reference
     await db.risk_assessments.update_one(
         {"_id": ObjectId(report_id)},
         {"$set": {"report_doc_id": str(gridfs_id), "report_filename": file.filename}},
     )
+    if report.get("report_doc_id"):
+        await release_blob(db, report["report_doc_id"])
 
     return {"report_doc_id": str(gridfs_id), "filename": file.filename}
 
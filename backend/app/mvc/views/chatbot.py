@@ -6,11 +6,13 @@ from pydantic import BaseModel
 
 from backend.app.mvc.controllers.chatbot import (
     chat as chat_logic,
+    chat_stream,
     list_sessions,
     get_messages,
     delete_session,          #  ← import
 )
 from backend.app.utils.security import get_current_user
+from backend.app.utils.sse import sse_response
 from backend.app.mvc.models.user import UserInDB
 
 router = APIRouter(tags=["Chatbot"])
@@ -33,6 +35,7 @@ async def chat_endpoint(
         return await chat_logic(
             db,
             user_id=str(current_user.id),  # **now uses _id, not email – unique & immutable**
+            user_email=current_user.email,  # usage is rolled up by email, like every other feature
             query=body.query,
             session_id=body.session_id,
         )
@@ -43,6 +46,30 @@ async def chat_endpoint(
         raise HTTPException(status_code=500, detail="Internal chatbot error")
 
 
+@router.post("/stream")
+async def chat_stream_endpoint(
+    body: ChatReq,
+    request: Request,
+    current_user: UserInDB = Depends(get_current_user),
+):
+    db = request.app.state.db
+
+    async def events():
+        try:
+            async for ev in chat_stream(
+                db,
+                user_id=str(current_user.id),
+                user_email=current_user.email,
+                query=body.query,
+                session_id=body.session_id,
+            ):
+                yield ev
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+
+    return sse_response(events())
+
+
 @router.get("/history")
 async def history_endpoint(
     request: Request, current_user: UserInDB = Depends(get_current_user)
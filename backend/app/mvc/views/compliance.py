@@ -4,7 +4,6 @@ from __future__ import annotations
 
 import datetime as _dt
 import logging
-from io import BytesIO
 from typing import Optional
 from urllib.parse import quote
 
@@ -15,11 +14,17 @@ from pydantic import BaseModel, Field
 
 from backend.app.mvc.controllers.compliance import (
     run_compliance_check,
+    stream_compliance_check,
     get_compliance_report,
-    generate_compliance_report_docx,
-    generate_compliance_report_pdf,
+    REPORT_FORMATS,
+    delete_report_artifacts,
+    get_report_artifact,
+    open_report_artifact,
 )
+from backend.app.mvc.controllers.compliance_rules import RULES_VERSION, rule_catalogue
+from backend.app.mvc.controllers.jobs import COMPLIANCE_CHECK, submit_job
 from backend.app.utils.security import get_current_user
+from backend.app.utils.sse import sse_response
 from backend.app.mvc.models.user import UserInDB
 from backend.app.mvc.models.compliance import ComplianceReportResponse
 
@@ -60,6 +65,53 @@ async def check_compliance(
         raise HTTPException(500, str(e))
 
 
+# ───────────────────  /check/stream  (POST)  ──────────────────
+@router.post("/check/stream")
+async def check_compliance_stream(
+    body: ComplianceRequest,
+    request: Request,
+    current_user: UserInDB = Depends(get_current_user),
+):
+    """Server-Sent Events: start → chunk … → done (see stream_compliance_check)."""
+    db = request.app.state.db
+    return sse_response(
+        stream_compliance_check(
+            db,
+            current_user.email,
+            document_text=body.document_text,
+            doc_id=body.doc_id,
+        )
+    )
+
+
+# ────────────────────  /check/jobs  (POST)  ───────────────────
+@router.post("/check/jobs", status_code=202)
+async def submit_compliance_check(
+    body: ComplianceRequest,
+    request: Request,
+    current_user: UserInDB = Depends(get_current_user),
+):
+    """Queue the check and return a job id – poll /jobs/{job_id}."""
+    if (body.document_text is None) == (body.doc_id is None):
+        raise HTTPException(400, "Provide exactly one of document_text or doc_id.")
+    db = request.app.state.db
+    return await submit_job(
+        db,
+        COMPLIANCE_CHECK,
+        current_user.email,
+        {"document_text": body.document_text, "doc_id": body.doc_id},
+    )
+
+
+# ───────────────────────────  RULES  ──────────────────────────
+@router.get("/rules")
+async def list_compliance_rules(
+    current_user: UserInDB = Depends(get_current_user),
+):
+    """The local PDPL rule pack that runs before GPT on every check."""
+    return {"version": RULES_VERSION, "rules": rule_catalogue()}
+
+
 # ──────────────────────────  HISTORY  ─────────────────────────
 @router.get("/history")
 async def list_my_compliance_reports(
@@ -78,6 +130,8 @@ async def list_my_compliance_reports(
                 "num_issues": len(row.get("issues", [])),
                 "report_filename": row.get("report_filename"),
                 "report_doc_id": row.get("report_doc_id"),
+                # reports from before deferred rendering had their PDF already
+                "pdf_state": row.get("pdf_state", "ready"),
             }
         )
     return {"history": items}
@@ -104,51 +158,57 @@ async def delete_compliance_report(
 ):
     db = request.app.state.db
     # verify existence and ownership
-    await get_compliance_report(db, report_id, current_user.email)
+    rpt = await get_compliance_report(db, report_id, current_user.email)
+    await delete_report_artifacts(db, rpt)
     # delete by ObjectId so MongoDB will match correctly
     await db.compliance_reports.delete_one({"_id": ObjectId(report_id)})
     return {"ok": True}
 
 
-# ──────────────────────  DOCX download  ───────────────────────
+# ─────────────────────  DOCX / PDF downloads  ─────────────────────
+async def _artifact_response(request: Request, report_id: str, email: str, fmt: str):
+    """
+    Serve the stored rendering of a report (rendered off the event loop
+    on first download, see controllers/compliance.py) with an ETag, so a
+    repeat download can be answered with 304 Not Modified.
+    """
+    db = request.app.state.db
+    rpt = await get_compliance_report(db, report_id, email)
+    artifact = await get_report_artifact(db, rpt, fmt)
+    etag = f'"{artifact["etag"]}"'
+    hdrs = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (t.strip() for t in if_none_match.split(",")) or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=hdrs)
+
+    grid_out = await open_report_artifact(db, rpt, artifact, fmt)
+
+    async def _iter():
+        while chunk := await grid_out.readchunk():
+            yield chunk
+
+    media_type = REPORT_FORMATS[fmt][1]
+    hdrs.update({
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(artifact['filename'])}",
+        "Content-Length": str(grid_out.length),
+        "ETag": f'"{artifact["etag"]}"',          # re-rendered if the blob was gone
+    })
+    return StreamingResponse(_iter(), headers=hdrs, media_type=media_type)
+
+
 @router.get("/report/download/{report_id}", response_class=Response)
 async def download_docx(
     report_id: str,
     request: Request,
     current_user: UserInDB = Depends(get_current_user),
 ):
-    db = request.app.state.db
-    rpt = await get_compliance_report(db, report_id, current_user.email)
-    buf = generate_compliance_report_docx(rpt)
-    fn = f"compliance_report_{report_id}.docx"
-    hdrs = {
-        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(fn)}",
-        "Content-Type": (
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        ),
-    }
+    return await _artifact_response(request, report_id, current_user.email, "docx")
 
-    async def _iter():
-        buf.seek(0)
-        yield buf.getvalue()
 
-    return StreamingResponse(_iter(), headers=hdrs, media_type=hdrs["Content-Type"])
-
-
-# ───────────────────────  PDF download  ───────────────────────
 @router.get("/report/pdf/{report_id}", response_class=StreamingResponse)
 async def download_pdf(
     report_id: str,
     request: Request,
     current_user: UserInDB = Depends(get_current_user),
 ):
-    db = request.app.state.db
-    rpt = await get_compliance_report(db, report_id, current_user.email)
-    buf = generate_compliance_report_pdf(rpt)
-    fn = f"compliance_report_{report_id}.pdf"
-    hdrs = {
-        "Content-Disposition": f"attachment; filename=\"{fn}\"",
-        "Content-Type": "application/pdf",
-    }
-    buf.seek(0)
-    return StreamingResponse(buf, headers=hdrs, media_type="application/pdf")
+    return await _artifact_response(request, report_id, current_user.email, "pdf")
@@ -2,10 +2,8 @@
 import logging # Import the logging module
 import mimetypes
 from urllib.parse import quote
-from io import BytesIO # Import BytesIO for reading stream content
 import os
 from bson import ObjectId
-from motor.motor_asyncio import AsyncIOMotorGridFSBucket
 
 from fastapi import (
     APIRouter,
@@ -19,13 +17,14 @@ from fastapi import (
 from fastapi.responses import StreamingResponse
 
 from backend.app.mvc.controllers.documents import (
-    upload_file_to_gridfs,
     store_document_record,
     list_user_documents,
     list_all_documents,
     get_document_record,
     open_gridfs_file,
+    extract_document_text,
 )
+from backend.app.core.blob_store import ingest_upload, release_blob
 from backend.app.utils.security import get_current_user
 from backend.app.mvc.models.user import UserInDB
 
@@ -33,84 +32,9 @@ from backend.app.mvc.models.user import UserInDB
 logger = logging.getLogger(__name__)
 
 
-# Import libraries for document conversion (add these to your requirements.txt)
-# You will need to install these:
-# pip install python-docx PyPDF2 pdfminer.six
-try:
-    from docx import Document as DocxDocument
-    logger.info("python-docx library found.")
-except ImportError:
-    DocxDocument = None
-    logger.warning("python-docx not installed. DOCX content extraction will be limited.")
-try:
-    from PyPDF2 import PdfReader
-    logger.info("PyPDF2 library found.")
-except ImportError:
-    PdfReader = None
-    logger.warning("PyPDF2 not installed. PDF content extraction will be basic.")
-# While pdfminer.six is useful, PyPDF2 is simpler for basic text extraction
-# from PyPDF2.errors import PdfReadError
-
-
 router = APIRouter(tags=["Documents"])
 
 
-# Helper function to extract text
-async def extract_text_from_stream(stream, filename: str):
-    """
-    Attempts to extract text from a file stream based on its extension.
-    Requires python-docx and PyPDF2/pdfminer.six libraries installed.
-    NOTE: This is a basic implementation and may not handle all document complexities
-    like scanned images, complex layouts, or encrypted files.
-    """
-    file_extension = filename.split('.')[-1].lower()
-    # Read the entire stream content into memory for processing
-    try:
-        content = await stream.read()
-    except Exception as e:
-        logger.error(f"Failed to read file stream for {filename}: {e}")
-        return f"Error reading file content: {e}"
-
-
-    if file_extension == 'docx' and DocxDocument:
-        try:
-            doc = DocxDocument(BytesIO(content))
-            text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-            return text
-        except Exception as e:
-            logger.error(f"Error extracting text from DOCX {filename}: {e}")
-            return f"Error extracting text from DOCX file: {filename}. Content preview might be incomplete or unavailable."
-    elif file_extension == 'pdf' and PdfReader:
-        try:
-            reader = PdfReader(BytesIO(content))
-            text = ""
-            # check if the PDF is encrypted
-            if reader.is_encrypted:
-                logger.warning(f"PDF file {filename} is encrypted, cannot extract text.")
-                return f"PDF file: {filename} is encrypted. Content preview not available."
-
-            for page_num in range(len(reader.pages)):
-                # Use get_text() which is more robust than extract_text() in newer PyPDF2
-                page = reader.pages[page_num]
-                text += page.get_text() or ""
-            return text
-        except Exception as e: # Catching a broad exception for robustness
-            logger.error(f"Error extracting text from PDF {filename}: {e}")
-            return f"Error extracting text from PDF file: {filename}. Content preview might be incomplete or unavailable."
-    else:
-        # Attempt to decode as text for other files or if libraries are missing
-        try:
-            # Assumes UTF-8 encoding, adjust if necessary
-            return content.decode('utf-8')
-        except Exception:
-            # If decoding fails, try other common encodings or return a message
-            try:
-                return content.decode('latin-1')
-            except Exception:
-                 logger.warning(f"Could not decode file {filename} as UTF-8 or latin-1 text.")
-                 return f"Could not display content for file: {filename}. Format not supported or text decoding failed."
-
-
 # ───────────────────────── upload ─────────────────────────
 @router.post("/upload")
 async def upload_document(
@@ -135,11 +59,8 @@ async def upload_document(
     user_id = current_user.email
     db = request.app.state.db
 
-    # read the whole file into memory (we need it for text‐extraction later)
-    file_content = await file.read()
-
-    # store in GridFS
-    file_id = await upload_file_to_gridfs(db, file_content, file.filename)
+    # stream into GridFS (hashed + size-checked on the way, de-duplicated)
+    file_id = (await ingest_upload(db, file)).file_id
     doc_id  = await store_document_record(db, user_id, file.filename, file_id)
 
     return {
@@ -175,11 +96,8 @@ async def get_document_content(
     if record["owner_id"] != current_user.email:
         raise HTTPException(status_code=403, detail="You do not own this document.")
 
-    # Open the GridFS file stream
-    grid_out, filename = await open_gridfs_file(db, record["file_id"])
-
-    # Extract text from the file stream
-    document_text = await extract_text_from_stream(grid_out, filename)
+    # Extracted once per file content, then served from the text cache
+    document_text = await extract_document_text(db, record["file_id"])
 
     return Response(content=document_text, media_type="text/plain")
 
@@ -227,9 +145,8 @@ async def delete_document(
     if record["owner_id"] != current_user.email:
         raise HTTPException(status_code=403, detail="You do not own this document.")
 
-    # 1) delete GridFS file
-    fs = AsyncIOMotorGridFSBucket(db, bucket_name="documents_fs")  # type: ignore
-    await fs.delete(ObjectId(record["file_id"]))  # type: ignore
+    # 1) release GridFS file (deleted once no other record shares it)
+    await release_blob(db, record["file_id"])
 
     # 2) delete metadata record
     await db.documents.delete_one({"_id": ObjectId(doc_id)})  # type: ignore
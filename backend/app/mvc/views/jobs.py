@@ -0,0 +1,58 @@
+# backend/app/mvc/views/jobs.py
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from backend.app.core.jobs import FAILED, SUCCEEDED, get_job, job_status
+from backend.app.mvc.models.user import UserInDB
+from backend.app.utils.security import get_current_user
+
+router = APIRouter(tags=["Jobs"])
+
+
+# ─────────────────────────  GET /jobs  ─────────────────────────
+@router.get("")
+async def list_my_jobs(
+    request: Request,
+    limit: int = 20,
+    current_user: UserInDB = Depends(get_current_user),
+):
+    db = request.app.state.db
+    cursor = (
+        db.jobs.find({"user_id": current_user.email}, {"payload": 0, "result": 0})
+        .sort("created_at", -1)
+        .limit(max(1, min(limit, 100)))
+    )
+    return {"jobs": [job_status(job) async for job in cursor]}
+
+
+# ─────────────────────────  GET /jobs/{id}  ─────────────────────────
+@router.get("/{job_id}")
+async def fetch_job_status(
+    job_id: str,
+    request: Request,
+    current_user: UserInDB = Depends(get_current_user),
+):
+    job = await get_job(request.app.state.db, job_id, current_user.email)
+    return job_status(job)
+
+
+# ──────────────────────  GET /jobs/{id}/result  ──────────────────────
+@router.get("/{job_id}/result")
+async def fetch_job_result(
+    job_id: str,
+    request: Request,
+    current_user: UserInDB = Depends(get_current_user),
+):
+    """
+    The finished job's result – the same payload the synchronous endpoint
+    returns.  409 while the job is still queued / running; a failed job
+    re-raises its original status code and detail.
+    """
+    job = await get_job(request.app.state.db, job_id, current_user.email)
+    if job["status"] == SUCCEEDED:
+        return {"job_id": job_id, "result": job.get("result")}
+    if job["status"] == FAILED:
+        err = job.get("error") or {}
+        raise HTTPException(err.get("status_code", 500), err.get("detail", "Job failed."))
+    raise HTTPException(409, f"Job is {job['status']}.")
@@ -8,8 +8,10 @@ from bson import ObjectId
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from backend.app.mvc.controllers.rephrase import run_rephrase_tool
+from backend.app.mvc.controllers.documents import release_document
+from backend.app.mvc.controllers.rephrase import run_rephrase_tool, stream_rephrase
 from backend.app.utils.security import get_current_user
+from backend.app.utils.sse import sse_response
 from backend.app.mvc.models.user import UserInDB
 
 router = APIRouter(tags=["Rephrase"])
@@ -83,6 +85,27 @@ async def rephrase_handler(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+# ── POST /rephrase/stream ────────────────────────────────────────────
+
+@router.post("/stream")
+async def rephrase_stream_handler(
+    request_body: RephraseRequest,
+    request: Request,
+    current_user: UserInDB = Depends(get_current_user),
+):
+    """Same as POST /rephrase but streams the rewrite as Server-Sent Events."""
+    db: AsyncIOMotorDatabase = request.app.state.db
+    return sse_response(
+        stream_rephrase(
+            db,
+            user_id=current_user.email,
+            style=request_body.style,
+            document_text=request_body.document_text,
+            doc_id=request_body.doc_id,
+        )
+    )
+
+
 # ── GET /rephrase/history ────────────────────────────────────────────
 
 @router.get("/history", response_model=HistoryResponse)
@@ -138,9 +161,8 @@ async def delete_report(
     if not row or row["user_id"] != current_user.email:
         raise HTTPException(status_code=404, detail="Not found")
 
-    # if there's a GridFS doc attached, remove it too
-    if row.get("rephrased_doc_id"):
-        await db.fs.files.delete_one({"_id": ObjectId(row["rephrased_doc_id"])})
-
     await db.rephrase_reports.delete_one({"_id": ObjectId(report_id)})
+
+    # if there's a rephrased document attached, remove it too
+    await release_document(db, row.get("rephrased_doc_id"))
     return {"ok": True}
@@ -13,8 +13,12 @@ from pydantic import BaseModel
 from backend.app.mvc.controllers.translate import (
     run_translation_tool,
     run_file_translation_tool,
+    stream_translation,
 )
+from backend.app.mvc.controllers.documents import release_document
+from backend.app.mvc.controllers.jobs import FILE_TRANSLATION, submit_job
 from backend.app.utils.security import get_current_user
+from backend.app.utils.sse import sse_response
 from backend.app.mvc.models.user import UserInDB
 
 router = APIRouter(tags=["Translation"])
@@ -43,6 +47,24 @@ async def translate_document(
     )
 
 
+# ─────────────────────  POST /translate/stream  ─────────────────────
+@router.post("/stream", summary="Translate raw text (Server-Sent Events)")
+async def translate_document_stream(
+    body: TranslationRequest,
+    request: Request,
+    current_user: UserInDB = Depends(get_current_user),
+):
+    db = request.app.state.db
+    return sse_response(
+        stream_translation(
+            db,
+            document_text=body.document_text,
+            target_lang=body.target_lang,
+            user_id=current_user.email,
+        )
+    )
+
+
 # ─────────────────────  POST /translate/file  ─────────────────────
 @router.post("/file", summary="Translate uploaded file")
 async def translate_document_file(
@@ -64,6 +86,24 @@ async def translate_document_file(
     )
 
 
+# ──────────────────  POST /translate/file/jobs  ──────────────────
+@router.post("/file/jobs", status_code=202, summary="Translate uploaded file (background job)")
+async def submit_file_translation(
+    request: Request,
+    file: UploadFile = File(...),
+    target_lang: str = Form(...),
+    current_user: UserInDB = Depends(get_current_user),
+):
+    """
+    Queue the translation and return a job id – poll /jobs/{job_id}; the
+    result carries ``result_doc_id`` for /documents/download/{doc_id}.
+    """
+    db = request.app.state.db
+    return await submit_job(
+        db, FILE_TRANSLATION, current_user.email, {"target_lang": target_lang}, upload=file
+    )
+
+
 # ─────────────────────────  HISTORY  ─────────────────────────
 @router.get("/history")
 async def list_translation_history(
@@ -125,9 +165,11 @@ async def delete_translation_report(
         raise HTTPException(400, "Invalid report_id")
 
     db = request.app.state.db
-    res = await db.translation_reports.delete_one(
+    row = await db.translation_reports.find_one_and_delete(
         {"_id": oid, "user_id": current_user.email}
     )
-    if res.deleted_count == 0:
+    if row is None:
         raise HTTPException(404, "Not found or not yours")
+    # the translated .docx is stored as a document record of its own
+    await release_document(db, row.get("result_doc_id"))
     return {"ok": True}
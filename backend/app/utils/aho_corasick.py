@@ -0,0 +1,105 @@
+# backend/app/utils/aho_corasick.py
+"""
+Aho-Corasick multi-pattern matcher for keyword lexicons.
+
+One pass over the text finds every occurrence of every term, however
+many terms there are, which keeps keyword screening of a whole contract
+in the low milliseconds.
+
+Terms and text are folded the same way (`near_dup.fold_text`: case,
+Arabic diacritics / letter variants) and every run of whitespace becomes
+one space – PDF text breaks lines mid-phrase ("personal\ndata") – so
+offsets refer to that *normalised* text.  Matching rules per term:
+
+• ASCII terms match whole words only; a trailing ``*`` makes the term a
+  stem ("terminat*" → terminate, termination …);
+• Arabic terms match anywhere, since clitics (و، ال، ب …) attach to the
+  word ("البيانات", "والبيانات" both contain "بيانات").
+"""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from typing import Dict, Generic, Iterable, Iterator, List, NamedTuple, Tuple, TypeVar
+
+from backend.app.utils.near_dup import fold_text
+
+V = TypeVar("V")
+
+_SPACES = re.compile(r"\s+")
+
+
+def _normalise(text: str) -> str:
+    return _SPACES.sub(" ", fold_text(text))
+
+
+class Match(NamedTuple):
+    start: int          # offsets into the folded text
+    end: int
+    term: str
+    value: object
+
+
+class KeywordAutomaton(Generic[V]):
+    """Built once from ``(term, value)`` pairs; `find` is thread-safe."""
+
+    def __init__(self, terms: Iterable[Tuple[str, V]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # per state: (term, length, whole word on the right?, whole word on the left?, value)
+        self._out: List[List[Tuple[str, int, bool, bool, V]]] = [[]]
+
+        for raw, value in terms:
+            stem = raw.endswith("*")
+            term = _normalise(raw.rstrip("*")).strip()
+            if not term:
+                continue
+            ascii_term = term.isascii()
+            state = 0
+            for ch in term:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(
+                (raw, len(term), ascii_term and not stem, ascii_term, value)
+            )
+
+        # breadth-first failure links; outputs inherit their fallback's outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                if state:                       # depth-1 states fail to the root
+                    f = self._fail[state]
+                    while f and ch not in self._goto[f]:
+                        f = self._fail[f]
+                    self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> Iterator[Match]:
+        """Every match in *text* (normalised first), in order of end offset."""
+        folded = _normalise(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        n = len(folded)
+        state = 0
+        for i, ch in enumerate(folded):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            end = i + 1
+            for term, length, right, left, value in out[state]:
+                start = end - length
+                if left and start > 0 and folded[start - 1].isalnum():
+                    continue
+                if right and end < n and folded[end].isalnum():
+                    continue
+                yield Match(start, end, term, value)
@@ -0,0 +1,122 @@
+# backend/app/utils/bench_chunker.py
+"""
+Benchmark: risk-analysis chunkers on a synthetic contract.
+
+legacy    the old word-by-word splitter – every word encoded separately,
+          the whole overlap window re-encoded after each chunk boundary
+window    `_token_windows` – the document encoded once, token array sliced
+clauses   `_split_into_chunks` – clause-aligned packing (utils/segmentation)
+
+Reports run time, number of chunks (= GPT calls) and the total tokens
+sent, which includes the overlap.
+
+Usage
+-----
+    python -m backend.app.utils.bench_chunker                # 200 pages
+    python -m backend.app.utils.bench_chunker --pages 50 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Callable, List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from backend.app.mvc.controllers import analysis  # noqa: E402
+
+WORDS_PER_PAGE = 500
+
+_CLAUSES = [
+    "The Supplier shall indemnify the Purchaser against all losses arising from",
+    "Either party may terminate this Agreement upon thirty (30) days written notice",
+    "Personal data shall be processed in accordance with the Personal Data Protection Law",
+    "This Agreement shall be governed by the laws of the Kingdom of Saudi Arabia",
+    "يلتزم الطرف الأول بالمحافظة على سرية المعلومات وعدم الإفصاح عنها للغير",
+    "تخضع هذه الاتفاقية لأنظمة المملكة العربية السعودية وتفسر وفقاً لها",
+]
+
+
+def synthetic_contract(pages: int, seed: int = 7) -> str:
+    """Roughly *pages* × WORDS_PER_PAGE words of numbered clauses."""
+    rnd = random.Random(seed)
+    out: List[str] = []
+    words = 0
+    article = 1
+    while words < pages * WORDS_PER_PAGE:
+        clause = rnd.choice(_CLAUSES)
+        out.append(f"Article {article}.\n{clause} {rnd.randint(1, 9999)}.")
+        words += len(clause.split()) + 3
+        article += 1
+    return "\n\n".join(out)
+
+
+def legacy_split(text: str) -> List[str]:
+    """The pre-rewrite `_split_into_chunks`, kept verbatim for comparison."""
+    enc = analysis.ENCODING
+    size, overlap_n = analysis.CHUNK_TOKENS, analysis.OVERLAP_TOKENS
+
+    def token_len(s: str) -> int:
+        return len(enc.encode(s))
+
+    if token_len(text) <= size:
+        return [text]
+
+    chunks: List[str] = []
+    cur: List[str] = []
+    cur_tokens = 0
+    for w in text.split():
+        t = token_len(" " + w)
+        if cur_tokens + t > size:
+            chunks.append(" ".join(cur))
+            overlap = cur[-overlap_n:] if overlap_n else []
+            cur = overlap + [w]
+            cur_tokens = sum(token_len(" " + s) for s in cur)
+        else:
+            cur.append(w)
+            cur_tokens += t
+    if cur:
+        chunks.append(" ".join(cur))
+    return chunks
+
+
+def _time(fn: Callable[[str], List[str]], text: str, repeat: int) -> tuple[float, List[str]]:
+    best = float("inf")
+    chunks: List[str] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        chunks = fn(text)
+        best = min(best, time.perf_counter() - t0)
+    return best, chunks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = synthetic_contract(args.pages)
+    n_tokens = len(analysis.ENCODING.encode(text, disallowed_special=()))
+    print(f"{args.pages} pages, {len(text):,} chars, {n_tokens:,} tokens "
+          f"(chunk={analysis.CHUNK_TOKENS}, overlap={analysis.OVERLAP_TOKENS})")
+
+    base = None
+    for name, fn in (
+        ("legacy", legacy_split),
+        ("window", analysis._token_windows),
+        ("clauses", analysis._split_into_chunks),
+    ):
+        secs, chunks = _time(fn, text, args.repeat)
+        base = base or secs
+        sent = sum(len(analysis.ENCODING.encode(c, disallowed_special=())) for c in chunks)
+        print(f"{name:8s} {secs * 1000:9.1f} ms  {len(chunks):4d} chunks  "
+              f"{sent:9,d} tokens sent  {base / secs:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
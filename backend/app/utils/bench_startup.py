@@ -0,0 +1,114 @@
+# backend/app/utils/bench_startup.py
+"""
+Benchmark: cold import time of the API (``import backend.main``).
+
+Every run starts a fresh interpreter, so nothing is cached in
+``sys.modules``.  Reports the median wall time over --repeat runs and the
+slowest top-level imports (``python -X importtime``), and exits with
+status 1 when
+
+• the median exceeds the budget, or
+• a dependency that must load lazily (see core/lazy.py) was imported.
+
+Usage
+-----
+    python -m backend.app.utils.bench_startup                 # budget 1200 ms
+    python -m backend.app.utils.bench_startup --budget-ms 800 --repeat 7
+
+Environment variables
+---------------------
+STARTUP_IMPORT_BUDGET_MS   default: 1200   (used when --budget-ms is not given)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", 1200))
+
+# must not be imported by `import backend.main` – they load on first use
+LAZY_MODULES = (
+    "openai", "tiktoken", "fitz", "pymupdf", "pdfminer", "pdf2image",
+    "pytesseract", "PIL", "docx", "reportlab", "PyPDF2", "uvicorn",
+)
+
+_PROBE = f"""
+import json, sys, time
+t = time.perf_counter()
+import backend.main
+ms = (time.perf_counter() - t) * 1000
+print(json.dumps({{"ms": ms, "eager": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+_IMPORTTIME = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)")
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ, WARMUP_ON_STARTUP="0")
+    env.setdefault("PYTHONPATH", os.getcwd())
+    return env
+
+
+def run_once() -> Dict[str, object]:
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        capture_output=True, text=True, env=_env(), check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(top: int) -> List[Tuple[float, str]]:
+    """Cumulative ms of the top-level imports made by backend.main."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.main"],
+        capture_output=True, text=True, env=_env(), check=True,
+    )
+    rows = [
+        (int(m.group(1)) / 1000, m.group(3))
+        for m in map(_IMPORTTIME.match, out.stderr.splitlines())
+        if m and len(m.group(2)) <= 2 and m.group(3) != "backend.main"
+    ]
+    return sorted(rows, reverse=True)[:top]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    ap.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = ap.parse_args()
+
+    runs = [run_once() for _ in range(max(1, args.repeat))]
+    times = [r["ms"] for r in runs]
+    median = statistics.median(times)
+    eager = sorted({m for r in runs for m in r["eager"]})
+
+    print(f"import backend.main   median {median:7.1f} ms   "
+          f"min {min(times):7.1f}   max {max(times):7.1f}   ({len(runs)} runs)")
+    print(f"budget                       {args.budget_ms:7.1f} ms")
+    if args.top:
+        print("\nslowest imports (cumulative, one -X importtime run):")
+        for ms, name in slowest_imports(args.top):
+            print(f"  {ms:8.1f} ms  {name}")
+
+    failed = False
+    if median > args.budget_ms:
+        print(f"\nFAIL: import time {median:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if eager:
+        print(f"\nFAIL: imported eagerly (should be lazy): {', '.join(eager)}")
+        failed = True
+    if not failed:
+        print("\nOK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+# backend/app/utils/compliance_prefilter.py
+"""
+Local relevance pre-filter for the compliance check.
+
+Signature blocks, cover pages, tables of contents and technical annexes
+contain nothing the PDPL / contract-law prompt can flag, yet each used to
+cost a GPT call.  Every chunk is scanned once with an Aho-Corasick
+automaton (utils/aho_corasick.py) over two English + Arabic lexicons:
+
+• PDPL terms – personal data, consent, data subject, transfer abroad …
+  (weight 2: a single hit makes the chunk relevant);
+• contract-law terms – obligations, liability, termination, payment,
+  disputes … (weight 1).
+
+A chunk is sent to GPT when the distinct terms it contains add up to at
+least COMPLIANCE_PREFILTER_MIN_SCORE – i.e. by default one PDPL term or
+two different contract terms.  The filter is deliberately generous: it
+only drops chunks with (almost) no legal vocabulary at all.
+
+Environment variables
+---------------------
+COMPLIANCE_PREFILTER             default: 1   (0 = send every chunk to GPT)
+COMPLIANCE_PREFILTER_MIN_SCORE   default: 2
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Dict, NamedTuple
+
+from backend.app.utils.aho_corasick import KeywordAutomaton
+
+# ───────────────────────── configuration ─────────────────────────
+PREFILTER_ENABLED = os.getenv("COMPLIANCE_PREFILTER", "1") not in {"0", "false", "False"}
+MIN_SCORE         = int(os.getenv("COMPLIANCE_PREFILTER_MIN_SCORE", 2))
+
+PDPL = "pdpl"
+CONTRACT = "contract"
+WEIGHTS = {PDPL: 2, CONTRACT: 1}
+
+# "*" = stem (English only); Arabic terms always match inside words
+PDPL_TERMS = (
+    # English
+    "personal data", "personal information", "data subject*", "data protection",
+    "data controller*", "controller*", "processor*", "processing entit*",
+    "privacy", "consent*", "sensitive data", "health data", "credit data",
+    "biometric*", "genetic*", "national id*", "iqama", "passport*",
+    "email address*", "phone number*", "mobile number*", "home address*",
+    "location data", "cookie*", "marketing", "direct marketing", "profiling",
+    "anonymi*", "pseudonymi*", "data breach*", "retention", "retain*",
+    "destroy*", "destruction", "transfer* outside", "cross-border",
+    "outside the kingdom", "third part*", "disclos*", "sdaia", "ndmo", "pdpl",
+    # Arabic
+    "بيانات شخصيه", "البيانات الشخصيه", "معلومات شخصيه", "صاحب البيانات",
+    "حمايه البيانات", "جهه التحكم", "جهه المعالجه", "معالجه البيانات",
+    "الخصوصيه", "موافقه", "بيانات حساسه", "بيانات صحيه", "بيانات ائتمانيه",
+    "بيانات حيويه", "الهويه الوطنيه", "رقم الهويه", "الاقامه", "جواز السفر",
+    "البريد الالكتروني", "رقم الجوال", "رقم الهاتف", "التسويق", "الافصاح",
+    "خارج المملكه", "نقل البيانات", "الاحتفاظ", "اتلاف", "تسرب", "سدايا",
+    "نظام حمايه البيانات",
+)
+
+CONTRACT_TERMS = (
+    # English
+    "shall", "must", "oblig*", "undertak*", "liabil*", "liable", "indemn*",
+    "terminat*", "penalt*", "damages", "compensat*", "interest", "riba",
+    "payment*", "pay", "pays", "paid", "price", "fee*", "salary", "wage*",
+    "governing law", "jurisdiction", "arbitrat*", "dispute*", "court*",
+    "warrant*", "guarantee*", "non-compet*", "non-solicit*", "exclusiv*",
+    "confidential*", "intellectual property", "assign*", "force majeure",
+    "breach*", "default*", "renew*", "notice", "employ*", "probation*",
+    "gharar", "deposit*", "insurance", "tax*", "vat", "zakat", "subcontract*",
+    # Arabic
+    "يلتزم", "تلتزم", "التزام", "مسؤوليه", "مسئوليه", "تعويض", "غرامه",
+    "فسخ", "انهاء", "النزاع", "نزاع", "التحكيم", "المحكمه", "القضاء",
+    "الاجر", "الراتب", "السداد", "الدفع", "دفع", "المقابل", "فائده", "فوائد",
+    "الربا", "الضمان", "الكفاله", "الغرر", "الشرط الجزائي", "يحق", "لا يجوز",
+    "يجب", "السريه", "القوه القاهره", "التجديد", "الاخطار", "اشعار",
+    "الملكيه الفكريه", "عدم المنافسه", "نظام العمل", "ضريبه", "الزكاه",
+)
+
+_AUTOMATON: KeywordAutomaton[str] = KeywordAutomaton(
+    [(t, PDPL) for t in PDPL_TERMS] + [(t, CONTRACT) for t in CONTRACT_TERMS]
+)
+
+
+class Relevance(NamedTuple):
+    score: int
+    hits: Dict[str, int]        # lexicon → distinct terms found
+
+    @property
+    def relevant(self) -> bool:
+        return self.score >= MIN_SCORE
+
+
+def relevance(text: str) -> Relevance:
+    """Score *text* by the distinct lexicon terms it contains."""
+    seen: Dict[str, str] = {}
+    for m in _AUTOMATON.find(text):
+        seen.setdefault(m.term, m.value)  # type: ignore[arg-type]
+    hits = {PDPL: 0, CONTRACT: 0}
+    for lexicon in seen.values():
+        hits[lexicon] += 1
+    return Relevance(sum(WEIGHTS[k] * n for k, n in hits.items()), hits)
+
+
+def is_relevant(text: str) -> bool:
+    return not PREFILTER_ENABLED or relevance(text).relevant
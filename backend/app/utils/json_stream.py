@@ -0,0 +1,149 @@
+# backend/app/utils/json_stream.py
+"""
+Incremental, tolerant parser for the JSON the analysis prompts ask for –
+``{"risks": [{…}, {…}]}``, ``{"issues": […]}`` or a bare ``[{…}]``.
+
+`JsonItemStream` consumes model output as it is streamed and returns each
+element object of the item array the moment its closing brace arrives,
+so findings can be shown (and kept) before the response is complete:
+
+• text around the JSON (prose, ```json fences) is skipped;
+• an object is parsed on its own, so a broken or truncated item only
+  loses that item – everything that closed before it is kept;
+• an item with trailing commas is repaired before it is given up on.
+
+The scanner only looks at brackets and quotes (regex jumps, no per-char
+Python loop) and keeps just the unfinished item in memory.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_STRING_STOP = re.compile(r'["\\]')
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+def _load_item(fragment: str) -> Optional[Dict[str, Any]]:
+    for candidate in (fragment, _TRAILING_COMMA.sub(r"\1", fragment)):
+        try:
+            item = json.loads(candidate)
+        except ValueError:
+            continue
+        return item if isinstance(item, dict) else None
+    logger.debug("Dropping unparseable item: %.200r", fragment)
+    return None
+
+
+class JsonItemStream:
+    """
+    Feed text deltas, get back completed item objects.
+
+    *keys* names the top-level keys whose array holds the items (e.g.
+    ``("risks",)``); a top-level array is always an item array.  With no
+    *keys*, any array directly under the top-level object qualifies.
+    """
+
+    def __init__(self, keys: Iterable[str] = ()):
+        self.keys = set(keys)
+        self.items: List[Dict[str, Any]] = []
+        self._text = ""
+        self._pos = 0
+        self._stack: List[Tuple[str, bool]] = []   # (bracket, is item array)
+        self._in_string = False
+        self._key_start: Optional[int] = None      # string that may be a key
+        self._last_key: Optional[str] = None
+        self._item_start: Optional[int] = None
+        self._item_depth = 0
+
+    @property
+    def truncated(self) -> bool:
+        """True while a JSON value is still open (output cut off)."""
+        return bool(self._stack)
+
+    def feed(self, delta: str) -> List[Dict[str, Any]]:
+        """Consume *delta*; return the items completed by it."""
+        text = self._text + delta
+        n = len(text)
+        i = self._pos
+        found: List[Dict[str, Any]] = []
+
+        while i < n:
+            if self._in_string:
+                m = _STRING_STOP.search(text, i)
+                if not m:
+                    i = n
+                    break
+                j = m.start()
+                if text[j] == "\\":
+                    if j + 1 >= n:          # escaped char not here yet
+                        i = j
+                        break
+                    i = j + 2
+                    continue
+                self._in_string = False
+                if self._key_start is not None:
+                    self._last_key = text[self._key_start:j]
+                    self._key_start = None
+                i = j + 1
+                continue
+
+            m = _STRUCTURAL.search(text, i)
+            if not m:
+                i = n
+                break
+            j = m.start()
+            ch = text[j]
+            i = j + 1
+
+            if ch == '"':
+                if not self._stack:         # quotes in surrounding prose
+                    continue
+                self._in_string = True
+                if len(self._stack) == 1 and self._stack[0][0] == "{":
+                    self._key_start = j + 1
+            elif ch == "[":
+                parent = self._stack[-1][0] if self._stack else None
+                is_items = parent is None or (
+                    len(self._stack) == 1
+                    and parent == "{"
+                    and (not self.keys or self._last_key in self.keys)
+                )
+                self._stack.append(("[", is_items))
+            elif ch == "{":
+                if self._stack and self._stack[-1][1] and self._item_start is None:
+                    self._item_start = j
+                    self._item_depth = len(self._stack) + 1
+                self._stack.append(("{", False))
+            elif self._stack:               # } or ]
+                depth = len(self._stack)
+                self._stack.pop()
+                if self._item_start is not None and depth == self._item_depth:
+                    if ch == "}":
+                        item = _load_item(text[self._item_start:i])
+                        if item is not None:
+                            found.append(item)
+                    self._item_start = None
+
+        # keep only what an open item / key still needs
+        keep = min(p for p in (i, self._item_start, self._key_start) if p is not None)
+        self._text = text[keep:]
+        self._pos = i - keep
+        if self._item_start is not None:
+            self._item_start -= keep
+        if self._key_start is not None:
+            self._key_start -= keep
+
+        self.items.extend(found)
+        return found
+
+
+def parse_items(text: str, keys: Iterable[str] = ()) -> List[Dict[str, Any]]:
+    """One-shot `JsonItemStream`: every complete item object in *text*."""
+    return JsonItemStream(keys).feed(text or "")
@@ -0,0 +1,161 @@
+# backend/app/utils/near_dup.py
+"""
+Near-duplicate merging for findings (risks, compliance issues).
+
+Overlapping chunks – and re-phrasings by the model – report the same
+finding several times in slightly different words, which exact-key
+de-duplication does not catch.  This module merges findings whose word
+shingles are similar:
+
+1. text → normalised words (case, Arabic diacritics / letter variants)
+   → 1- and 2-word shingles, each hashed once (64-bit blake2b);
+2. a MinHash signature per finding using one-permutation hashing with
+   densification – one hash per shingle instead of one per permutation,
+   so pure Python stays fast for thousands of findings;
+3. LSH banding puts likely matches in the same bucket; only pairs that
+   share a bucket are compared, and merged when their estimated Jaccard
+   similarity is ≥ NEAR_DUP_THRESHOLD (union-find, so merging is
+   transitive).  With ``group_of`` only items of the same group are ever
+   compared – e.g. the same rule id – so similar wording never merges two
+   different findings;
+4. each group keeps its highest-ranked member (e.g. highest severity,
+   earliest on ties) and records the chunks every member came from.
+
+Environment variables
+---------------------
+NEAR_DUP_THRESHOLD     default: 0.6     (estimated Jaccard needed to merge)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+# ───────────────────────── configuration ─────────────────────────
+THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", 0.6))
+NUM_BINS  = 64                       # signature length
+BANDS     = 16                       # LSH bands × rows = NUM_BINS
+ROWS      = NUM_BINS // BANDS
+
+SEVERITY_RANK = {"low": 1, "medium": 2, "high": 3, "critical": 4}
+
+_ARABIC_MARKS = re.compile(r"[ً-ْٰـ]")      # tashkeel + tatweel
+_ARABIC_FOLD = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ى": "ي", "ة": "ه"})
+_WORD = re.compile(r"\w+")
+_MASK = (1 << 64) - 1
+
+
+def fold_text(text: str) -> str:
+    """Lower-case, strip Arabic diacritics / tatweel, fold letter variants."""
+    return _ARABIC_MARKS.sub("", text.lower()).translate(_ARABIC_FOLD)
+
+
+def normalise_words(text: str) -> List[str]:
+    return _WORD.findall(fold_text(text))
+
+
+def normalise_key(text: Any) -> str:
+    """Exact-match key: normalised words joined by single spaces."""
+    return " ".join(normalise_words(str(text or "")))
+
+
+def shingles(text: str) -> Set[int]:
+    """Hashed 1- and 2-word shingles of *text*."""
+    words = normalise_words(text)
+    grams = set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+    return {
+        int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big")
+        for g in grams
+    }
+
+
+def signature(hashes: Iterable[int]) -> Optional[List[int]]:
+    """One-permutation MinHash signature (None for empty input)."""
+    bins: List[Optional[int]] = [None] * NUM_BINS
+    for h in hashes:
+        b, v = h % NUM_BINS, h // NUM_BINS
+        if bins[b] is None or v < bins[b]:
+            bins[b] = v
+    if all(v is None for v in bins):
+        return None
+    # densify: an empty bin borrows from the next filled bin to its right,
+    # offset by the distance so borrowed values stay distinguishable
+    out: List[int] = []
+    for i in range(NUM_BINS):
+        j, steps = i, 0
+        while bins[j] is None:
+            j, steps = (j + 1) % NUM_BINS, steps + 1
+        out.append((bins[j] + steps * 0x9E3779B97F4A7C15) & _MASK)
+    return out
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_BINS
+
+
+def merge_near_duplicates(
+    items: List[Dict[str, Any]],
+    *,
+    text_of: Callable[[Dict[str, Any]], str],
+    rank_of: Optional[Callable[[Dict[str, Any]], int]] = None,
+    group_of: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    chunks_key: str = "source_chunks",
+    threshold: float = THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """
+    Merge near-duplicate *items* and return one representative per group,
+    in order of first appearance.  Items whose ``group_of`` keys differ
+    are never merged, however similar their ``text_of``.
+
+    Each representative is a copy of the group's best member – highest
+    ``rank_of(item)``, earliest on ties – whose ``chunks_key`` list is the
+    sorted union of the members' lists.
+    """
+    n = len(items)
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    group = group_of or (lambda _it: None)
+    keys = [group(it) for it in items]
+    sigs = [signature(shingles(text_of(it) or "")) for it in items]
+    buckets: Dict[tuple, List[int]] = defaultdict(list)
+    for i, sig in enumerate(sigs):
+        if sig is None:
+            continue
+        for band in range(BANDS):
+            buckets[(keys[i], band, *sig[band * ROWS:(band + 1) * ROWS])].append(i)
+
+    for members in buckets.values():
+        for x, i in enumerate(members):
+            for j in members[x + 1:]:
+                ri, rj = find(i), find(j)
+                if (ri != rj and keys[i] == keys[j]
+                        and similarity(sigs[i], sigs[j]) >= threshold):
+                    parent[max(ri, rj)] = min(ri, rj)
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for i in range(n):
+        groups[find(i)].append(i)
+
+    rank = rank_of or (lambda _it: 0)
+    merged: List[Dict[str, Any]] = []
+    for root in sorted(groups):
+        members = groups[root]
+        best = max(members, key=lambda i: (rank(items[i]), -i))
+        rep = dict(items[best])
+        rep[chunks_key] = sorted({c for i in members for c in items[i].get(chunks_key) or []})
+        merged.append(rep)
+    return merged
+
+
+def severity_rank(item: Dict[str, Any]) -> int:
+    return SEVERITY_RANK.get(str(item.get("severity") or "").strip().lower(), 0)
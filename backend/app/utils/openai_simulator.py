@@ -0,0 +1,283 @@
+# backend/app/utils/openai_simulator.py
+"""
+OpenAI-compatible local simulator for load tests.
+
+Speaks enough of the ``/v1/chat/completions`` and ``/v1/completions`` API
+for the official SDK (and therefore `call_gpt` / `stream_gpt`) to work
+against it – blocking and streamed responses, ``usage`` blocks, and
+OpenAI-shaped error bodies – without spending a cent.
+
+Answers are canned but shaped like the real thing: risk-analysis prompts
+get ``{"risks": [...]}``, compliance prompts ``{"issues": [...]}`` with
+snippets quoted verbatim from the chunk, the chatbot classifier gets
+``LEGAL``, rephrase-as-JSON gets ``{"rephrased_text": ...}`` and anything
+else receives filler text of a configurable length.
+
+Usage
+-----
+    python -m backend.app.utils.openai_simulator            # :8100
+    OPENAI_BASE_URL=http://localhost:8100/v1 uvicorn backend.main:app
+
+Environment variables (all adjustable at runtime via PUT /sim/config)
+-------------------------------------------------------------------
+SIM_PORT               default: 8100
+SIM_LATENCY_DIST       default: lognormal   (fixed | uniform | lognormal)
+SIM_LATENCY_MS         default: 800         (median / fixed / uniform upper bound)
+SIM_LATENCY_SIGMA      default: 0.5         (lognormal shape)
+SIM_TOKENS_PER_SEC     default: 60          (generation speed, 0 = instant)
+SIM_COMPLETION_TOKENS  default: 400         (length of free-text answers)
+SIM_RATE_429           default: 0.0         (probability of a 429 per request)
+SIM_RATE_500           default: 0.0         (probability of a 500 per request)
+SIM_RETRY_AFTER        default: 1           (seconds sent with 429s)
+SIM_SEED               default: unset       (fix RNG for reproducible runs)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import time
+import uuid
+from dataclasses import asdict, dataclass, fields
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class SimConfig:
+    latency_dist: str = os.getenv("SIM_LATENCY_DIST", "lognormal")
+    latency_ms: float = float(os.getenv("SIM_LATENCY_MS", 800))
+    latency_sigma: float = float(os.getenv("SIM_LATENCY_SIGMA", 0.5))
+    tokens_per_sec: float = float(os.getenv("SIM_TOKENS_PER_SEC", 60))
+    completion_tokens: int = int(os.getenv("SIM_COMPLETION_TOKENS", 400))
+    rate_429: float = float(os.getenv("SIM_RATE_429", 0.0))
+    rate_500: float = float(os.getenv("SIM_RATE_500", 0.0))
+    retry_after: float = float(os.getenv("SIM_RETRY_AFTER", 1))
+
+
+config = SimConfig()
+stats: Dict[str, int] = {"requests": 0, "streamed": 0, "injected_429": 0, "injected_500": 0}
+_rng = random.Random(os.getenv("SIM_SEED"))
+
+app = FastAPI(title="LDA OpenAI simulator")
+
+
+# ═════════════════════════ timing / failures ═════════════════════════
+def _first_byte_delay() -> float:
+    """Seconds before the first byte, drawn from the configured distribution."""
+    base = config.latency_ms / 1000
+    if config.latency_dist == "fixed":
+        return base
+    if config.latency_dist == "uniform":
+        return _rng.uniform(0, 2 * base)
+    return _rng.lognormvariate(0, config.latency_sigma) * base   # median = base
+
+
+def _per_token_delay() -> float:
+    return 1 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0.0
+
+
+def _error(status: int, message: str, err_type: str, code: str) -> JSONResponse:
+    headers = {"retry-after": str(config.retry_after)} if status == 429 else {}
+    return JSONResponse(
+        {"error": {"message": message, "type": err_type, "param": None, "code": code}},
+        status_code=status,
+        headers=headers,
+    )
+
+
+def _injected_failure() -> Optional[JSONResponse]:
+    roll = _rng.random()
+    if roll < config.rate_429:
+        stats["injected_429"] += 1
+        return _error(429, "Rate limit reached (simulated).", "requests", "rate_limit_exceeded")
+    if roll < config.rate_429 + config.rate_500:
+        stats["injected_500"] += 1
+        return _error(500, "The server had an error (simulated).", "server_error", "server_error")
+    return None
+
+
+# ═════════════════════════ canned answers ═════════════════════════
+def _tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _sentences(text: str, n: int, seed: int) -> List[str]:
+    """Pick *n* verbatim sentences from *text* (deterministic per prompt)."""
+    parts = [p.strip() for p in re.split(r"(?<=[.!?؟])\s+|\n+", text) if len(p.strip()) > 30]
+    if not parts:
+        return [text.strip()[:160]] if text.strip() else []
+    rnd = random.Random(seed)
+    return [p[:300] for p in rnd.sample(parts, min(n, len(parts)))]
+
+
+def _answer(system: str, prompt: str) -> str:
+    """Build a response body that matches what the caller's prompt expects."""
+    seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+    n = 1 + seed % 3
+
+    if '"risks"' in system:
+        severities = ("Low", "Medium", "High")
+        return json.dumps({"risks": [
+            {
+                "section": f"Section {i + 1}",
+                "clause": clause,
+                "risk_description": f"Simulated risk #{i + 1} for this clause.",
+                "severity": severities[(seed + i) % 3],
+                "recommendation": "Review this clause with counsel (simulated).",
+            }
+            for i, clause in enumerate(_sentences(prompt, n, seed))
+        ]}, ensure_ascii=False)
+
+    if "rule_id" in system:
+        return json.dumps({"issues": [
+            {
+                "rule_id": f"SIM_RULE_{(seed + i) % 7}",
+                "description": "Simulated compliance issue.",
+                "status": "Issue Found",
+                "extracted_text_snippet": snippet,
+            }
+            for i, snippet in enumerate(_sentences(prompt, n, seed))
+        ]}, ensure_ascii=False)
+
+    if "LEGAL" in prompt and "NONLEGAL" in prompt:
+        return "LEGAL"
+
+    filler = " ".join(
+        "Simulated legal output." for _ in range(max(1, config.completion_tokens // 5))
+    )
+    if "rephrased_text" in system:
+        return json.dumps({"rephrased_text": filler})
+    return filler
+
+
+def _split_for_stream(text: str) -> List[str]:
+    """~one token (4 chars) per streamed delta."""
+    return [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+
+
+def _messages_to_text(body: Dict[str, Any]) -> tuple[str, str]:
+    system, user = [], []
+    for m in body.get("messages", []):
+        content = m.get("content") or ""
+        if isinstance(content, list):      # content-part format
+            content = "".join(p.get("text", "") for p in content if isinstance(p, dict))
+        (system if m.get("role") in ("system", "developer") else user).append(content)
+    return "\n".join(system), "\n".join(user)
+
+
+def _usage(prompt_tokens: int, completion_tokens: int) -> Dict[str, int]:
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+# ═════════════════════════ endpoints ═════════════════════════
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+    if (failure := _injected_failure()) is not None:
+        await asyncio.sleep(_first_byte_delay() / 4)
+        return failure
+
+    system, prompt = _messages_to_text(body)
+    text = _answer(system, prompt)
+    model = body.get("model", "sim")
+    cid = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    created = int(time.time())
+    usage = _usage(_tokens(system + prompt), _tokens(text))
+
+    if body.get("stream"):
+        stats["streamed"] += 1
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+        async def _events() -> AsyncIterator[str]:
+            def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> str:
+                return "data: " + json.dumps({
+                    "id": cid, "object": "chat.completion.chunk", "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                }, ensure_ascii=False) + "\n\n"
+
+            await asyncio.sleep(_first_byte_delay())
+            yield chunk({"role": "assistant", "content": ""})
+            step = _per_token_delay()
+            for piece in _split_for_stream(text):
+                if step:
+                    await asyncio.sleep(step)
+                yield chunk({"content": piece})
+            yield chunk({}, "stop")
+            if include_usage:
+                yield "data: " + json.dumps({
+                    "id": cid, "object": "chat.completion.chunk", "created": created,
+                    "model": model, "choices": [], "usage": usage,
+                }) + "\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(_events(), media_type="text/event-stream")
+
+    await asyncio.sleep(_first_byte_delay() + usage["completion_tokens"] * _per_token_delay())
+    return {
+        "id": cid,
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": text},
+            "finish_reason": "stop",
+        }],
+        "usage": usage,
+    }
+
+
+@app.post("/v1/completions")
+async def completions(request: Request):
+    """Legacy completions endpoint (non-streamed only)."""
+    body = await request.json()
+    stats["requests"] += 1
+    if (failure := _injected_failure()) is not None:
+        return failure
+    prompt = body.get("prompt") or ""
+    text = _answer("", prompt if isinstance(prompt, str) else "".join(prompt))
+    usage = _usage(_tokens(str(prompt)), _tokens(text))
+    await asyncio.sleep(_first_byte_delay() + usage["completion_tokens"] * _per_token_delay())
+    return {
+        "id": f"cmpl-{uuid.uuid4().hex[:24]}",
+        "object": "text_completion",
+        "created": int(time.time()),
+        "model": body.get("model", "sim"),
+        "choices": [{"index": 0, "text": text, "finish_reason": "stop", "logprobs": None}],
+        "usage": usage,
+    }
+
+
+@app.get("/sim/config")
+async def get_config():
+    return {"config": asdict(config), "stats": stats}
+
+
+@app.put("/sim/config")
+async def update_config(request: Request):
+    """Patch any SimConfig field at runtime, e.g. {"rate_429": 0.2}."""
+    patch = await request.json()
+    for f in fields(SimConfig):
+        if f.name in patch:
+            setattr(config, f.name, type(getattr(config, f.name))(patch[f.name]))
+    return {"config": asdict(config)}
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("SIM_PORT", 8100)))
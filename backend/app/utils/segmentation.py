@@ -0,0 +1,197 @@
+# backend/app/utils/segmentation.py
+"""
+Clause-aware document segmentation (English + Arabic).
+
+Risk analysis and the compliance check both have to cut a contract into
+pieces that fit one GPT call.  Cutting on a word or character budget
+slices clauses in half and needs a large overlap to compensate; cutting
+on the document's own numbering does not.
+
+1. `find_headings` detects clause headings at the start of a line:
+
+   level 1  Article 5 / Section IV / Chapter 2 / Schedule A …
+            المادة (5) / المادة الخامسة / البند الأول / الفصل الثاني / الباب …
+   level 2  1.  2.3  4)  ١.  ٢-٣ …  and  أولاً: / ثانياً: …
+   level 3  (a)  (iv)  (3)  (أ) …
+
+2. `clause_chunks` packs consecutive clauses greedily up to a token
+   budget.  A clause that is too large on its own is split at its
+   sub-clauses, then paragraphs, then sentences, and only as a last
+   resort by the caller's *split_long* (e.g. a token window with overlap),
+   which returns ``(start, end)`` character spans of the text it is given.
+
+Because every boundary sits on a clause start, greedy packing falls back
+into step a few chunks after an edit instead of shifting every later
+boundary the way a fixed token window does – so a revised contract keeps
+most of its chunks byte-identical for the per-chunk result store.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+_DIGIT = r"[0-9٠-٩]"
+_ROMAN = r"[IVXLCDM]+"
+_AR_ORDINAL_WORDS = (
+    "الأول|الاول|الأولى|الاولى|الثاني|الثانية|الثالث|الثالثة|الرابع|الرابعة|"
+    "الخامس|الخامسة|السادس|السادسة|السابع|السابعة|الثامن|الثامنة|التاسع|التاسعة|"
+    "العاشر|العاشرة|الحادي|الحادية|الثاني عشر|الثانية عشرة|العشرون|العشرين"
+)
+_AR_ADVERBS = "أولا|أولاً|ثانيا|ثانياً|ثالثا|ثالثاً|رابعا|رابعاً|خامسا|خامساً|سادسا|سادساً|سابعا|سابعاً|ثامنا|ثامناً|تاسعا|تاسعاً|عاشرا|عاشراً"
+
+_HEADING_PATTERNS = [
+    # level 1 – English: "Article 5", "SECTION IV", "Schedule A"
+    (1, re.compile(
+        r"^[ \t]*(?:article|section|clause|chapter|part|schedule|annex|appendix|exhibit)"
+        rf"[ \t]+(?:{_DIGIT}+(?:\.{_DIGIT}+)*|(?-i:{_ROMAN}|[A-Z]))\b",
+        re.IGNORECASE | re.MULTILINE,
+    )),
+    # level 1 – Arabic: "المادة (5)", "مادة ٥", "البند الأول", "الفصل الثاني"
+    (1, re.compile(
+        r"^[ \t]*(?:ال)?(?:مادة|بند|فصل|باب|قسم|ملحق)[ \t]*"
+        rf"(?:\(?[ \t]*{_DIGIT}+[ \t]*\)?|(?:{_AR_ORDINAL_WORDS}))",
+        re.MULTILINE,
+    )),
+    # level 2 – numbered: "1. ", "2.3 ", "4) ", "١- "
+    (2, re.compile(
+        rf"^[ \t]*(?:{_DIGIT}{{1,3}}(?:\.{_DIGIT}{{1,3}})*[.)\-–]|{_DIGIT}{{1,3}}(?:\.{_DIGIT}{{1,3}})+)"
+        r"[ \t]+\S",
+        re.MULTILINE,
+    )),
+    # level 2 – Arabic ordinal adverbs: "أولاً:", "ثانياً -"
+    (2, re.compile(rf"^[ \t]*(?:{_AR_ADVERBS})[ \t]*[:\-–]", re.MULTILINE)),
+    # level 3 – lettered / bracketed sub-clauses: "(a)", "(iv)", "(3)", "(أ)"
+    (3, re.compile(
+        rf"^[ \t]*\((?:[a-z]|[ivx]+|{_DIGIT}{{1,2}}|[ء-ي])\)[ \t]+\S",
+        re.MULTILINE,
+    )),
+]
+
+_PARAGRAPH = re.compile(r"\n[ \t]*\n")
+_SENTENCE = re.compile(r"(?<=[.!?؟؛;])\s+")
+
+
+@dataclass(frozen=True)
+class Heading:
+    start: int          # offset of the line that carries the heading
+    level: int
+
+
+@dataclass
+class Chunk:
+    start: int          # character offsets into the source text
+    end: int
+    text: str
+
+
+def find_headings(text: str, max_level: int = 3) -> List[Heading]:
+    """All clause headings up to *max_level*, in document order."""
+    found: dict[int, int] = {}
+    for level, pattern in _HEADING_PATTERNS:
+        if level > max_level:
+            continue
+        for m in pattern.finditer(text):
+            found[m.start()] = min(level, found.get(m.start(), level))
+    return [Heading(pos, lvl) for pos, lvl in sorted(found.items())]
+
+
+def _cuts(text: str, start: int, end: int, pattern: re.Pattern[str]) -> List[int]:
+    return [m.end() for m in pattern.finditer(text, start, end) if start < m.end() < end]
+
+
+def clause_chunks(
+    text: str,
+    budget: int,
+    count_tokens: Callable[[str], int],
+    *,
+    split_long: Optional[Callable[[str], List[Tuple[int, int]]]] = None,
+) -> List[Chunk]:
+    """
+    Clause-aligned chunks of at most *budget* tokens (as measured by
+    *count_tokens*), covering the whole of *text* in order.
+    """
+    if not text.strip():
+        return []
+    if count_tokens(text) <= budget:
+        return [Chunk(0, len(text), text)]
+
+    headings = find_headings(text)
+
+    # top-level clauses (level 1 and 2 headings) plus the preamble
+    bounds = sorted({0, *(h.start for h in headings if h.level <= 2)})
+
+    # break oversize clauses down, finest structure first
+    pieces: List[Tuple[int, int, int]] = []         # start, end, tokens
+    for s, e in zip(bounds, bounds[1:] + [len(text)]):
+        if s < e:
+            pieces.extend(_fit(text, s, e, budget, count_tokens, split_long, headings))
+
+    chunks: List[Chunk] = []
+    cur_start: Optional[int] = None
+    cur_end = cur_tokens = 0
+
+    def _emit() -> None:
+        body = text[cur_start:cur_end]
+        if body.strip():
+            chunks.append(Chunk(cur_start, cur_end, body))
+
+    for s, e, tokens in pieces:
+        if cur_start is not None and cur_tokens + tokens > budget:
+            _emit()
+            cur_start = None
+        if cur_start is None:
+            cur_start, cur_tokens = s, 0
+        cur_end = e
+        cur_tokens += tokens
+    if cur_start is not None:
+        _emit()
+    return chunks
+
+
+def _fit(
+    text: str,
+    start: int,
+    end: int,
+    budget: int,
+    count_tokens: Callable[[str], int],
+    split_long: Optional[Callable[[str], List[Tuple[int, int]]]],
+    headings: List[Heading],
+) -> List[Tuple[int, int, int]]:
+    """Split text[start:end] until every piece fits *budget*."""
+    tokens = count_tokens(text[start:end])
+    if tokens <= budget:
+        return [(start, end, tokens)]
+
+    for cuts in (
+        [h.start for h in headings if h.level == 3 and start < h.start < end],
+        _cuts(text, start, end, _PARAGRAPH),
+        _cuts(text, start, end, _SENTENCE),
+    ):
+        if cuts:
+            edges = [start, *cuts, end]
+            out: List[Tuple[int, int, int]] = []
+            for s, e in zip(edges, edges[1:]):
+                out.extend(_fit(text, s, e, budget, count_tokens, split_long, headings))
+            return out
+
+    # one unbroken run of text – hand it to the caller or cut by length
+    body = text[start:end]
+    spans = split_long(body) if split_long else _hard_split(body, budget, tokens)
+    return [(start + s, start + e, count_tokens(body[s:e])) for s, e in spans]
+
+
+def _hard_split(body: str, budget: int, tokens: int) -> List[Tuple[int, int]]:
+    """Last resort: equal-length slices, cut at whitespace where possible."""
+    n = -(-tokens // budget)
+    size = -(-len(body) // n)
+    edges, pos = [], 0
+    while pos < len(body):
+        cut = min(len(body), pos + size)
+        if cut < len(body):
+            space = body.rfind(" ", pos + size // 2, cut)
+            cut = space + 1 if space > pos else cut
+        edges.append((pos, cut))
+        pos = cut
+    return edges
@@ -0,0 +1,57 @@
+# backend/app/utils/sse.py
+"""
+Server-Sent Events helpers.
+
+Controllers produce ``(event, payload)`` tuples; `sse_response` turns such
+an async iterator into a ``text/event-stream`` response.  Any exception
+raised mid-stream is reported to the client as a final ``error`` event
+instead of a silently truncated body.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from backend.app.core.llm_resilience import LLMUnavailableError
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",   # disable proxy buffering (nginx / Render)
+}
+
+
+def sse_event(payload: Dict[str, Any], event: str = "message") -> str:
+    """Serialise one SSE frame."""
+    data = json.dumps(payload, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def _frames(events: AsyncIterator[Tuple[str, Dict[str, Any]]]) -> AsyncIterator[str]:
+    try:
+        async for event, payload in events:
+            yield sse_event(payload, event)
+    except HTTPException as e:
+        yield sse_event({"status_code": e.status_code, "detail": e.detail}, "error")
+    except LLMUnavailableError:
+        logger.exception("SSE stream failed – AI unavailable")
+        yield sse_event(
+            {"status_code": 503, "detail": "AI service is temporarily unavailable."},
+            "error",
+        )
+    except Exception:
+        logger.exception("SSE stream failed")
+        yield sse_event({"status_code": 500, "detail": "Internal server error"}, "error")
+
+
+def sse_response(events: AsyncIterator[Tuple[str, Dict[str, Any]]]) -> StreamingResponse:
+    return StreamingResponse(
+        _frames(events), media_type="text/event-stream", headers=SSE_HEADERS
+    )
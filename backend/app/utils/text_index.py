@@ -0,0 +1,181 @@
+# backend/app/utils/text_index.py
+"""
+Per-document index for locating quoted snippets.
+
+GPT quotes the clause it flags ("extracted_text_snippet", a risk's
+"clause"), but rarely byte-for-byte: whitespace, case, diacritics and
+the odd word differ, and long quotes get an ellipsis.  Instead of a regex
+search over the whole document per finding, the text is indexed once:
+
+• words → normalised (utils/near_dup.fold_text: case, Arabic diacritics
+  and letter variants) and joined by single spaces, with each word's
+  character span in the original text (the offset map);
+• an exact quote is one ``str.find`` in the normalised text;
+• otherwise the quote's rarer word n-grams vote for alignments via an
+  n-gram → positions index (built on first use); the best few are
+  verified n-gram by n-gram, following small drifts from inserted or
+  dropped words, and the best wins if enough of the quote agrees.
+
+Locations are character offsets into the original text plus a 1-based
+page number, counted from the form feeds (``\\f``) that text extraction
+puts between PDF pages.  Text without form feeds is a single page.
+
+Environment variables
+---------------------
+TEXT_INDEX_NGRAM          default: 3     (words per n-gram)
+TEXT_INDEX_MIN_COVERAGE   default: 0.5   (share of the quote's n-grams that must align)
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from itertools import accumulate
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from backend.app.utils.near_dup import fold_text
+
+# ───────────────────────── configuration ─────────────────────────
+NGRAM        = int(os.getenv("TEXT_INDEX_NGRAM", 3))
+MIN_COVERAGE = float(os.getenv("TEXT_INDEX_MIN_COVERAGE", 0.5))
+MAX_POSTINGS = 64          # n-grams more frequent than this carry no signal
+SLACK        = 2           # words a fuzzy alignment may drift per n-gram
+CANDIDATES   = 3           # alignments verified per fuzzy lookup
+
+PAGE_BREAK = "\f"
+
+_DRIFTS = sorted(range(-SLACK, SLACK + 1), key=abs)
+
+# a word may carry Arabic diacritics / tatweel, which \w does not match
+_TOKEN = re.compile(r"\w[\wً-ْٰـ]*")
+
+
+class Location(NamedTuple):
+    start: int           # offsets into the original text
+    end: int
+    page: int            # 1-based
+    score: float         # 1.0 = exact (normalised) match
+
+
+class TextIndex:
+    """Built once per document; `locate` is cheap and thread-safe to read."""
+
+    def __init__(self, text: str):
+        self.text = text
+        spans = [m.span() for m in _TOKEN.finditer(text)]
+        self._starts = [s for s, _ in spans]
+        self._ends = [e for _, e in spans]
+        # one fold over the joined words; folding never removes a whole word
+        self.words: List[str] = (
+            fold_text(" ".join(text[s:e] for s, e in spans)).split(" ") if spans else []
+        )
+        self.normalised = " ".join(self.words)
+        # offset of every word in `normalised`
+        self._norm_starts = list(accumulate((len(w) + 1 for w in self.words[:-1]), initial=0))
+        self._pages = [m.start() for m in re.finditer(PAGE_BREAK, text)]
+        self._grams: Optional[Dict[Tuple[str, ...], List[int]]] = None
+
+    # ─────────────────────────── lookup ───────────────────────────
+    def page_at(self, offset: int) -> int:
+        return bisect_right(self._pages, offset) + 1
+
+    def locate(self, snippet: Optional[str]) -> Optional[Location]:
+        """Where *snippet* occurs – exactly after normalisation, else fuzzily."""
+        query = fold_text(" ".join(_TOKEN.findall(snippet or ""))).split()
+        if not query or not self.words:
+            return None
+        hit = self._exact(query)
+        if hit is not None:
+            return self._location(hit, hit + len(query) - 1, 1.0)
+        if len(query) < NGRAM:
+            return None
+        return self._fuzzy(query)
+
+    def excerpt(self, loc: Location, win: int = 100) -> str:
+        """The located text with *win* characters of context either side."""
+        s, e = max(0, loc.start - win), min(len(self.text), loc.end + win)
+        return ("…" if s else "") + self.text[s:e] + ("…" if e < len(self.text) else "")
+
+    # ───────────────────────── internals ─────────────────────────
+    def _location(self, first: int, last: int, score: float) -> Location:
+        start = self._starts[first]
+        return Location(start, self._ends[last], self.page_at(start), round(score, 3))
+
+    def _exact(self, query: List[str]) -> Optional[int]:
+        needle = " ".join(query)
+        i = self.normalised.find(needle)
+        while i != -1:
+            w = bisect_left(self._norm_starts, i)
+            end = i + len(needle)
+            # must start and end on word boundaries
+            if (w < len(self._norm_starts) and self._norm_starts[w] == i
+                    and (end == len(self.normalised) or self.normalised[end] == " ")):
+                return w
+            i = self.normalised.find(needle, i + 1)
+        return None
+
+    def _gram_index(self) -> Dict[Tuple[str, ...], List[int]]:
+        if self._grams is None:
+            grams: Dict[Tuple[str, ...], List[int]] = defaultdict(list)
+            for i, gram in enumerate(zip(*(self.words[k:] for k in range(NGRAM)))):
+                grams[gram].append(i)
+            self._grams = dict(grams)
+        return self._grams
+
+    def _fuzzy(self, query: List[str]) -> Optional[Location]:
+        index = self._gram_index()
+        query_grams = list(zip(*(query[k:] for k in range(NGRAM))))
+        postings = [(j, index.get(gram, ())) for j, gram in enumerate(query_grams)]
+        postings = [(j, ps) for j, ps in postings if ps]
+        # frequent n-grams ("the party shall") carry no signal – unless the
+        # passage is boilerplate repeated throughout, then the rarest decide
+        rare = [(j, ps) for j, ps in postings if len(ps) <= MAX_POSTINGS]
+        if not rare:
+            rare = sorted(postings, key=lambda jp: len(jp[1]))[:NGRAM]
+        # candidate alignments: document word where the quote would start
+        votes: Dict[int, int] = defaultdict(int)
+        for j, ps in rare:
+            for p in ps[:MAX_POSTINGS]:
+                votes[p - j] += 1
+        best: List[int] = []
+        for start in heapq.nlargest(CANDIDATES, votes, key=votes.__getitem__):
+            hits = self._align(query_grams, start)
+            if len(hits) > len(best):
+                best = hits
+        coverage = len(best) / len(query_grams)
+        if coverage < MIN_COVERAGE:
+            return None
+        return self._location(best[0], best[-1] + NGRAM - 1, coverage)
+
+    def _align(self, query_grams: List[Tuple[str, ...]], start: int) -> List[int]:
+        """Document positions of the query n-grams found along an alignment."""
+        hits: List[int] = []
+        offset = start
+        for j, gram in enumerate(query_grams):
+            for drift in _DRIFTS:
+                p = offset + j + drift
+                if 0 <= p and tuple(self.words[p:p + NGRAM]) == gram:
+                    hits.append(p)
+                    offset = p - j          # inserted / dropped words shift the rest
+                    break
+        return hits
+
+
+def attach_location(item: Dict[str, Any], index: TextIndex, quote_key: str) -> Optional[Location]:
+    """
+    Add ``char_start`` / ``char_end`` / ``page`` to a finding *item* by
+    locating its ``item[quote_key]``.  Offsets already present (e.g. from
+    the local rule pack) are kept and only the page is filled in.
+    """
+    if item.get("char_start") is not None:
+        start = int(item["char_start"])
+        item["page"] = index.page_at(start)
+        return Location(start, int(item.get("char_end") or start), item["page"], 1.0)
+    loc = index.locate(item.get(quote_key))
+    item["char_start"], item["char_end"], item["page"] = (
+        (loc.start, loc.end, loc.page) if loc else (None, None, None)
+    )
+    return loc
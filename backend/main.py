@@ -2,7 +2,6 @@ import logging
 from datetime import datetime
 from typing import Optional
 
-import uvicorn
 from bson import ObjectId
 from fastapi import (
     Depends,
@@ -16,6 +15,14 @@ from pydantic import BaseModel, EmailStr
 from starlette.middleware.cors import CORSMiddleware
 
 from backend.app.core.database import init_db
+from backend.app.core.blob_store import ensure_indexes as ensure_blob_indexes
+from backend.app.core.chunk_store import chunk_store
+from backend.app.core.text_cache import text_cache
+from backend.app.core.jobs import start_workers, stop_workers
+from backend.app.core.lazy import start_warmup
+from backend.app.core.llm_cache import llm_cache
+from backend.app.core.llm_usage import usage_recorder
+from backend.app.core.process_pool import shutdown_pools
 from backend.app.middleware.jwt_middleware import JWTMiddleware
 from backend.app.mvc.models.user import UserInDB
 from backend.app.utils.security import get_current_user, get_password_hash, verify_password
@@ -30,6 +37,7 @@ from backend.app.mvc.views.rephrase import router as rephrase_router
 from backend.app.mvc.views.translate import router as translate_router
 from backend.app.mvc.views.analysis import router as analysis_router  # <-- ADD THIS
 from backend.app.mvc.views.contact import router as contact_router   # ← ADD THIS
+from backend.app.mvc.views.jobs import router as jobs_router
 
 logging.basicConfig(
     level=logging.INFO,
@@ -69,8 +77,22 @@ def create_app() -> FastAPI:
 
     @app.on_event("startup")
     async def on_startup():
+        # heavy libraries / tiktoken load in the background (core/lazy.py)
+        start_warmup()
         await init_db(app)
         logging.info("Database initialized.")
+        await llm_cache.bind_database(app.state.db)
+        await chunk_store.bind_database(app.state.db)
+        await text_cache.bind_database(app.state.db)
+        await ensure_blob_indexes(app.state.db)
+        await usage_recorder.bind_database(app.state.db)
+        await start_workers(app.state.db)
+
+    @app.on_event("shutdown")
+    async def on_shutdown():
+        await stop_workers()
+        await usage_recorder.close()
+        shutdown_pools()
 
     # Routers
     app.include_router(auth_router, prefix="/auth", tags=["Auth"])
@@ -82,6 +104,7 @@ def create_app() -> FastAPI:
     app.include_router(admin_router, prefix="/admin", tags=["Admin"])
     app.include_router(analysis_router, prefix="/risk", tags=["Risk"])  # <-- FIXED: Register risk analysis endpoints
     app.include_router(contact_router, prefix="/contact", tags=["Contact"])  # ← ADD
+    app.include_router(jobs_router, prefix="/jobs", tags=["Jobs"])
 
     @app.get("/auth/me", tags=["Auth"])
     async def read_current_user(current_user: UserInDB = Depends(get_current_user)):
@@ -132,4 +155,6 @@ def create_app() -> FastAPI:
 app = create_app()
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,114 @@
+# backend/tests/fake_db.py
+"""
+In-memory stand-in for the slice of Motor the tests touch: a database of
+collections with the single-document operations the controllers use, and
+a GridFS bucket keeping files in a dict.
+"""
+
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+from gridfs.errors import NoFile
+
+
+def _matches(doc: dict, query: dict) -> bool:
+    for key, want in query.items():
+        have = doc.get(key)
+        if isinstance(want, dict) and want and all(k.startswith("$") for k in want):
+            for op, arg in want.items():
+                if op == "$lte" and not (have is not None and have <= arg):
+                    return False
+                if op == "$in" and have not in arg:
+                    return False
+        elif have != want:
+            return False
+    return True
+
+
+class _Result:
+    def __init__(self, **kw: Any):
+        self.__dict__.update(kw)
+
+
+class FakeCollection:
+    def __init__(self) -> None:
+        self.docs: list[dict] = []
+
+    def _find(self, query: dict) -> Optional[dict]:
+        return next((d for d in self.docs if _matches(d, query)), None)
+
+    @staticmethod
+    def _apply(doc: dict, update: dict) -> None:
+        doc.update(copy.deepcopy(update.get("$set", {})))
+        for key, step in update.get("$inc", {}).items():
+            doc[key] = doc.get(key, 0) + step
+
+    async def create_index(self, *args: Any, **kw: Any) -> None:
+        pass
+
+    async def insert_one(self, doc: dict) -> _Result:
+        doc = {"_id": ObjectId(), **copy.deepcopy(doc)}
+        self.docs.append(doc)
+        return _Result(inserted_id=doc["_id"])
+
+    async def find_one(self, query: dict, projection: Any = None) -> Optional[dict]:
+        return copy.deepcopy(self._find(query))
+
+    async def update_one(self, query: dict, update: dict) -> _Result:
+        doc = self._find(query)
+        if doc is not None:
+            self._apply(doc, update)
+        return _Result(matched_count=int(doc is not None))
+
+    async def find_one_and_update(
+        self, query: dict, update: dict, upsert: bool = False, **kw: Any
+    ) -> Optional[dict]:
+        doc = self._find(query)
+        if doc is None:
+            if not upsert:
+                return None
+            doc = {**query, **copy.deepcopy(update.get("$setOnInsert", {}))}
+            self.docs.append(doc)
+        self._apply(doc, update)
+        return copy.deepcopy(doc)
+
+    async def find_one_and_delete(self, query: dict, projection: Any = None) -> Optional[dict]:
+        doc = self._find(query)
+        if doc is not None:
+            self.docs.remove(doc)
+        return doc
+
+    async def delete_one(self, query: dict) -> _Result:
+        doc = await self.find_one_and_delete(query)
+        return _Result(deleted_count=int(doc is not None))
+
+
+class FakeDB(dict):
+    def __missing__(self, name: str) -> FakeCollection:
+        self[name] = FakeCollection()
+        return self[name]
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        return self[name]
+
+
+class FakeBucket:
+    """GridFS bucket; every instance shares ``files`` – like one database."""
+
+    files: Dict[ObjectId, bytes] = {}
+
+    def __init__(self, db: Any = None, bucket_name: str = "fs"):
+        pass
+
+    async def upload_from_stream(self, filename: str, data: bytes, metadata: Any = None) -> ObjectId:
+        file_id = ObjectId()
+        self.files[file_id] = bytes(data)
+        return file_id
+
+    async def delete(self, file_id: ObjectId) -> None:
+        if file_id not in self.files:
+            raise NoFile(file_id)
+        del self.files[file_id]
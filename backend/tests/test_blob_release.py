@@ -0,0 +1,70 @@
+# backend/tests/test_blob_release.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from backend.app.core import blob_store
+from backend.app.core.blob_store import store_blob
+from backend.app.mvc.controllers.documents import store_document_record
+from backend.app.mvc.views.analysis import delete_risk_report
+from backend.app.mvc.views.rephrase import delete_report
+from backend.app.mvc.views.translate import delete_translation_report
+from backend.tests.fake_db import FakeBucket, FakeDB
+
+PDF = b"%PDF-1.7 the same report, uploaded twice"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(blob_store, "AsyncIOMotorGridFSBucket", FakeBucket)
+    monkeypatch.setattr(FakeBucket, "files", {})
+    return FakeDB()
+
+
+def _caller(db):
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(db=db)))
+    user = SimpleNamespace(email="owner@example.com")
+    return request, user
+
+
+def test_risk_reports_sharing_a_blob(db):
+    async def scenario():
+        request, user = _caller(db)
+        ids = []
+        for _ in range(2):
+            file_id = await store_blob(db, PDF, "report.pdf")
+            row = await db.risk_assessments.insert_one(
+                {"user_id": user.email, "report_doc_id": str(file_id)}
+            )
+            ids.append(str(row.inserted_id))
+        assert len(FakeBucket.files) == 1
+
+        await delete_risk_report(ids[0], request=request, current_user=user)
+        assert len(FakeBucket.files) == 1
+        assert db.document_blobs.docs[0]["refcount"] == 1
+
+        await delete_risk_report(ids[1], request=request, current_user=user)
+        assert FakeBucket.files == {} and db.document_blobs.docs == []
+
+    asyncio.run(scenario())
+
+
+def test_translation_and_rephrase_reports_sharing_a_blob(db):
+    async def scenario():
+        request, user = _caller(db)
+        docx = b"PK translated and rephrased to the same bytes"
+        doc_ids = [
+            await store_document_record(db, user.email, "out.docx", await store_blob(db, docx, "out.docx"))
+            for _ in range(2)
+        ]
+        tr = await db.translation_reports.insert_one({"user_id": user.email, "result_doc_id": doc_ids[0]})
+        rp = await db.rephrase_reports.insert_one({"user_id": user.email, "rephrased_doc_id": doc_ids[1]})
+
+        await delete_translation_report(str(tr.inserted_id), request, current_user=user)
+        assert len(FakeBucket.files) == 1 and len(db.documents.docs) == 1
+
+        await delete_report(str(rp.inserted_id), request, current_user=user)
+        assert FakeBucket.files == {} and db.documents.docs == []
+
+    asyncio.run(scenario())
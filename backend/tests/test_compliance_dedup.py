@@ -0,0 +1,33 @@
+# backend/tests/test_compliance_dedup.py
+from backend.app.mvc.controllers.compliance import _deduplicate_issues
+
+RULE = {
+    "rule_id": "PDPL_MISSING_BREACH_NOTIFICATION",
+    "description": "Personal data is processed but the contract has no personal-data "
+                   "breach notification obligation within 72 hours.",
+    "status": "Warning",
+    "source": "rules",
+}
+
+
+def _gpt(rule_id: str, chunk: int) -> dict:
+    return {
+        "rule_id": rule_id,
+        "description": "Personal data is processed but the contract has no personal data "
+                       "breach notification obligation within 72 hours.",
+        "status": "Issue Found",
+        "source_chunks": [chunk],
+    }
+
+
+def test_gpt_issue_with_the_rule_id_merges_into_the_rule_finding():
+    merged = _deduplicate_issues([RULE, _gpt("pdpl_missing_breach_notification", 2)])
+    assert len(merged) == 1
+    assert merged[0]["source"] == "rules" and merged[0]["status"] == "Warning"
+    assert merged[0]["source_chunks"] == [2]
+
+
+def test_gpt_issue_with_another_id_stays_separate():
+    merged = _deduplicate_issues([RULE, _gpt("PDPL-ART-20", 2), _gpt("PDPL-ART-20", 5)])
+    assert [i["rule_id"] for i in merged] == [RULE["rule_id"], "PDPL-ART-20"]
+    assert merged[1]["source_chunks"] == [2, 5]
@@ -0,0 +1,30 @@
+# backend/tests/test_compliance_rules.py
+from backend.app.mvc.controllers import compliance_rules
+from backend.app.mvc.controllers.compliance_rules import Matcher, Text, en, run_rules
+
+
+def _ids(text: str) -> set[str]:
+    return {issue.rule_id for issue in run_rules(text)}
+
+
+def test_arabic_stem_inside_a_word_does_not_match():
+    # "الطبيعي" (natural) contains "بيع" (sale)
+    text = "يلتزم الطرف الأول بحماية البيانات الشخصية للشخص الطبيعي وفقاً للنظام."
+    assert "PDPL_SALE_OF_PERSONAL_DATA" not in _ids(text)
+    assert "PDPL_INDEFINITE_RETENTION" not in _ids("تودع المبالغ في محفظة لأجل غير مسمى.")
+    assert "PDPL_SENSITIVE_DATA" not in _ids("تقدم الجمعية بيانات صحية.")
+
+
+def test_arabic_terms_match_with_clitics_and_pronouns():
+    assert "PDPL_SALE_OF_PERSONAL_DATA" in _ids("يحق للمورد بيع البيانات الشخصية للغير.")
+    assert "PDPL_SALE_OF_PERSONAL_DATA" in _ids("لا مانع من البَيْع للبيانات الشخصية.")
+    assert "PDPL_INDEFINITE_RETENTION" in _ids("يتم حفظها لأجل غير مسمى.")
+    assert "PDPL_SENSITIVE_DATA" in _ids("وتقوم الشركة بجمع بيانات صحية.")
+
+
+def test_window_edge_does_not_cut_a_word(monkeypatch):
+    # with no context around the anchor, the window for "saleable" ends
+    # right after "sale"; that must not read as a whole word
+    monkeypatch.setattr(compliance_rules, "ANCHOR_WIN", 0)
+    text = Text("x sale          saleable goods")
+    assert list(Matcher(en("sale")).finditer(text)) == [(2, 6)]
@@ -0,0 +1,63 @@
+# backend/worker.py
+"""
+Standalone background-job worker (see app/core/jobs.py).
+
+    python -m backend.worker                 # JOB_WORKER_CONCURRENCY loops
+    JOB_INPROCESS_WORKERS=0 uvicorn backend.main:app   # API without workers
+
+Environment variables
+---------------------
+JOB_WORKER_CONCURRENCY  default: 2       (jobs this process runs at a time)
+MONGODB_URI / DB_NAME   as for the API
+"""
+
+import asyncio
+import logging
+import os
+import signal
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from backend.app.core.blob_store import ensure_indexes as ensure_blob_indexes
+from backend.app.core.chunk_store import chunk_store
+from backend.app.core.text_cache import text_cache
+from backend.app.core.database import DB_NAME, MONGODB_URI
+from backend.app.core.jobs import start_workers, stop_workers
+from backend.app.core.lazy import start_warmup
+from backend.app.core.llm_cache import llm_cache
+from backend.app.core.llm_usage import usage_recorder
+from backend.app.core.process_pool import shutdown_pools
+import backend.app.mvc.controllers.jobs  # noqa: F401  – registers the handlers
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
+)
+
+CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", 2))
+
+
+async def main() -> None:
+    start_warmup()
+    db = AsyncIOMotorClient(MONGODB_URI)[DB_NAME]
+    await llm_cache.bind_database(db)
+    await chunk_store.bind_database(db)
+    await text_cache.bind_database(db)
+    await ensure_blob_indexes(db)
+    await usage_recorder.bind_database(db)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await start_workers(db, CONCURRENCY)
+    await stop.wait()
+    logging.info("Shutting down – unfinished jobs return to the queue when their lease expires")
+    await stop_workers()
+    await usage_recorder.close()
+    shutdown_pools()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
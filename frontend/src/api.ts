@@ -552,6 +552,7 @@ export interface ComplianceHistoryItem {
     num_issues: number;
     report_filename?: string | null;
     report_doc_id?: string | null;
+    pdf_state?: "pending" | "rendering" | "ready" | "failed";
 }
 export function listComplianceHistory() {
     return fetch(`${API_BASE}/compliance/history`, {
@@ -393,16 +393,15 @@ function ComplianceChecker() {
                     >
                       <FaSearch /> View
                     </button>
-                    {h.report_doc_id && (
-                      <motion.button
-                        onClick={() => downloadComplianceReportPdf(h.id)}
-                        className="flex items-center gap-1 text-sm text-[#c17829] hover:bg-[#a66224]/10 rounded-md px-3 py-1"
-                        whileHover={{ scale: 1.05 }}
-                        whileTap={{ scale: 0.95 }}
-                      >
-                        <FaDownload /> Download
-                      </motion.button>
-                    )}
+                    {/* the PDF renders on first download if it is not ready yet */}
+                    <motion.button
+                      onClick={() => downloadComplianceReportPdf(h.id)}
+                      className="flex items-center gap-1 text-sm text-[#c17829] hover:bg-[#a66224]/10 rounded-md px-3 py-1"
+                      whileHover={{ scale: 1.05 }}
+                      whileTap={{ scale: 0.95 }}
+                    >
+                      <FaDownload /> Download
+                    </motion.button>
                     <button
                       onClick={() => removeReport(h.id)}
                       className="flex items-center gap-1 text-sm text-red-600 hover:text-red-800 disabled:opacity-50"